@@ -1,9 +1,12 @@
 import React, { useState, useEffect, useRef } from 'react';
 import { Link, useNavigate } from 'react-router-dom'; // Add useNavigate
 import "./FormData.css";
-import { adminService } from '../api';
+import { adminService, eventService } from '../api';
 import LoadingSpinner from '../components/LoadingSpinner';
 
+// Fallback polling; changes normally arrive over the event stream
+const AUTO_REFRESH_INTERVAL = 60000;
+
 const FormData = () => {
   const [form, setForm] = useState({
     connections: '',
@@ -87,7 +90,7 @@ const FormData = () => {
         refreshTimerRef.current = setInterval(() => {
           console.log('Auto-refreshing submissions...');
           fetchPendingSubmissions(true); // Silent refresh
-        }, 15000); // Refresh every 15 seconds
+        }, AUTO_REFRESH_INTERVAL);
       }
     }
     
@@ -99,6 +102,13 @@ const FormData = () => {
     };
   }, [autoRefreshEnabled, currentView]);  // Remove selectedSubmission from deps to prevent loops
 
+  // New and answered submissions are pushed by the server; the timer above
+  // is only a safety net
+  useEffect(() => {
+    if (editMode || !autoRefreshEnabled || currentView !== 'submissions') return undefined;
+    return eventService.subscribe(() => fetchPendingSubmissions(true));
+  }, [editMode, autoRefreshEnabled, currentView]);
+
   const fetchPendingSubmissions = async (silent = false) => {
     if (!silent) setLoading(true);
     
@@ -527,7 +537,7 @@ const FormData = () => {
       refreshTimerRef.current = setInterval(() => {
         console.log('Auto-refreshing submissions...');
         fetchPendingSubmissions(true);
-      }, 15000);
+      }, AUTO_REFRESH_INTERVAL);
     }
   };
 
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 // Update to use the correct service for LinkedIn profile submissions
-import { submissionService } from '../api';
+import { submissionService, eventService } from '../api';
 import LoadingSpinner from '../components/LoadingSpinner';
 import './UserSubmissions.css';
 import { formatDate } from '../Utils/dateUtils'; 
@@ -30,9 +30,7 @@ const UserSubmissions = () => {
                 return;
             }
             
-            // Add cache-busting parameter to prevent browser caching
-            const timestamp = new Date().getTime();
-            const data = await submissionService.getUserSubmissions(`?t=${timestamp}`);
+            const data = await submissionService.getUserSubmissions();
             
             if (Array.isArray(data)) {
                 // First sort chronologically (oldest to newest) to determine proper submission numbers
@@ -96,9 +94,13 @@ const UserSubmissions = () => {
             fetchSubmissions();
         };
         window.addEventListener('authChange', handleAuthChange);
+
+        // Refetch (a cheap delta sync) whenever the server reports a change
+        const unsubscribe = eventService.subscribe(() => fetchSubmissions());
         
         return () => {
             window.removeEventListener('authChange', handleAuthChange);
+            unsubscribe();
         };
     }, []);
 
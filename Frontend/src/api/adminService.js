@@ -4,6 +4,7 @@
  */
 import { apiClient } from './interceptors';
 import { ENDPOINTS, AUTH_CONFIG } from './config';
+import { sendIdempotent } from './idempotency';
 
 export const adminService = {
   /**
@@ -110,9 +111,8 @@ export const adminService = {
         payload.analysis = analysisData;
       }
       
-      const response = await apiClient.post(
-        `${ENDPOINTS.ADMIN.SUBMIT_REPLY(submissionId)}`, 
-        payload
+      const response = await sendIdempotent(`reply:${submissionId}`, payload, (headers) =>
+        apiClient.post(`${ENDPOINTS.ADMIN.SUBMIT_REPLY(submissionId)}`, payload, { headers })
       );
       
       return {
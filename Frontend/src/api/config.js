@@ -58,6 +58,9 @@ export const ENDPOINTS = {
   // User submissions
   SUBMIT_PROFILE: `${BASE_URL}/api/contact/submit/`,
   USER_SUBMISSIONS: `${BASE_URL}/api/contact/user-submissions/`,
+
+  // Live updates (Server-Sent Events)
+  EVENT_TICKET: `${BASE_URL}/api/events/ticket/`,
   
   // Admin endpoints
   ADMIN: {
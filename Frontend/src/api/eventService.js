@@ -0,0 +1,90 @@
+/**
+ * Event Service
+ * Live updates pushed by the server (Server-Sent Events)
+ */
+import { apiClient } from './interceptors';
+import { ENDPOINTS } from './config';
+
+const EVENT_TYPES = [
+  'submission.created',
+  'submission.updated',
+  'submission.deleted',
+  'analysis.updated',
+  'resync',
+];
+
+// Reconnect delays (ms) after a dropped stream
+const MIN_RETRY_DELAY = 1000;
+const MAX_RETRY_DELAY = 60000;
+
+export const eventService = {
+  /**
+   * Receive the events of the signed-in user (and of the admin dashboard
+   * for admins). Events only say what changed; refetch the data from the
+   * regular endpoints. Missed events are not replayed, so 'resync' is also
+   * reported after every reconnect.
+   * @param {Function} onEvent - Called with (type, data)
+   * @returns {Function} Unsubscribe
+   */
+  subscribe(onEvent) {
+    let source = null;
+    let timer = null;
+    let closed = false;
+    let delay = MIN_RETRY_DELAY;
+    let connectedBefore = false;
+
+    const retry = () => {
+      if (closed) return;
+      timer = setTimeout(connect, delay);
+      delay = Math.min(delay * 2, MAX_RETRY_DELAY);
+    };
+
+    const connect = async () => {
+      if (closed || typeof EventSource === 'undefined' || !localStorage.getItem('token')) return;
+      try {
+        // EventSource cannot send the Authorization header; trade the
+        // token for a short-lived ticket instead
+        const response = await apiClient.post(ENDPOINTS.EVENT_TICKET);
+        if (closed) return;
+        const { ticket, url } = response.data;
+        source = new EventSource(`${url}?ticket=${encodeURIComponent(ticket)}`);
+      } catch (error) {
+        console.warn('Could not open event stream:', error.message);
+        retry();
+        return;
+      }
+
+      source.addEventListener('ready', () => {
+        delay = MIN_RETRY_DELAY;
+        if (connectedBefore) onEvent('resync', {});
+        connectedBefore = true;
+      });
+      EVENT_TYPES.forEach((type) => {
+        source.addEventListener(type, (event) => {
+          let data = {};
+          try {
+            data = JSON.parse(event.data);
+          } catch {
+            // Events without a payload
+          }
+          onEvent(type, data);
+        });
+      });
+      source.onerror = () => {
+        // The ticket has expired by now, so reconnect with a new one
+        // instead of letting EventSource retry the same URL
+        source.close();
+        source = null;
+        retry();
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(timer);
+      if (source) source.close();
+    };
+  },
+};
@@ -0,0 +1,46 @@
+/**
+ * Idempotency keys
+ * Lets the server recognise repeats of a POST (double clicks, retries after
+ * a dropped connection) and replay its first response instead of acting twice
+ */
+
+// Key of the last unanswered request per action
+const pending = new Map();
+
+const newKey = () =>
+  (window.crypto?.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`);
+
+/**
+ * Send a request with an Idempotency-Key header. Repeats of the same action
+ * with the same payload reuse the key until the server has answered, so a
+ * retry never creates a second record; once answered, the next call is a
+ * new request.
+ * @param {string} action - What is being done, e.g. 'reply:42'
+ * @param {Object} payload - Request body
+ * @param {Function} send - Called with the headers to add; returns the request promise
+ * @returns {Promise<Object>} The response
+ */
+export async function sendIdempotent(action, payload, send) {
+  const body = JSON.stringify(payload);
+  let entry = pending.get(action);
+  if (!entry || entry.body !== body) {
+    entry = { body, key: newKey() };
+    pending.set(action, entry);
+  }
+  const forget = () => {
+    if (pending.get(action) === entry) pending.delete(action);
+  };
+
+  try {
+    const response = await send({ 'Idempotency-Key': entry.key });
+    forget();
+    return response;
+  } catch (error) {
+    const status = error.response?.status;
+    // Keep the key when the outcome is unknown or still in progress
+    if (status && status < 500 && status !== 409) forget();
+    throw error;
+  }
+}
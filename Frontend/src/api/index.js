@@ -10,12 +10,14 @@ import { ENDPOINTS } from './config';
 import { authService } from './authService';
 import { submissionService } from './submissionService';
 import { adminService } from './adminService';
+import { eventService } from './eventService';
 
 // Export services - make sure each one is exported only once
 export {
   authService,
   submissionService,
-  adminService
+  adminService,
+  eventService
 };
 
 // Export config
@@ -4,6 +4,11 @@
  */
 import { apiClient } from './interceptors';
 import { ENDPOINTS } from './config';
+import { sendIdempotent } from './idempotency';
+
+// Incremental sync state of getUserSubmissions, per signed-in token
+const newSyncState = (token) => ({ token, watermark: null, byId: new Map() });
+let syncState = newSyncState(null);
 
 export const submissionService = {
   /**
@@ -13,7 +18,9 @@ export const submissionService = {
    */
   async submitProfile(data) {
     try {
-      const response = await apiClient.post(ENDPOINTS.SUBMIT_PROFILE, data);
+      const response = await sendIdempotent('submit', data, (headers) =>
+        apiClient.post(ENDPOINTS.SUBMIT_PROFILE, data, { headers })
+      );
       
       return {
         success: true,
@@ -30,11 +37,13 @@ export const submissionService = {
   },
   
   /**
-   * Get user's submissions history
-   * @param {string} queryString - Optional query string for cache busting
+   * Get user's submissions history, newest first.
+   * Only the first call downloads the whole history; later calls send the
+   * last watermark and merge the submissions changed since then (and the
+   * browser revalidates unchanged responses with a 304).
    * @returns {Promise<Array>} User submissions
    */
-  async getUserSubmissions(queryParams = '') {
+  async getUserSubmissions() {
     try {
       console.log('Fetching user submissions...');
       
@@ -44,17 +53,33 @@ export const submissionService = {
         console.error('No auth token available');
         throw new Error('Authentication required');
       }
+      if (syncState.token !== token) {
+        syncState = newSyncState(token);
+      }
       
-      const response = await apiClient.get(`${ENDPOINTS.USER_SUBMISSIONS}${queryParams}`);
+      const since = syncState.watermark ? encodeURIComponent(syncState.watermark) : '';
+      const response = await apiClient.get(`${ENDPOINTS.USER_SUBMISSIONS}?since=${since}`);
+      const { submissions, count, watermark } = response.data || {};
       
       // Validate response format
-      if (!Array.isArray(response.data)) {
+      if (!Array.isArray(submissions)) {
         console.error('Invalid response format:', response.data);
         return [];
       }
       
-      console.log(`Got ${response.data.length} submissions`);
-      return response.data;
+      submissions.forEach((submission) => syncState.byId.set(submission.id, submission));
+      if (syncState.byId.size !== count && syncState.watermark) {
+        // Submissions were deleted since the last sync: start over
+        syncState = newSyncState(token);
+        return this.getUserSubmissions();
+      }
+      syncState.watermark = watermark;
+      
+      const all = [...syncState.byId.values()].sort(
+        (a, b) => new Date(b.created_at) - new Date(a.created_at)
+      );
+      console.log(`Got ${submissions.length} changed submissions, ${all.length} in total`);
+      return all;
     } catch (error) {
       console.error('Failed to fetch user submissions:', error);
       
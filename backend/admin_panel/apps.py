@@ -4,3 +4,7 @@ class AdminPanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'admin_panel'
     verbose_name = 'Admin Analysis Panel'
+
+    def ready(self):
+        # Register model signal receivers
+        from . import signals  # noqa: F401
@@ -0,0 +1,107 @@
+"""
+Packed bitmask of the boolean indicators of ``ProfileAnalysis``.
+
+Each indicator owns one bit of the ``flags`` column (its position in
+``FLAG_BITS``), kept in sync by ``ProfileAnalysis.save``. Filters across
+several indicators become a single bitwise predicate
+(``ProfileAnalysis.objects.has_all_flags(...)``), and analytics can pull
+one integer per row into NumPy (``load_flags``) instead of two dozen
+boolean columns.
+
+Bit positions are stored data: only ever append to ``FLAG_BITS``.
+"""
+from django.db.models import Case, IntegerField, Value, When
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+FLAG_BITS = (
+    'has_verification_shield',
+    'has_custom_url',
+    'has_profile_summary',
+    'has_professional_photo',
+    'has_old_photo',
+    'outdated_job_info',
+    'missing_about_or_education',
+    'profile_completeness',
+    'has_recommendations',
+    'personalized_profile',
+    'recent_activity',
+    'engagement_with_content',
+    'engagement_history',
+    'post_history_older_than_year',
+    'profile_updates',
+    'shared_interests',
+    'open_to_networking',
+    'industry_relevance',
+    'active_job_titles',
+    'newly_created',
+    'sparse_job_history',
+    'default_profile_picture',
+    'low_connections',
+    'no_engagement_on_posts',
+)
+BIT = {name: 1 << position for position, name in enumerate(FLAG_BITS)}
+
+
+def flag_mask(*names):
+    """Bitmask with the bits of ``names`` set"""
+    unknown = set(names) - set(BIT)
+    if unknown:
+        raise ValueError(f"Unknown indicator flag(s): {', '.join(sorted(unknown))}")
+    mask = 0
+    for name in names:
+        mask |= BIT[name]
+    return mask
+
+
+def pack_flags(analysis):
+    """The ``flags`` value of an analysis instance"""
+    mask = 0
+    for name, bit in BIT.items():
+        if getattr(analysis, name):
+            mask |= bit
+    return mask
+
+
+def unpack_flags(mask):
+    """Names of the indicators set in ``mask``"""
+    return [name for name, bit in BIT.items() if mask & bit]
+
+
+def flags_expression():
+    """SQL expression computing ``flags`` from the boolean columns (for backfills)"""
+    expression = Value(0)
+    for name, bit in BIT.items():
+        expression = expression + Case(When(**{name: True}, then=Value(bit)), default=Value(0),
+                                       output_field=IntegerField())
+    return expression
+
+
+def load_flags(queryset=None):
+    """``(ids, masks)`` NumPy arrays of the analyses in ``queryset`` (default: all)"""
+    from .models import ProfileAnalysis
+
+    if np is None:
+        raise RuntimeError("NumPy is required to load indicator flags into arrays")
+    queryset = ProfileAnalysis.objects.all() if queryset is None else queryset
+    rows = queryset.order_by().values_list('id', 'flags')
+    data = np.fromiter(rows, dtype=[('id', np.int64), ('flags', np.uint32)])
+    return data['id'], data['flags']
+
+
+def array_has_all(masks, *names):
+    """Boolean array: which ``masks`` have every one of ``names`` set"""
+    mask = np.uint32(flag_mask(*names))
+    return (masks & mask) == mask
+
+
+def array_has_any(masks, *names):
+    return (masks & np.uint32(flag_mask(*names))) != 0
+
+
+def flag_counts(masks):
+    """How many of ``masks`` have each indicator set"""
+    return {name: int(np.count_nonzero(masks & np.uint32(bit))) for name, bit in BIT.items()}
@@ -0,0 +1,355 @@
+"""
+Traffic generation for local load tests (``manage.py loadtest``).
+
+A ``LoadGenerator`` replays a weighted mix of scenarios - each one a
+realistic API request made with the credentials of seeded users (see
+``seeding.py``) - against either the WSGI application in-process or a
+running server. With a target rate the load is open-loop: requests are
+scheduled at fixed intervals and their latency is measured from the
+scheduled time, so a server that falls behind shows up as queueing delay
+instead of silently lowering the offered load.
+"""
+import io
+import json
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from contact.models import ContactSubmission
+from users.models import UserSubscription
+from .seeding import SEED_EMAIL_DOMAIN, SEED_PASSWORD
+
+User = get_user_model()
+
+# Seen by SecurityMiddleware through SECURE_PROXY_SSL_HEADER, as behind Render's proxy
+FORWARDED_HEADERS = {'X-Forwarded-Proto': 'https'}
+
+DEFAULT_MIX = {
+    'poll': 50,
+    'login': 10,
+    'submit': 10,
+    'admin_list': 15,
+    'admin_detail': 10,
+    'admin_reply': 5,
+}
+
+
+# Transports
+
+class WSGITransport:
+    """Calls the Django WSGI application directly, one request per call"""
+
+    def __init__(self, application, host='localhost'):
+        self.application = application
+        self.host = host
+
+    def request(self, method, path, headers=None, body=b''):
+        path, _, query = path.partition('?')
+        environ = {
+            'REQUEST_METHOD': method,
+            'PATH_INFO': path,
+            'QUERY_STRING': query,
+            'SERVER_NAME': self.host,
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_HOST': self.host,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in {**FORWARDED_HEADERS, **(headers or {})}.items():
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+
+        status = []
+        result = self.application(environ, lambda s, h, exc_info=None: status.append(s))
+        try:
+            content = b''.join(result)
+        finally:
+            # Fires request_finished, which releases the thread's DB connection
+            if hasattr(result, 'close'):
+                result.close()
+        return int(status[0].split(' ', 1)[0]), content
+
+
+class HTTPTransport:
+    """Sends requests to a running server with one pooled session per thread"""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def request(self, method, path, headers=None, body=b''):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        response = session.request(
+            method, self.base_url + path, data=body or None, timeout=self.timeout,
+            headers={'Content-Type': 'application/json', **FORWARDED_HEADERS, **(headers or {})},
+            allow_redirects=False,
+        )
+        return response.status_code, response.content
+
+
+# Accounts and data the scenarios use
+
+def user_token(user):
+    """Access token with the claims LoginView issues"""
+    refresh = RefreshToken.for_user(user)
+    refresh['email'] = user.email
+    refresh['role'] = user.role
+    refresh['user_id'] = user.id
+    return str(refresh.access_token)
+
+
+def admin_token():
+    """Access token of the settings admin, as LoginView issues it"""
+    refresh = RefreshToken()
+    refresh['email'] = settings.ADMIN_EMAIL
+    refresh['role'] = 'admin'
+    return str(refresh.access_token)
+
+
+class LoadContext:
+    """Seeded accounts with tokens, and submissions for the admin flows"""
+
+    def __init__(self, accounts=100, seed=0, with_admin=True):
+        rng = random.Random(seed)
+        seeded = User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+        emails = list(seeded.order_by('id').values_list('email', flat=True)[:accounts * 10])
+        if not emails:
+            raise ValueError("No seeded users; run `manage.py seed_load` first")
+        self.login_emails = rng.sample(emails, min(accounts, len(emails)))
+        self.users = [user_token(user) for user in seeded.filter(email__in=self.login_emails)]
+
+        # Only premium users can submit without running into their monthly quota
+        premium = seeded.filter(subscription__tier='premium')
+        self.submitters = [user_token(user) for user in premium.order_by('id')[:accounts]]
+        if not self.submitters:
+            premium = list(seeded.order_by('id')[:accounts])
+            for user in premium:
+                UserSubscription.objects.update_or_create(
+                    user=user, defaults={'tier': 'premium', 'end_date': None}
+                )
+            self.submitters = [user_token(user) for user in premium]
+
+        self.admin = admin_token() if with_admin else None
+        self.submission_ids = list(
+            ContactSubmission.objects.order_by('-created_at').values_list('id', flat=True)[:1000]
+        )
+        # Each pending submission is replied to once
+        self.pending_ids = deque(
+            ContactSubmission.objects.filter(is_processed=False)
+            .order_by('-created_at').values_list('id', flat=True)[:10000]
+        )
+
+
+# Scenarios: ``(rng, context) -> (method, path, token, body, expected statuses)``
+
+def login(rng, context):
+    body = {'email': rng.choice(context.login_emails), 'password': SEED_PASSWORD}
+    return 'POST', '/api/auth/login/', None, body, (200,)
+
+
+def submit(rng, context):
+    body = {
+        'linkedin_url': f'https://www.linkedin.com/in/loadtest-{rng.randrange(10 ** 9)}/',
+        'message': 'Load test submission',
+    }
+    return 'POST', '/api/contact/submit/', rng.choice(context.submitters), body, (201,)
+
+
+def poll(rng, context):
+    return 'GET', '/api/contact/user-submissions/', rng.choice(context.users), None, (200,)
+
+
+def admin_list(rng, context):
+    path = '/api/admin/submissions/' + ('?status=pending' if rng.random() < 0.5 else '')
+    return 'GET', path, context.admin, None, (200,)
+
+
+def admin_detail(rng, context):
+    path = f'/api/admin/submissions/{rng.choice(context.submission_ids)}/'
+    return 'GET', path, context.admin, None, (200,)
+
+
+def admin_reply(rng, context):
+    try:
+        submission_id = context.pending_ids.popleft()
+    except IndexError:
+        submission_id = rng.choice(context.submission_ids)
+    path = f'/api/contact/submissions/{submission_id}/reply/'
+    return 'POST', path, context.admin, {'reply': 'Load test reply'}, (200,)
+
+
+SCENARIOS = {
+    'login': login,
+    'submit': submit,
+    'poll': poll,
+    'admin_list': admin_list,
+    'admin_detail': admin_detail,
+    'admin_reply': admin_reply,
+}
+
+ADMIN_SCENARIOS = {'admin_list', 'admin_detail', 'admin_reply'}
+
+
+# Running and reporting
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class ScenarioStats:
+    def __init__(self):
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.exceptions = {}
+
+    def summary(self, elapsed):
+        ordered = sorted(self.latencies)
+        count = len(ordered)
+        return {
+            'requests': count,
+            'rps': round(count / elapsed, 2) if elapsed else 0.0,
+            'error_rate': round(self.errors / count, 4) if count else 0.0,
+            'statuses': {str(status): n for status, n in sorted(self.statuses.items())},
+            'exceptions': self.exceptions,
+            **{
+                f'{name}_ms': round(value * 1000, 2) if value is not None else None
+                for name, value in (
+                    ('p50', percentile(ordered, 0.5)),
+                    ('p90', percentile(ordered, 0.9)),
+                    ('p99', percentile(ordered, 0.99)),
+                    ('max', ordered[-1] if ordered else None),
+                )
+            },
+        }
+
+
+class LoadGenerator:
+    """
+    Drive ``transport`` with the scenarios of ``mix`` (name -> weight).
+    ``rate`` is the target requests per second over all scenarios; 0 runs
+    closed-loop, each of the ``concurrency`` threads sending its next
+    request as soon as the previous one completes.
+    """
+
+    def __init__(self, transport, context, mix, rate=0.0, concurrency=16, duration=30.0, warmup=5.0, seed=0):
+        self.transport = transport
+        self.context = context
+        self.names = [name for name, weight in mix.items() if weight > 0]
+        self.cum_weights = []
+        total = 0.0
+        for name in self.names:
+            total += mix[name]
+            self.cum_weights.append(total)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.duration = duration
+        self.warmup = warmup
+        self.seed = seed
+        self._lock = threading.Lock()
+        self.stats = {name: ScenarioStats() for name in self.names}
+        self.max_lag = 0.0
+
+    def execute(self, name, request_seed, scheduled, measure_from):
+        rng = random.Random(request_seed)
+        method, path, token, body, expected = SCENARIOS[name](rng, self.context)
+        headers = {'Authorization': f'Bearer {token}'} if token else {}
+        status, error = None, None
+        start = time.perf_counter()
+        try:
+            status, _ = self.transport.request(
+                method, path, headers, json.dumps(body).encode() if body is not None else b''
+            )
+        except Exception as e:
+            error = type(e).__name__
+        finished = time.perf_counter()
+        if scheduled < measure_from:
+            return
+        with self._lock:
+            stats = self.stats[name]
+            stats.latencies.append(finished - scheduled)
+            self.max_lag = max(self.max_lag, start - scheduled)
+            if error:
+                stats.errors += 1
+                stats.exceptions[error] = stats.exceptions.get(error, 0) + 1
+            else:
+                stats.statuses[status] = stats.statuses.get(status, 0) + 1
+                if status not in expected:
+                    stats.errors += 1
+
+    def run(self):
+        rng = random.Random(self.seed)
+        started = time.perf_counter()
+        measure_from = started + self.warmup
+        end = measure_from + self.duration
+
+        def next_request():
+            return rng.choices(self.names, cum_weights=self.cum_weights)[0], rng.randrange(2 ** 32)
+
+        if self.rate > 0:
+            with ThreadPoolExecutor(self.concurrency, thread_name_prefix='loadtest') as pool:
+                interval, number = 1.0 / self.rate, 0
+                while True:
+                    scheduled = started + number * interval
+                    if scheduled >= end:
+                        break
+                    delay = scheduled - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    pool.submit(self.execute, *next_request(), scheduled, measure_from)
+                    number += 1
+        else:
+            def worker():
+                while True:
+                    with self._lock:
+                        name, request_seed = next_request()
+                    now = time.perf_counter()
+                    if now >= end:
+                        return
+                    self.execute(name, request_seed, now, measure_from)
+
+            threads = [threading.Thread(target=worker, name=f'loadtest-{i}') for i in range(self.concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        elapsed = time.perf_counter() - measure_from
+        scenarios = {name: stats.summary(elapsed) for name, stats in self.stats.items()}
+        overall = ScenarioStats()
+        for stats in self.stats.values():
+            overall.latencies += stats.latencies
+            overall.errors += stats.errors
+            for status, n in stats.statuses.items():
+                overall.statuses[status] = overall.statuses.get(status, 0) + n
+            for error, n in stats.exceptions.items():
+                overall.exceptions[error] = overall.exceptions.get(error, 0) + n
+        return {
+            'target_rps': self.rate or None,
+            'concurrency': self.concurrency,
+            'duration_s': round(elapsed, 2),
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+            'scenarios': scenarios,
+            'total': overall.summary(elapsed),
+        }
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from admin_panel.flags import flags_expression
+from admin_panel.models import ProfileAnalysis
+
+
+class Command(BaseCommand):
+    help = ("Compute the packed indicator bitmask (ProfileAnalysis.flags) from the boolean columns "
+            "for existing analyses, in id ranges so no single UPDATE locks the whole table")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50000, help='Analyses updated per statement')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every row, not only rows whose bitmask is out of date')
+
+    def handle(self, *args, **options):
+        expression = flags_expression()
+        top = ProfileAnalysis.objects.aggregate(top=Max('id'))['top'] or 0
+        start, updated = time.perf_counter(), 0
+        for low in range(0, top, options['batch_size']):
+            rows = ProfileAnalysis.objects.filter(id__gt=low, id__lte=low + options['batch_size'])
+            if not options['all']:
+                rows = rows.exclude(flags=expression)
+            # Plain UPDATE: no signals, and updated_at is left alone
+            updated += rows.update(flags=expression)
+            self.stdout.write(f"  Up to id {min(low + options['batch_size'], top)}: {updated} updated")
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled indicator flags of {updated} analyses in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,405 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from google.auth import crypt, jwt
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from admin_panel.models import ProfileAnalysis
+from backend.throttling import lifted_rates
+from admin_panel.seeding import SEED_PASSWORD, seed_dataset, seed_email
+from contact.models import ContactSubmission
+from contact.pagination import KeysetPaginator
+from users import google_auth
+from users.management.commands.bench_google_signin import (
+    AUDIENCE, KEY_ID, StandInCertsServer, generate_key_pair,
+)
+from users.models import UserSubscription
+
+User = get_user_model()
+
+ADMIN_EMAIL = 'bench-admin@example.com'
+ADMIN_PASSWORD = 'bench-admin-password'
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'bench_baseline.json')
+
+# Transaction bookkeeping issued by the benchmark itself, not by the view
+IGNORED_SQL = ('BEGIN', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class Endpoint:
+    """
+    One benchmarked request. ``kwargs``, ``data`` and ``query`` may be
+    callables taking the fixtures and the iteration number; ``headers``
+    are extra request headers. ``budget`` is the maximum number of SQL
+    queries the request may issue. With ``repeat`` the request is sent once
+    before measuring and its effects kept, so the measured ones repeat it.
+    """
+
+    def __init__(self, name, method='GET', auth='user', budget=5, kwargs=None, data=None, query=None,
+                 expect=(200, 201), variant='', headers=None, repeat=False):
+        self.name = name
+        self.variant = variant
+        self.method = method
+        self.auth = auth
+        self.budget = budget
+        self.kwargs = kwargs
+        self.data = data
+        self.query = query
+        self.expect = expect
+        self.headers = headers or {}
+        self.repeat = repeat
+
+    @property
+    def label(self):
+        label = f'{self.method} {self.name}'
+        return f'{label} ({self.variant})' if self.variant else label
+
+    def resolve(self, value, fixtures, iteration):
+        return value(fixtures, iteration) if callable(value) else value
+
+
+# Every named URL of the API must be declared here with a query budget
+ENDPOINTS = [
+    # users/urls.py
+    # Each rate limit (backend/throttling.py) adds a SELECT and an UPDATE
+    Endpoint('login', 'POST', auth=None, budget=6,
+             data=lambda f, i: {'email': f.user.email, 'password': SEED_PASSWORD}),
+    Endpoint('register', 'POST', auth=None, budget=8, expect=(201,),
+             data=lambda f, i: {'email': f'bench-new-{i}@example.com', 'password': 'Bench-pass-123',
+                                'password2': 'Bench-pass-123'}),
+    Endpoint('token_refresh', 'POST', auth=None, budget=0, data=lambda f, i: {'refresh': f.refresh_token}),
+    Endpoint('profile', budget=1),
+    Endpoint('profile_no_slash', budget=1),
+    Endpoint('verify_email', 'POST', auth=None, budget=3,
+             data=lambda f, i: {'token': f'{f.uidb64}-{f.reset_token}'}),
+    Endpoint('google_auth', 'POST', auth=None, budget=2,
+             data=lambda f, i: {'credential': f.google_credential, 'action': 'login'}),
+    Endpoint('password_reset', 'POST', auth=None, budget=6, data=lambda f, i: {'email': f.user.email}),
+    Endpoint('password_reset_confirm', 'POST', auth=None, budget=3,
+             kwargs=lambda f, i: {'uidb64': f.uidb64, 'token': f.reset_token},
+             data={'password': 'Bench-pass-456', 'password2': 'Bench-pass-456'}),
+    Endpoint('resend_verification', 'POST', auth=None, budget=5, data=lambda f, i: {'email': f.user.email}),
+    Endpoint('user_subscription', budget=2),
+    Endpoint('admin_user_subscription', auth='admin', budget=2),
+    Endpoint('admin_user_subscription', 'POST', auth='admin', budget=6,
+             data=lambda f, i: {'email': f.user.email, 'tier': 'basic', 'valid_for_days': 30}),
+    Endpoint('admin_user_subscription', 'DELETE', auth='admin', budget=6,
+             query=lambda f, i: {'email': f.user.email}),
+
+    # contact/urls.py
+    Endpoint('submit_contact', 'POST', auth='premium', budget=12, expect=(201,),
+             data={'linkedin_url': 'https://www.linkedin.com/in/bench-profile/', 'message': 'Benchmark'}),
+    # Repeats of the first request's Idempotency-Key replay its response:
+    # the rejected INSERT of the key, then its row
+    Endpoint('submit_contact', 'POST', auth='premium', budget=2, expect=(201,), variant='replay',
+             headers={'Idempotency-Key': 'bench-submit'}, repeat=True,
+             data={'linkedin_url': 'https://www.linkedin.com/in/bench-profile/', 'message': 'Benchmark'}),
+    # User, the (email, updated_at) lookup behind ETag/304, then the rows
+    Endpoint('user_submissions', budget=3),
+    Endpoint('user_submissions', budget=3, query={'since': '2000-01-01T00:00:00Z'}, variant='delta'),
+    # Unpaginated: the heaviest user's cold request serializes every analysis
+    Endpoint('user_analyses', budget=2),
+    Endpoint('event_ticket', 'POST', budget=1, expect=(201,)),
+    # ContactMessageView currently answers 400 with empty errors even after saving
+    Endpoint('contact_message', 'POST', auth=None, budget=3, expect=(400,),
+             data={'linkedin_url': 'https://www.linkedin.com/in/bench-profile/', 'message': 'Benchmark',
+                   'email': 'visitor@example.com'}),
+    Endpoint('admin_reply', 'POST', auth='admin', budget=8,
+             kwargs=lambda f, i: {'submission_id': f.pending.id}, data={'reply': 'Benchmark reply'}),
+
+    # admin_panel/urls.py
+    # Needs a database admin: the settings admin (id 0) cannot be created_by.
+    # ProfileAnalysisSerializer.create reads context['request'], which the view
+    # does not pass, so the endpoint currently fails with a 500
+    Endpoint('profile_analysis_create', 'POST', auth='staff', budget=12, expect=(500,),
+             data=lambda f, i: {'submission_id': f.pending.id, 'score': 60, 'risk_level': 'medium'}),
+    Endpoint('profile_analysis_detail', auth='admin', budget=2,
+             kwargs=lambda f, i: {'analysis_id': f.analysis.id}),
+    Endpoint('profile_analysis_detail', 'PUT', auth='admin', budget=8,
+             kwargs=lambda f, i: {'analysis_id': f.analysis.id}, data={'score': 75, 'risk_level': 'low'}),
+    Endpoint('submission_analysis_status', auth='admin', budget=2,
+             kwargs=lambda f, i: {'submission_id': f.analysis.submission_id}),
+    Endpoint('similar_profiles', auth='admin', budget=5,
+             kwargs=lambda f, i: {'submission_id': f.analysis.submission_id}),
+    Endpoint('prior_analysis', auth='admin', budget=5,
+             kwargs=lambda f, i: {'submission_id': f.pending.id}),
+    Endpoint('admin_dashboard_stats', auth='admin', budget=2),
+    Endpoint('admin_metrics', auth='admin', budget=1),
+
+    # backend/urls.py
+    Endpoint('admin_submissions', auth='admin', budget=3),
+    Endpoint('admin_submissions', auth='admin', budget=3, query={'status': 'pending'}, variant='pending'),
+    Endpoint('admin_submissions', auth='admin', budget=3, query=lambda f, i: {'after': f.deep_cursor},
+             variant='deep cursor'),
+    Endpoint('admin_submission_detail', auth='admin', budget=2,
+             kwargs=lambda f, i: {'submission_id': f.pending.id}),
+    Endpoint('admin_processed_submissions', auth='admin', budget=3),
+    Endpoint('admin_delete_submission', 'DELETE', auth='admin', budget=10,
+             kwargs=lambda f, i: {'submission_id': f.analysis.submission_id}),
+    Endpoint('root_google_auth', 'POST', auth=None, budget=2,
+             data=lambda f, i: {'credential': f.google_credential, 'action': 'login'}),
+]
+
+# URL names that are not part of the API
+EXCLUDED_NAMES = {'spa-fallback'}
+
+
+def api_url_names(patterns=None, prefix=''):
+    """Names of every URL pattern outside the Django admin site"""
+    names = set()
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            if not route.startswith('django-admin'):
+                names |= api_url_names(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern) and pattern.name and pattern.name not in EXCLUDED_NAMES:
+            names.add(pattern.name)
+    return names
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Fixtures:
+    """Rows and credentials the endpoint specs refer to"""
+
+    def __init__(self, google_signer):
+        # The heaviest seeded user, so per-user lists are realistically large
+        heavy = (ContactSubmission.objects.filter(user__isnull=False)
+                 .values('user_id').annotate(n=Count('id')).order_by('-n').first())
+        self.user = User.objects.get(pk=heavy['user_id'])
+        self.premium = User.objects.get(email=seed_email(1))
+        UserSubscription.objects.update_or_create(
+            user=self.premium, defaults={'tier': 'premium', 'end_date': None}
+        )
+
+        self.pending = (ContactSubmission.objects
+                        .filter(is_processed=False, analysis__isnull=True)
+                        .order_by('-created_at').first())
+        self.analysis = ProfileAnalysis.objects.select_related('submission').order_by('-id').first()
+        # A cursor half way through the admin list
+        middle = ContactSubmission.objects.order_by('-created_at', '-id')[ContactSubmission.objects.count() // 2]
+        self.deep_cursor = KeysetPaginator('created_at').encode_cursor(middle)
+        self.staff, _ = User.objects.get_or_create(
+            email='bench-staff@example.com', defaults={'is_staff': True, 'role': 'admin'}
+        )
+
+        refresh = RefreshToken.for_user(self.user)
+        refresh['email'] = self.user.email
+        refresh['role'] = self.user.role
+        refresh['user_id'] = self.user.id
+        self.refresh_token = str(refresh)
+        self.tokens = {
+            'user': str(refresh.access_token),
+            'premium': self._access_token(self.premium),
+            'admin': self._admin_token(),
+            'staff': self._access_token(self.staff),
+        }
+
+        self.uidb64 = urlsafe_base64_encode(force_bytes(self.user.pk))
+        self.reset_token = default_token_generator.make_token(self.user)
+        now = int(time.time())
+        self.google_credential = jwt.encode(google_signer, {
+            'iss': 'https://accounts.google.com',
+            'aud': AUDIENCE,
+            'sub': '1234567890',
+            'email': self.user.email,
+            'email_verified': True,
+            'iat': now,
+            'exp': now + 3600,
+        }).decode()
+
+    @staticmethod
+    def _access_token(user):
+        refresh = RefreshToken.for_user(user)
+        refresh['email'] = user.email
+        refresh['role'] = user.role
+        refresh['user_id'] = user.id
+        return str(refresh.access_token)
+
+    @staticmethod
+    def _admin_token():
+        # Same claims as LoginView issues for the settings admin
+        refresh = RefreshToken()
+        refresh['email'] = ADMIN_EMAIL
+        refresh['role'] = 'admin'
+        return str(refresh.access_token)
+
+
+class Command(BaseCommand):
+    help = ("Seed a test database and measure latency and SQL query counts of every API endpoint, "
+            "failing on query-budget overruns or latency regressions against a stored baseline")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=2000, help='Users to seed')
+        parser.add_argument('--submissions', type=int, default=200000, help='Submissions to seed')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed of the dataset')
+        parser.add_argument('--iterations', type=int, default=20, help='Requests per endpoint')
+        parser.add_argument('--keepdb', action='store_true',
+                            help='Keep the seeded test database and reuse it on the next run')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+        parser.add_argument('--threshold', type=float, default=0.25,
+                            help='Allowed p95 regression versus the baseline (0.25 = 25%%)')
+        parser.add_argument('--min-regression-ms', type=float, default=2.0,
+                            help='Ignore p95 regressions smaller than this many milliseconds')
+
+    def handle(self, *args, **options):
+        # Always run against a separate test database, never the configured one
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            if not ContactSubmission.objects.exists():
+                self.stdout.write(f"Seeding {options['users']} users and {options['submissions']} submissions...")
+                start = time.perf_counter()
+                counts = seed_dataset(users=options['users'], submissions=options['submissions'],
+                                      seed=options['seed'], log=lambda m: self.stdout.write(f"  {m}"))
+                self.stdout.write(f"Seeded {counts} in {time.perf_counter() - start:.1f}s")
+            results = self.run_benchmarks(options)
+        finally:
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        failures = self.report(results, options)
+        if options['save_baseline']:
+            with open(options['baseline'], 'w') as f:
+                json.dump({label: {k: r[k] for k in ('p50_ms', 'p95_ms', 'queries')}
+                           for label, r in results.items()}, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Baseline written to {options['baseline']}")
+        if failures:
+            raise CommandError(f"{len(failures)} endpoint check(s) failed: {', '.join(failures)}")
+
+    def run_benchmarks(self, options):
+        private_pem, cert_pem = generate_key_pair()
+        signer = crypt.RSASigner.from_string(private_pem, key_id=KEY_ID)
+        certs_server = StandInCertsServer({KEY_ID: cert_pem}, latency=0, max_age=3600)
+        threading.Thread(target=certs_server.serve_forever, daemon=True).start()
+
+        overrides = dict(
+            ALLOWED_HOSTS=['*'],
+            SECURE_SSL_REDIRECT=False,
+            ADMIN_EMAIL=ADMIN_EMAIL,
+            ADMIN_PASSWORD=ADMIN_PASSWORD,
+            GOOGLE_OAUTH_CLIENT_ID=AUDIENCE,
+            GOOGLE_CERTS_URL=certs_server.url,
+            METRICS_DIR=tempfile.mkdtemp(prefix='bench-metrics-'),
+            # The limiter runs (and is counted) but never rejects
+            REST_FRAMEWORK=lifted_rates(),
+        )
+        saved_verifier = google_auth._verifier
+        results = {}
+        try:
+            with override_settings(**overrides):
+                google_auth._verifier = None
+                fixtures = Fixtures(signer)
+                declared = {endpoint.name for endpoint in ENDPOINTS}
+                for name in sorted(api_url_names() - declared):
+                    results[f'? {name}'] = {'error': 'no query budget declared'}
+                for endpoint in ENDPOINTS:
+                    results[endpoint.label] = self.measure(
+                        endpoint, fixtures, options['iterations']
+                    )
+        finally:
+            google_auth._verifier = saved_verifier
+            certs_server.shutdown()
+            certs_server.server_close()
+        return results
+
+    def measure(self, endpoint, fixtures, iterations):
+        client = Client(raise_request_exception=False)
+        headers = {f"HTTP_{name.upper().replace('-', '_')}": value for name, value in endpoint.headers.items()}
+        if endpoint.auth:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {fixtures.tokens[endpoint.auth]}'
+
+        # Start cold: the first request pays for any cache misses
+        cache.clear()
+        latencies, query_counts, statuses = [], [], set()
+        # Roll everything back so the dataset stays identical
+        with transaction.atomic():
+            if endpoint.repeat:
+                self.send(client, endpoint, fixtures, 0, headers)
+            for i in range(iterations):
+                with CaptureQueriesContext(connection) as captured:
+                    # Each request from the same starting point
+                    with transaction.atomic():
+                        start = time.perf_counter()
+                        response = self.send(client, endpoint, fixtures, i, headers)
+                        latencies.append(time.perf_counter() - start)
+                        transaction.set_rollback(True)
+
+                query_counts.append(sum(
+                    1 for q in captured.captured_queries if not q['sql'].startswith(IGNORED_SQL)
+                ))
+                statuses.add(response.status_code)
+            transaction.set_rollback(True)
+
+        return {
+            'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+            'queries': max(query_counts),
+            'budget': endpoint.budget,
+            'statuses': sorted(statuses),
+            'expect': endpoint.expect,
+        }
+
+    def send(self, client, endpoint, fixtures, iteration, headers):
+        url = reverse(endpoint.name, kwargs=endpoint.resolve(endpoint.kwargs, fixtures, iteration))
+        query = endpoint.resolve(endpoint.query, fixtures, iteration)
+        data = endpoint.resolve(endpoint.data, fixtures, iteration)
+        if endpoint.method == 'GET':
+            return client.get(url, query, **headers)
+        if query:
+            url += '?' + '&'.join(f'{k}={v}' for k, v in query.items())
+        return client.generic(endpoint.method, url, json.dumps(data or {}),
+                              content_type='application/json', **headers)
+
+    def report(self, results, options):
+        baseline = {}
+        if os.path.exists(options['baseline']) and not options['save_baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        failures = []
+        self.stdout.write(f"\n{'endpoint':58} {'status':>9} {'p50 ms':>8} {'p95 ms':>8} {'queries':>9}  result")
+        for label, result in results.items():
+            if 'error' in result:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"{label:58} {result['error']}"))
+                continue
+
+            problems = []
+            unexpected = [s for s in result['statuses'] if s not in result['expect']]
+            if unexpected:
+                problems.append(f"status {unexpected}")
+            if result['queries'] > result['budget']:
+                problems.append(f"{result['queries']} queries > budget {result['budget']}")
+            base = baseline.get(label)
+            if base:
+                limit = base['p95_ms'] * (1 + options['threshold'])
+                if result['p95_ms'] > limit and result['p95_ms'] - base['p95_ms'] > options['min_regression_ms']:
+                    problems.append(f"p95 regressed {base['p95_ms']} -> {result['p95_ms']} ms")
+
+            line = (f"{label:58} {','.join(map(str, result['statuses'])):>9} {result['p50_ms']:8.2f} "
+                    f"{result['p95_ms']:8.2f} {result['queries']:>4}/{result['budget']:<4}  ")
+            if problems:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(line + '; '.join(problems)))
+            else:
+                self.stdout.write(self.style.SUCCESS(line + 'ok'))
+        return failures
@@ -0,0 +1,106 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from admin_panel.flags import FLAG_BITS
+from admin_panel.similarity import SimilarityIndex, feature_matrix
+
+
+def synthetic_vectors(rows, archetypes=40, seed=0):
+    """
+    Feature vectors of ``rows`` made-up analyses. Profiles are drawn from a
+    few dozen archetypes (each with its own flag probabilities and typical
+    numbers), so the data is clustered the way real profiles are.
+    """
+    rng = np.random.default_rng(seed)
+    probabilities = rng.beta(0.6, 0.6, size=(archetypes, len(FLAG_BITS)))
+    typical_connections = rng.uniform(3, 8, size=archetypes)
+    typical_age = rng.uniform(0, 12, size=archetypes)
+    kind = rng.integers(0, archetypes, size=rows)
+
+    bits = rng.random((rows, len(FLAG_BITS))) < probabilities[kind]
+    flags = (bits.astype(np.uint32) << np.arange(len(FLAG_BITS), dtype=np.uint32)).sum(axis=1, dtype=np.uint32)
+    connections = rng.lognormal(typical_connections[kind], 0.8)
+    age = np.clip(rng.normal(typical_age[kind], 1.5), 0, None)
+    endorsements = rng.poisson(np.exp(typical_connections[kind] - 3))
+    return feature_matrix(flags, connections, age, endorsements)
+
+
+def timed_searches(index, queries, k):
+    latencies, results = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        results.append([row_id for row_id, _ in index.search(vector, k)])
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000, results
+
+
+class Command(BaseCommand):
+    help = ("Compare exhaustive and partitioned (k-means inverted file) similar-profile search on "
+            "synthetic analysis vectors: build time, query latency and recall")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000000, help='Analyses in the index')
+        parser.add_argument('--queries', type=int, default=200, help='Searches per index')
+        parser.add_argument('--k', type=int, default=10, help='Neighbours per search')
+        parser.add_argument('--nprobe', type=int, nargs='+', default=[4, 8, 16],
+                            help='Partitions scanned per query (one run each)')
+        parser.add_argument('--append', type=int, default=1000,
+                            help='Rows appended to measure an incremental refresh')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rows, k = options['rows'], options['k']
+        vectors = synthetic_vectors(rows + options['queries'] + options['append'], seed=options['seed'])
+        matrix = vectors[:rows]
+        queries = vectors[rows:rows + options['queries']]
+        appended = vectors[rows + options['queries']:]
+        ids = np.arange(1, rows + 1, dtype=np.int64)
+        self.stdout.write(f"{rows} vectors of {matrix.shape[1]} features, {matrix.nbytes / 2 ** 20:.0f} MiB")
+
+        start = time.perf_counter()
+        exhaustive = SimilarityIndex(partition_min_rows=rows + 1)
+        exhaustive.build(ids, matrix)
+        build_time = time.perf_counter() - start
+        latencies, truth = timed_searches(exhaustive, queries, k)
+        self.stdout.write(f"\n{'index':24} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(k):>10}")
+        self.row('exhaustive', build_time, latencies, 1.0)
+
+        start = time.perf_counter()
+        partitioned = SimilarityIndex(partition_min_rows=0, seed=options['seed'])
+        partitioned.build(ids, matrix)
+        build_time = time.perf_counter() - start
+        for nprobe in options['nprobe']:
+            partitioned.nprobe = nprobe
+            latencies, found = timed_searches(partitioned, queries, k)
+            # Ties are common (binary features), so count neighbours at the
+            # true k-th distance or closer as correct
+            recall = np.mean([
+                self.recall(exhaustive, query, expected, got, k)
+                for query, expected, got in zip(queries, truth, found)
+            ])
+            self.row(f'partitioned nprobe={nprobe}', build_time, latencies, recall)
+            build_time = None
+
+        if options['append']:
+            new_ids = np.arange(rows + 1, rows + len(appended) + 1, dtype=np.int64)
+            start = time.perf_counter()
+            partitioned.upsert(new_ids, appended)
+            self.stdout.write(f"\nIncremental refresh of {len(appended)} new rows: "
+                              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    @staticmethod
+    def recall(exhaustive, query, expected, got, k):
+        ids, matrix, norms, _ = exhaustive._state
+        if not expected:
+            return 1.0
+        distances = np.maximum(norms - 2.0 * (matrix @ query) + query @ query, 0.0)
+        kth = np.sort(distances[np.asarray(expected) - 1])[-1]
+        return np.mean(distances[np.asarray(got, dtype=np.int64) - 1] <= kth + 1e-6) * len(got) / k
+
+    def row(self, name, build_time, latencies, recall):
+        self.stdout.write(
+            f"{name:24} {'-' if build_time is None else f'{build_time:.2f}':>8} {np.percentile(latencies, 50):8.2f} "
+            f"{np.percentile(latencies, 95):8.2f} {recall:10.3f}"
+        )
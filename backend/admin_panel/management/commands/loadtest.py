@@ -0,0 +1,99 @@
+import json
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from admin_panel.loadgen import (
+    ADMIN_SCENARIOS, DEFAULT_MIX, SCENARIOS, HTTPTransport, LoadContext, LoadGenerator, WSGITransport,
+)
+from backend.log_pipeline import parse_mapping
+from backend.throttling import lifted_rates
+
+
+class Command(BaseCommand):
+    help = ("Replay a weighted traffic mix against the WSGI app in-process (default) or a running "
+            "server (--url) and report throughput, latency percentiles and error rates. "
+            "Needs seeded users (manage.py seed_load); submit and admin_reply write to the database. "
+            "Rate limits are lifted in-process; a server under --url applies its own, so raise them "
+            "there with THROTTLE_RATES.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server, e.g. http://127.0.0.1:8000')
+        parser.add_argument('--mix', default=','.join(f'{k}={v}' for k, v in DEFAULT_MIX.items()),
+                            help=f"Scenario weights, e.g. 'poll=5,login=1'; scenarios: {', '.join(SCENARIOS)}")
+        parser.add_argument('--rps', type=float, default=0.0,
+                            help='Target requests per second (open loop); 0 sends as fast as possible')
+        parser.add_argument('--concurrency', type=int, default=16, help='Client threads')
+        parser.add_argument('--duration', type=float, default=30.0, help='Measured seconds')
+        parser.add_argument('--warmup', type=float, default=5.0, help='Unmeasured seconds before that')
+        parser.add_argument('--accounts', type=int, default=100, help='Seeded users to send requests as')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed of the request sequence')
+        parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+
+    def handle(self, *args, **options):
+        mix = parse_mapping(options['mix'], float)
+        unknown = set(mix) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+        if not any(weight > 0 for weight in mix.values()):
+            raise CommandError("The traffic mix has no scenario with a positive weight")
+        with_admin = any(mix.get(name, 0) > 0 for name in ADMIN_SCENARIOS)
+        if with_admin and not getattr(settings, 'ADMIN_EMAIL', None):
+            raise CommandError("Admin scenarios need ADMIN_EMAIL to be set (or give them weight 0 in --mix)")
+
+        try:
+            context = LoadContext(options['accounts'], options['seed'], with_admin)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if options['url']:
+            transport, target = HTTPTransport(options['url']), options['url']
+        else:
+            transport, target = WSGITransport(WSGIHandler()), 'in-process WSGI'
+
+        rate = f"{options['rps']:g} rps" if options['rps'] else 'closed loop'
+        self.stdout.write(f"Load testing {target}: {rate}, {options['concurrency']} threads, "
+                          f"{options['warmup']:g}s warmup + {options['duration']:g}s")
+        # All in-process requests come from one address
+        with override_settings(REST_FRAMEWORK=lifted_rates()):
+            results = LoadGenerator(
+                transport, context, mix,
+                rate=options['rps'],
+                concurrency=options['concurrency'],
+                duration=options['duration'],
+                warmup=options['warmup'],
+                seed=options['seed'],
+            ).run()
+        results['target'] = target
+        results['mix'] = mix
+
+        self.report(results)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+    def report(self, results):
+        header = f"\n{'scenario':14} {'requests':>9} {'rps':>8} {'errors':>7} {'p50 ms':>8} {'p90 ms':>8} " \
+                 f"{'p99 ms':>8} {'max ms':>8}  statuses"
+        self.stdout.write(header)
+        rows = list(results['scenarios'].items()) + [('total', results['total'])]
+        for name, summary in rows:
+            latencies = ' '.join(
+                f"{summary[key]:8.1f}" if summary[key] is not None else f"{'-':>8}"
+                for key in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')
+            )
+            statuses = ' '.join(f'{status}x{n}' for status, n in summary['statuses'].items())
+            if summary['exceptions']:
+                statuses += ' ' + ' '.join(f'{error}x{n}' for error, n in summary['exceptions'].items())
+            line = (f"{name:14} {summary['requests']:9} {summary['rps']:8.1f} "
+                    f"{summary['error_rate'] * 100:6.1f}% {latencies}  {statuses}")
+            self.stdout.write(self.style.ERROR(line) if summary['error_rate'] else line)
+
+        if results['target_rps'] and results['total']['rps'] < results['target_rps'] * 0.95:
+            self.stdout.write(self.style.WARNING(
+                f"Achieved {results['total']['rps']:.1f} of {results['target_rps']:g} rps; "
+                f"requests started up to {results['max_lag_ms']:.0f} ms late"
+            ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from admin_panel.stats import compute_dashboard_stats, rebuild_dashboard_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the admin dashboard statistics rollup from the submission and analysis tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Report drift between the rollup and the source tables before rebuilding')
+
+    def handle(self, *args, **options):
+        if options['check']:
+            from admin_panel.stats import get_dashboard_stats
+
+            current, actual = get_dashboard_stats(), compute_dashboard_stats()
+            drift = {key: (current[key], actual[key]) for key in actual if current[key] != actual[key]}
+            if drift:
+                for key, (rolled_up, real) in drift.items():
+                    self.stdout.write(f"{key}: rollup={rolled_up} actual={real}")
+            else:
+                self.stdout.write("Rollup matches the source tables")
+
+        stats = rebuild_dashboard_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Dashboard stats rebuilt: {stats['total_submissions']} submissions, "
+            f"{sum(stats['risk_distribution'].values())} analyses"
+        ))
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from admin_panel.scoring import RISK_LEVELS, ScoringEngine, get_engine, np, rescore_all
+from backend.log_pipeline import parse_mapping
+
+
+class Command(BaseCommand):
+    help = ("Recompute the score and risk level of every profile analysis with the configured weights "
+            "(PROFILE_SCORE_WEIGHTS / PROFILE_RISK_THRESHOLDS) and save the ones that changed")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows would change')
+        parser.add_argument('--batch-size', type=int, default=20000, help='Analyses scored per batch')
+        # Saved scores would not last: the next save() rescores the row
+        # with the configured weights
+        parser.add_argument('--weights', help="Report what other weights would change, e.g. 'newly_created=-15' "
+                                              "(implies --dry-run; set PROFILE_SCORE_WEIGHTS to apply them)")
+        parser.add_argument('--thresholds', help="Report what other risk thresholds would change, e.g. "
+                                                 "'low=75,medium=45' (implies --dry-run; set "
+                                                 "PROFILE_RISK_THRESHOLDS to apply them)")
+
+    def handle(self, *args, **options):
+        engine = get_engine()
+        if options['weights'] or options['thresholds']:
+            options['dry_run'] = True
+            try:
+                engine = ScoringEngine(
+                    {**engine.weights, **parse_mapping(options['weights'], float)},
+                    {**engine.thresholds, **parse_mapping(options['thresholds'], int)},
+                )
+            except ValueError as e:
+                raise CommandError(str(e))
+        if not set(engine.thresholds) <= set(RISK_LEVELS):
+            raise CommandError(f"Risk thresholds must be among: {', '.join(RISK_LEVELS[:2])}")
+
+        self.stdout.write(f"Scoring with {'NumPy' if np is not None else 'pure Python (NumPy not installed)'}")
+        start = time.perf_counter()
+        scored, changed = rescore_all(
+            engine, batch_size=options['batch_size'], dry_run=options['dry_run'],
+            log=lambda message: self.stdout.write(f"  {message}"),
+        )
+        verb = 'would change' if options['dry_run'] else 'changed'
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {scored} analyses in {time.perf_counter() - start:.1f}s; {changed} {verb}"
+        ))
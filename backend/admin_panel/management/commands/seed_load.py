@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from admin_panel.seeding import (
+    SEED_EMAIL_DOMAIN, SEED_PASSWORD, copy_supported, flush_seed_data, seed_dataset,
+)
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = ("Generate a production-scale synthetic dataset (users, subscriptions, submissions and "
+            "analyses) for load testing. Runs against the configured database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000000, help='Users to create')
+        parser.add_argument('--submissions', type=int, default=5000000, help='Submissions to create')
+        parser.add_argument('--processed-ratio', type=float, default=0.7,
+                            help='Share of submissions that have been replied to')
+        parser.add_argument('--analysis-ratio', type=float, default=0.8,
+                            help='Share of processed submissions with a profile analysis')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed; same seed, same dataset')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Rows per insert batch')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes inserting batches in parallel')
+        parser.add_argument('--no-copy', action='store_true',
+                            help='Use bulk_create even when PostgreSQL COPY is available')
+        parser.add_argument('--flush', action='store_true',
+                            help=f'Delete previously seeded rows (@{SEED_EMAIL_DOMAIN} users) first')
+
+    def handle(self, *args, **options):
+        existing = CustomUser.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}')
+        if existing.exists():
+            if not options['flush']:
+                raise CommandError(f"The database already holds seeded users (@{SEED_EMAIL_DOMAIN}); "
+                                   f"use --flush to replace them")
+            start = time.perf_counter()
+            deleted = flush_seed_data(batch_size=options['batch_size'])
+            self.stdout.write(f"Deleted {deleted} seeded users and their rows in "
+                              f"{time.perf_counter() - start:.1f}s")
+
+        use_copy = not options['no_copy'] and copy_supported()
+        self.stdout.write(
+            f"Seeding {options['users']} users and {options['submissions']} submissions into "
+            f"{connection.vendor} with {options['workers']} worker(s) using "
+            f"{'COPY' if use_copy else 'bulk_create'} (seed {options['seed']})"
+        )
+        start = time.perf_counter()
+        counts = seed_dataset(
+            users=options['users'],
+            submissions=options['submissions'],
+            processed_ratio=options['processed_ratio'],
+            analysis_ratio=options['analysis_ratio'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            use_copy=use_copy,
+            log=lambda message: self.stdout.write(f"  {message}"),
+        )
+        elapsed = time.perf_counter() - start
+        rows = sum(counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {counts['users']} users, {counts['submissions']} submissions and "
+            f"{counts['analyses']} analyses in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s). "
+            f"Seeded users sign in with the password '{SEED_PASSWORD}'."
+        ))
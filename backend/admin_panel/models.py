@@ -1,6 +1,29 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.lookups import Exact, GreaterThan
 from django.conf import settings
+from django.utils import timezone
 from contact.models import ContactSubmission
+from .flags import FLAG_BITS, flag_mask, pack_flags
+
+
+class ProfileAnalysisQuerySet(models.QuerySet):
+    def has_all_flags(self, *names):
+        """Analyses with every one of the indicators ``names`` set"""
+        mask = flag_mask(*names)
+        return self.filter(Exact(F('flags').bitand(mask), mask))
+
+    def has_any_flags(self, *names):
+        """Analyses with at least one of the indicators ``names`` set"""
+        return self.filter(GreaterThan(F('flags').bitand(flag_mask(*names)), 0))
+
+    def for_profile(self, linkedin_profile, since=None):
+        """Analyses of submissions of a canonical LinkedIn profile, newest first"""
+        queryset = self.filter(submission__linkedin_profile=linkedin_profile)
+        if since is not None:
+            queryset = queryset.filter(submission__created_at__gte=since)
+        return queryset.order_by('-submission__created_at', '-id')
+
 
 class ProfileAnalysis(models.Model):
     """Model to store LinkedIn profile analysis data"""
@@ -49,6 +72,9 @@ class ProfileAnalysis(models.Model):
     default_profile_picture = models.BooleanField(default=False)
     low_connections = models.BooleanField(default=False)
     no_engagement_on_posts = models.BooleanField(default=False)
+
+    # The indicators above packed into one integer (see admin_panel/flags.py)
+    flags = models.IntegerField(default=0)
     
     # Analysis results
     score = models.IntegerField(default=0)  # 0-100 score
@@ -69,10 +95,73 @@ class ProfileAnalysis(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ProfileAnalysisQuerySet.as_manager()
+
+    # Everything an admin records about a profile, as opposed to the link to
+    # the submission and the metadata; copied when an analysis is reused
+    REUSABLE_FIELDS = (
+        'connections', 'account_type', 'account_age_years', 'skills_endorsements_count',
+        'last_post_date', 'summary', *FLAG_BITS,
+    )
     
     class Meta:
         verbose_name = 'Profile Analysis'
         verbose_name_plural = 'Profile Analyses'
         
+    def save(self, *args, **kwargs):
+        # Score and risk are always computed from the indicators, never taken
+        # from the client (see admin_panel/scoring.py)
+        from .scoring import SCORED_FIELDS, get_engine
+
+        self.score, self.risk_level = get_engine().score(self)
+        self.flags = pack_flags(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *SCORED_FIELDS, 'flags'}
+        super().save(*args, **kwargs)
+
+    def reusable_values(self):
+        """The REUSABLE_FIELDS of this analysis, e.g. to pre-fill a new one"""
+        return {name: getattr(self, name) for name in self.REUSABLE_FIELDS}
+
     def __str__(self):
         return f"Analysis for {self.submission.email} ({self.score}/100)"
+
+
+class DashboardStats(models.Model):
+    """
+    Single-row rollup of the admin dashboard statistics, kept up to date by
+    signals on ContactSubmission and ProfileAnalysis (see admin_panel/stats.py)
+    """
+    total_submissions = models.IntegerField(default=0)
+    processed_submissions = models.IntegerField(default=0)
+
+    # Analysis aggregates (average score = score_total / analysis_count)
+    analysis_count = models.IntegerField(default=0)
+    score_total = models.BigIntegerField(default=0)
+    low_risk_count = models.IntegerField(default=0)
+    medium_risk_count = models.IntegerField(default=0)
+    high_risk_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Dashboard Statistics'
+        verbose_name_plural = 'Dashboard Statistics'
+
+    def __str__(self):
+        return f"Dashboard stats ({self.total_submissions} submissions)"
+
+
+class DailySubmissionCount(models.Model):
+    """Submissions created per day, used for the rolling 'recent submissions' stat"""
+    date = models.DateField(unique=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Daily Submission Count'
+        verbose_name_plural = 'Daily Submission Counts'
+
+    def __str__(self):
+        return f"{self.date}: {self.count}"
@@ -0,0 +1,232 @@
+"""
+Server-side scoring of profile analyses.
+
+The score (0-100) is a weighted sum of the indicators on ``ProfileAnalysis``
+added to a base value: boolean indicators contribute their weight when set,
+numeric ones (connections, account age, endorsements) contribute a share of
+their weight that grows with the value up to a saturation point. The risk
+level follows from score thresholds. Weights and thresholds come from the
+``PROFILE_SCORE_WEIGHTS`` and ``PROFILE_RISK_THRESHOLDS`` settings, so
+scoring can be retuned and the whole table rescored (``rescore_analyses``).
+
+``ScoringEngine.score`` scores one analysis on save; ``rescore_all`` scores
+the table in batches of NumPy column arrays and writes back only the rows
+whose result changed.
+"""
+import logging
+import math
+
+from django.conf import settings
+from django.db import transaction
+
+try:
+    import numpy as np
+except ImportError:
+    # Without NumPy the batch path scores row by row
+    np = None
+
+logger = logging.getLogger(__name__)
+
+BASE_SCORE = 50
+
+DEFAULT_WEIGHTS = {
+    # Profile quality
+    'has_verification_shield': 5,
+    'has_custom_url': 3,
+    'has_profile_summary': 5,
+    'has_professional_photo': 5,
+    'profile_completeness': 5,
+    'has_recommendations': 4,
+    'personalized_profile': 3,
+    'has_old_photo': -3,
+    'outdated_job_info': -4,
+    'missing_about_or_education': -4,
+    # Activity
+    'recent_activity': 4,
+    'engagement_with_content': 3,
+    'engagement_history': 3,
+    'post_history_older_than_year': -2,
+    # Outreach suitability
+    'profile_updates': 2,
+    'shared_interests': 2,
+    'open_to_networking': 3,
+    'industry_relevance': 3,
+    'active_job_titles': 3,
+    # Risk indicators
+    'newly_created': -12,
+    'sparse_job_history': -6,
+    'default_profile_picture': -8,
+    'low_connections': -6,
+    'no_engagement_on_posts': -4,
+    # Numeric indicators, full weight at their saturation value
+    'connections': 8,
+    'account_age_years': 6,
+    'skills_endorsements_count': 4,
+}
+
+# Value at which a numeric indicator earns its full weight; connections
+# grow logarithmically, the others linearly
+SATURATION = {
+    'connections': 500,
+    'account_age_years': 5,
+    'skills_endorsements_count': 50,
+}
+LOG_SCALED = {'connections'}
+
+# Minimum score of each risk level; anything below 'medium' is 'high'
+DEFAULT_THRESHOLDS = {'low': 70, 'medium': 40}
+RISK_LEVELS = ('low', 'medium', 'high')
+
+SCORED_FIELDS = ('score', 'risk_level')
+
+
+class ScoringEngine:
+    def __init__(self, weights=None, thresholds=None, base=BASE_SCORE):
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"Unknown scoring indicator(s): {', '.join(sorted(unknown))}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.base = base
+        self.flags = [name for name in self.weights if name not in SATURATION]
+        self.numeric = [name for name in self.weights if name in SATURATION]
+
+    @property
+    def indicators(self):
+        """Model fields the score is computed from"""
+        return self.flags + self.numeric
+
+    def _fraction(self, name, value):
+        if not value or value < 0:
+            return 0.0
+        if name in LOG_SCALED:
+            return min(1.0, math.log1p(value) / math.log1p(SATURATION[name]))
+        return min(1.0, value / SATURATION[name])
+
+    def risk_for_score(self, score):
+        if score >= self.thresholds['low']:
+            return 'low'
+        if score >= self.thresholds['medium']:
+            return 'medium'
+        return 'high'
+
+    def score_values(self, values):
+        """``(score, risk_level)`` from a mapping of indicator values"""
+        total = self.base
+        total += sum(self.weights[name] for name in self.flags if values[name])
+        total += sum(self.weights[name] * self._fraction(name, values[name]) for name in self.numeric)
+        # Halves round up, in both this and the vectorized path
+        score = int(min(100, max(0, math.floor(total + 0.5))))
+        return score, self.risk_for_score(score)
+
+    def score(self, analysis):
+        """``(score, risk_level)`` of one analysis (a model instance)"""
+        return self.score_values({name: getattr(analysis, name) for name in self.indicators})
+
+    def score_columns(self, columns):
+        """
+        Vectorized ``score`` over NumPy arrays, one per indicator (booleans
+        as bool, numbers as float with NaN for NULL). Returns the scores and
+        indexes into ``RISK_LEVELS``.
+        """
+        total = np.full(len(next(iter(columns.values()))), float(self.base))
+        for name in self.flags:
+            total += self.weights[name] * columns[name]
+        for name in self.numeric:
+            values = np.nan_to_num(columns[name], nan=0.0).clip(min=0.0)
+            if name in LOG_SCALED:
+                fraction = np.log1p(values) / math.log1p(SATURATION[name])
+            else:
+                fraction = values / SATURATION[name]
+            total += self.weights[name] * np.minimum(fraction, 1.0)
+        scores = np.clip(np.floor(total + 0.5), 0, 100).astype(np.int64)
+        risks = np.where(scores >= self.thresholds['low'], 0,
+                         np.where(scores >= self.thresholds['medium'], 1, 2))
+        return scores, risks
+
+
+_engine = None
+
+
+def get_engine():
+    """The engine configured by the settings (built once per process)"""
+    global _engine
+    if _engine is None:
+        _engine = ScoringEngine(
+            getattr(settings, 'PROFILE_SCORE_WEIGHTS', None),
+            getattr(settings, 'PROFILE_RISK_THRESHOLDS', None),
+        )
+    return _engine
+
+
+def _score_rows(engine, rows):
+    """Score ``values_list`` rows (id, *indicators); returns ``(ids, scores, risks)``"""
+    indicators = engine.indicators
+    if np is None:
+        ids, scores, risks = [], [], []
+        for row in rows:
+            score, risk = engine.score_values(dict(zip(indicators, row[1:])))
+            ids.append(row[0])
+            scores.append(score)
+            risks.append(RISK_LEVELS.index(risk))
+        return ids, scores, risks
+
+    columns = list(zip(*rows))
+    arrays = {}
+    for position, name in enumerate(indicators, start=1):
+        if name in SATURATION:
+            arrays[name] = np.array([np.nan if v is None else v for v in columns[position]], dtype=float)
+        else:
+            arrays[name] = np.array(columns[position], dtype=bool)
+    scores, risks = engine.score_columns(arrays)
+    return list(columns[0]), scores.tolist(), risks.tolist()
+
+
+def rescore_all(engine=None, batch_size=20000, dry_run=False, log=None):
+    """
+    Recompute every analysis with ``engine`` (default: the configured one)
+    and save the rows whose score or risk level changed. The dashboard
+    rollup is rebuilt and the affected users' cached responses are
+    invalidated afterwards, as bulk updates send no signals. Returns
+    ``(scored, changed)``.
+    """
+    from backend.view_cache import DASHBOARD_STATS_TAG, USER_SUBMISSIONS_TAG, invalidate_tags
+    from .models import ProfileAnalysis
+    from .stats import rebuild_dashboard_stats
+
+    engine = engine or get_engine()
+    log = log or (lambda message: None)
+    fields = ['id', 'score', 'risk_level', 'submission__email', *engine.indicators]
+    scored = changed = 0
+    emails = set()
+    last_id = 0
+    while True:
+        rows = list(
+            ProfileAnalysis.objects.filter(id__gt=last_id).order_by('id').values_list(*fields)[:batch_size]
+        )
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        ids, scores, risks = _score_rows(engine, [(row[0], *row[4:]) for row in rows])
+
+        # A score has only 101 possible values, so one UPDATE per distinct
+        # result is far cheaper than bulk_update's per-row CASE expression
+        groups = {}
+        for row, pk, score, risk in zip(rows, ids, scores, risks):
+            result = (score, RISK_LEVELS[risk])
+            if (row[1], row[2]) != result:
+                groups.setdefault(result, []).append(pk)
+                emails.add(row[3])
+        scored += len(rows)
+        changed += sum(len(group) for group in groups.values())
+        if groups and not dry_run:
+            with transaction.atomic():
+                for (score, risk_level), group in groups.items():
+                    ProfileAnalysis.objects.filter(id__in=group).update(score=score, risk_level=risk_level)
+        log(f"Scored {scored} analyses, {changed} changed")
+
+    if changed and not dry_run:
+        rebuild_dashboard_stats()
+        invalidate_tags(DASHBOARD_STATS_TAG, *(USER_SUBMISSIONS_TAG.format(email=email) for email in emails))
+        logger.info(f"Rescored {scored} profile analyses, {changed} changed")
+    return scored, changed
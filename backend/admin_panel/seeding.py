@@ -0,0 +1,339 @@
+"""
+Synthetic dataset generation for benchmarks and load tests.
+
+Rows are built in memory and written in batches, with PostgreSQL ``COPY``
+when available and ``bulk_create`` otherwise. Every batch draws from its own
+``random.Random`` seeded with the dataset seed and the batch number, so the
+same arguments produce the same dataset whatever the number of worker
+processes. Model signals do not fire for bulk inserts; the dashboard rollup
+is rebuilt once at the end instead.
+"""
+import io
+import multiprocessing
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+from django.utils import timezone
+
+from contact.models import ContactSubmission, MonthlySubmissionCount
+from users.models import UserSubscription
+from .flags import FLAG_BITS, pack_flags
+from .models import ProfileAnalysis
+from .scoring import get_engine
+from .stats import rebuild_dashboard_stats
+
+User = get_user_model()
+
+SEED_EMAIL_DOMAIN = 'seed.example.com'
+SEED_PASSWORD = 'seed-password'
+
+# Share of users on each tier
+TIER_WEIGHTS = {'free': 0.7, 'basic': 0.2, 'premium': 0.1}
+
+# Share of submissions naming a profile that other users submit too, drawn
+# from a pool of popular profiles and spelled in different URL variants
+REPEAT_PROFILE_RATIO = 0.3
+POPULAR_PROFILES = 50000
+URL_VARIANTS = (
+    'https://www.linkedin.com/in/{slug}/',
+    'https://linkedin.com/in/{slug}',
+    'http://www.linkedin.com/in/{slug}?trk=public_profile',
+    'https://uk.linkedin.com/in/{slug}/?originalSubdomain=uk',
+    'https://www.LinkedIn.com/in/{slug}/details/experience/',
+)
+
+# Submission owners and their cumulative activity weights, set by the parent
+# before the worker processes are forked so they are not pickled per task
+_owners = {}
+
+
+def seed_email(index):
+    return f'user{index}@{SEED_EMAIL_DOMAIN}'
+
+
+def seed_index(email):
+    return int(email.partition('@')[0][len('user'):])
+
+
+def batch_rng(seed, kind, number):
+    return random.Random(f'{seed}:{kind}:{number}')
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """Let bulk inserts keep the ``created_at`` values we generate"""
+    fields = [model._meta.get_field('created_at') for model in models]
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+# Writing
+
+def copy_supported():
+    """``COPY FROM STDIN`` needs PostgreSQL through psycopg 3"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        return hasattr(cursor.cursor, 'copy')
+
+
+def _copy_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+
+def copy_insert(objs):
+    """
+    Insert model instances with ``COPY``. Primary keys are reserved from the
+    table's sequence first and set on the instances, as ``bulk_create`` does.
+    Field values are written as they are, which is enough for the plain
+    Python values (str, int, float, bool, date, datetime) the builders use.
+    """
+    meta = objs[0]._meta
+    fields = meta.concrete_fields
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [meta.db_table, meta.pk.column, len(objs)],
+        )
+        for obj, (pk,) in zip(objs, cursor.fetchall()):
+            obj.pk = pk
+
+        buffer = io.StringIO()
+        for obj in objs:
+            buffer.write('\t'.join(
+                _copy_value(field.pre_save(obj, True))
+                for field in fields
+            ))
+            buffer.write('\n')
+        columns = ', '.join(quote(field.column) for field in fields)
+        with cursor.cursor.copy(f'COPY {quote(meta.db_table)} ({columns}) FROM STDIN') as copy:
+            copy.write(buffer.getvalue())
+    return objs
+
+
+def insert_rows(objs, use_copy, batch_size):
+    if not objs:
+        return objs
+    if use_copy:
+        return copy_insert(objs)
+    # PostgreSQL and SQLite return the new primary keys from bulk_create
+    return type(objs[0]).objects.bulk_create(objs, batch_size=batch_size)
+
+
+# Building
+
+def build_users(rng, start, count, password_hash, now):
+    return [
+        User(
+            email=seed_email(i),
+            password=password_hash,
+            email_verified=True,
+            date_joined=now - timedelta(days=rng.randint(0, 730)),
+        )
+        for i in range(start, start + count)
+    ]
+
+
+def build_subscriptions(rng, users, now):
+    tiers, weights = zip(*TIER_WEIGHTS.items())
+    subscriptions = []
+    for user in users:
+        tier = rng.choices(tiers, weights)[0]
+        end_date = None if tier == 'free' else now + timedelta(days=rng.randint(-30, 365))
+        subscriptions.append(UserSubscription(user_id=user.id, tier=tier, end_date=end_date))
+    return subscriptions
+
+
+def activity_weights(rng, count):
+    """Skewed (Pareto) activity, so a few heavy users own many rows like in production"""
+    return [rng.paretovariate(1.2) for _ in range(count)]
+
+
+def build_submissions(rng, owners, cum_weights, count, now, processed_ratio):
+    """Submissions spread over the last year; ``owners`` are ``(id, email)`` pairs"""
+    submissions = []
+    for user_id, email in rng.choices(owners, cum_weights=cum_weights, k=count):
+        created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+        processed = rng.random() < processed_ratio
+        reply_date = min(created_at + timedelta(hours=rng.randint(1, 72)), now) if processed else None
+        if rng.random() < REPEAT_PROFILE_RATIO:
+            slug = f'popular-{rng.randrange(POPULAR_PROFILES)}'
+            linkedin_url = rng.choice(URL_VARIANTS).format(slug=slug)
+        else:
+            slug = f'profile-{rng.randrange(10 ** 9)}'
+            linkedin_url = f'https://www.linkedin.com/in/{slug}/'
+        submissions.append(ContactSubmission(
+            email=email,
+            user_id=user_id,
+            linkedin_url=linkedin_url,
+            # Bulk inserts skip save(), which canonicalizes the URL
+            linkedin_profile=slug,
+            message='Please review this profile.',
+            created_at=created_at,
+            is_processed=processed,
+            admin_reply='Reviewed.' if processed else None,
+            admin_reply_date=reply_date,
+            updated_at=reply_date or created_at,
+        ))
+    return submissions
+
+
+def build_analyses(rng, submissions, analysis_ratio, now):
+    """Analyses with random indicators, scored as the server would score them"""
+    engine = get_engine()
+    analyses = []
+    for submission in submissions:
+        if not submission.is_processed or rng.random() >= analysis_ratio:
+            continue
+        analysis = ProfileAnalysis(
+            submission_id=submission.id,
+            connections=int(rng.lognormvariate(6, 1.2)),
+            account_age_years=round(rng.uniform(0, 15), 1),
+            skills_endorsements_count=rng.randint(0, 200),
+            summary='Synthetic analysis.',
+            created_at=submission.admin_reply_date or now,
+            **{flag: rng.random() < 0.5 for flag in FLAG_BITS},
+        )
+        analysis.score, analysis.risk_level = engine.score(analysis)
+        analysis.flags = pack_flags(analysis)
+        analyses.append(analysis)
+    return analyses
+
+
+# Batches (run in the worker processes)
+
+def seed_user_batch(seed, number, start, count, password_hash, now, use_copy, batch_size):
+    rng = batch_rng(seed, 'users', number)
+    with transaction.atomic():
+        users = insert_rows(build_users(rng, start, count, password_hash, now), use_copy, batch_size)
+        insert_rows(build_subscriptions(rng, users, now), use_copy, batch_size)
+    return len(users), 0
+
+
+def seed_submission_batch(seed, number, count, now, processed_ratio, analysis_ratio, use_copy, batch_size):
+    rng = batch_rng(seed, 'submissions', number)
+    with transaction.atomic(), explicit_timestamps(ContactSubmission, ProfileAnalysis):
+        submissions = insert_rows(
+            build_submissions(rng, _owners['owners'], _owners['cum_weights'], count, now, processed_ratio),
+            use_copy, batch_size,
+        )
+        analyses = insert_rows(build_analyses(rng, submissions, analysis_ratio, now), use_copy, batch_size)
+    return len(submissions), len(analyses)
+
+
+def _call(task):
+    function, args = task
+    return function(*args)
+
+
+def run_batches(function, batches, workers):
+    """Yield the result of ``function(*args)`` for every batch, in any order"""
+    if workers <= 1:
+        for args in batches:
+            yield function(*args)
+        return
+    # Forked children must open their own database connections: closing
+    # hands pooled ones back to the psycopg pool, so close the pools too
+    connections.close_all()
+    for conn in connections.all(initialized_only=True):
+        if conn.settings_dict['OPTIONS'].get('pool'):
+            conn.close_pool()
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        yield from pool.imap_unordered(_call, [(function, args) for args in batches])
+
+
+def load_owners(count, seed):
+    """``(id, email)`` of the seeded users in seed order, with their activity weights"""
+    owners = sorted(
+        User.objects.filter(email__endswith=f'@{SEED_EMAIL_DOMAIN}').values_list('id', 'email'),
+        key=lambda owner: seed_index(owner[1]),
+    )[:count]
+    return owners, list(accumulate(activity_weights(random.Random(f'{seed}:activity'), len(owners))))
+
+
+def seed_dataset(users=1000, submissions=100000, processed_ratio=0.7, analysis_ratio=0.8,
+                 seed=42, batch_size=5000, workers=1, use_copy=None, log=None):
+    """
+    Insert ``users`` users (with subscriptions), ``submissions`` submissions
+    and analyses for a share of the processed ones, split into batches of
+    ``batch_size`` rows spread over ``workers`` processes. Returns row counts.
+    """
+    log = log or (lambda message: None)
+    if use_copy is None:
+        use_copy = copy_supported()
+    if workers > 1 and connection.vendor == 'sqlite':
+        log("SQLite allows a single writer; seeding in one process")
+        workers = 1
+    now = timezone.now()
+    # Hashing is deliberately slow; every seeded user shares one hash
+    password_hash = make_password(SEED_PASSWORD, salt=f'seed{seed}')
+
+    user_batches = [
+        (seed, number, start, min(batch_size, users - start), password_hash, now, use_copy, batch_size)
+        for number, start in enumerate(range(0, users, batch_size))
+    ]
+    created_users = 0
+    for count, _ in run_batches(seed_user_batch, user_batches, workers):
+        created_users += count
+        log(f"Created {created_users} users with subscriptions")
+
+    _owners['owners'], _owners['cum_weights'] = load_owners(users, seed)
+    submission_batches = [
+        (seed, number, min(batch_size, submissions - start), now, processed_ratio, analysis_ratio,
+         use_copy, batch_size)
+        for number, start in enumerate(range(0, submissions, batch_size))
+    ]
+    created_submissions = created_analyses = 0
+    try:
+        for count, analyses in run_batches(seed_submission_batch, submission_batches, workers):
+            created_submissions += count
+            created_analyses += analyses
+            log(f"Created {created_submissions} submissions, {created_analyses} analyses")
+    finally:
+        _owners.clear()
+
+    rebuild_dashboard_stats()
+    return {'users': created_users, 'submissions': created_submissions, 'analyses': created_analyses}
+
+
+def flush_seed_data(batch_size=5000):
+    """
+    Delete every seeded row. Submissions and analyses are deleted in bulk
+    without signals (the dashboard rollup is rebuilt afterwards); users go
+    through the ORM in batches so their remaining relations are handled.
+    """
+    domain = f'@{SEED_EMAIL_DOMAIN}'
+    submissions = ContactSubmission.objects.filter(email__endswith=domain)
+    with transaction.atomic():
+        for queryset in (
+            ProfileAnalysis.objects.filter(submission__in=submissions),
+            submissions,
+            UserSubscription.objects.filter(user__email__endswith=domain),
+            MonthlySubmissionCount.objects.filter(user__email__endswith=domain),
+        ):
+            queryset._raw_delete(queryset.db)
+
+    ids = list(User.objects.filter(email__endswith=domain).values_list('id', flat=True))
+    for start in range(0, len(ids), batch_size):
+        User.objects.filter(id__in=ids[start:start + batch_size]).delete()
+    rebuild_dashboard_stats()
+    return len(ids)
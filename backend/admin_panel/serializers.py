@@ -13,7 +13,8 @@ class ProfileAnalysisSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProfileAnalysis
         fields = '__all__'
-        read_only_fields = ['id', 'created_at', 'updated_at', 'analyzed_by']
+        # score, risk_level and flags are computed on save from the indicators
+        read_only_fields = ['id', 'created_at', 'updated_at', 'analyzed_by', 'score', 'risk_level', 'flags']
     
     def create(self, validated_data):
         # Extract submission_id from validated data
@@ -0,0 +1,99 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from backend.events import publish_on_commit, user_channel
+from backend.view_cache import invalidate_tags_on_commit, DASHBOARD_STATS_TAG, USER_SUBMISSIONS_TAG
+from contact.models import ContactSubmission
+from .models import ProfileAnalysis
+from . import stats
+
+
+def _loaded(instance, field):
+    # Deferred fields must not be fetched just to track their old value
+    return field in instance.__dict__
+
+
+@receiver(post_init, sender=ContactSubmission)
+def remember_submission_state(sender, instance, **kwargs):
+    instance._stats_was_processed = instance.is_processed if _loaded(instance, 'is_processed') else None
+
+
+@receiver(post_save, sender=ContactSubmission)
+def submission_saved(sender, instance, created, **kwargs):
+    was_processed = getattr(instance, '_stats_was_processed', None)
+
+    if created:
+        stats.apply_daily_delta(instance.created_at, 1)
+        stats.apply_stats_delta(
+            total_submissions=1,
+            processed_submissions=1 if instance.is_processed else 0,
+        )
+    elif was_processed is not None and was_processed != instance.is_processed:
+        stats.apply_stats_delta(processed_submissions=1 if instance.is_processed else -1)
+
+    instance._stats_was_processed = instance.is_processed
+
+
+@receiver(post_delete, sender=ContactSubmission)
+def submission_deleted(sender, instance, **kwargs):
+    stats.apply_daily_delta(instance.created_at, -1)
+    stats.apply_stats_delta(
+        total_submissions=-1,
+        processed_submissions=-1 if instance.is_processed else 0,
+    )
+
+
+@receiver(post_init, sender=ProfileAnalysis)
+def remember_analysis_state(sender, instance, **kwargs):
+    if _loaded(instance, 'score') and _loaded(instance, 'risk_level'):
+        instance._stats_old = (instance.score, instance.risk_level)
+    else:
+        instance._stats_old = None
+
+
+@receiver(post_save, sender=ProfileAnalysis)
+def analysis_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, '_stats_old', None)
+
+    if created:
+        stats.apply_stats_delta(
+            analysis_count=1,
+            score_total=instance.score or 0,
+            **stats.risk_delta(instance.risk_level, 1),
+        )
+    elif old is not None and old != (instance.score, instance.risk_level):
+        old_score, old_risk = old
+        deltas = {'score_total': (instance.score or 0) - (old_score or 0)}
+        if old_risk != instance.risk_level:
+            deltas.update(stats.risk_delta(old_risk, -1))
+            deltas.update(stats.risk_delta(instance.risk_level, 1))
+        stats.apply_stats_delta(**deltas)
+
+    instance._stats_old = (instance.score, instance.risk_level)
+
+
+@receiver(post_delete, sender=ProfileAnalysis)
+def analysis_deleted(sender, instance, **kwargs):
+    stats.apply_stats_delta(
+        analysis_count=-1,
+        score_total=-(instance.score or 0),
+        **stats.risk_delta(instance.risk_level, -1),
+    )
+
+
+@receiver([post_save, post_delete], sender=ProfileAnalysis)
+def invalidate_analysis_caches(sender, instance, **kwargs):
+    """
+    Invalidate cached dashboard stats and the owner's analyses list, and
+    tell the owner's event stream
+    """
+    tags = [DASHBOARD_STATS_TAG]
+    email = (
+        ContactSubmission.objects.filter(pk=instance.submission_id)
+        .values_list('email', flat=True)
+        .first()
+    )
+    if email:
+        tags.append(USER_SUBMISSIONS_TAG.format(email=email))
+        publish_on_commit(user_channel(email), 'analysis.updated', {'submission_id': instance.submission_id})
+    invalidate_tags_on_commit(*tags)
@@ -0,0 +1,292 @@
+"""
+Nearest-neighbour search over profile analyses.
+
+Every analysis becomes a feature vector: its 24 indicator flags (0/1, from
+the packed ``flags`` column) followed by connections, account age and
+endorsements scaled to 0-1 the way the scoring engine scales them. Each
+worker process keeps the vectors of all analyses in one NumPy matrix and
+answers queries by squared Euclidean distance.
+
+Small tables are searched exhaustively. From ``SIMILARITY_PARTITION_MIN_ROWS``
+rows the matrix is split into partitions by k-means (an inverted-file
+index); a query then scans only the ``SIMILARITY_NPROBE`` partitions whose
+centroids are nearest, trading a little recall for a much smaller scan.
+
+The index is built on first use and refreshed incrementally: rows whose
+``updated_at`` moved past the last refresh are upserted, and a row count
+mismatch (deletions) triggers a full rebuild. Updated rows keep their
+partition until the next rebuild.
+"""
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+
+from .flags import FLAG_BITS
+from .scoring import LOG_SCALED, SATURATION
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FEATURES = ('connections', 'account_age_years', 'skills_endorsements_count')
+FEATURES = FLAG_BITS + NUMERIC_FEATURES
+COLUMNS = ('id', 'flags', *NUMERIC_FEATURES)
+
+# Rows handled per step when assigning rows to partitions, bounding the
+# temporary distance matrix to CHUNK x partitions floats
+CHUNK = 8192
+
+
+def feature_matrix(flags, connections, account_age, endorsements):
+    """Feature vectors (float32) from column arrays; NULL numbers as 0"""
+    flags = np.asarray(flags, dtype=np.uint32)
+    matrix = np.empty((len(flags), len(FEATURES)), dtype=np.float32)
+    for position in range(len(FLAG_BITS)):
+        matrix[:, position] = (flags >> np.uint32(position)) & 1
+    for offset, (name, values) in enumerate(zip(NUMERIC_FEATURES, (connections, account_age, endorsements))):
+        values = np.nan_to_num(np.asarray(values, dtype=np.float64), nan=0.0).clip(min=0.0)
+        if name in LOG_SCALED:
+            scaled = np.log1p(values) / math.log1p(SATURATION[name])
+        else:
+            scaled = values / SATURATION[name]
+        matrix[:, len(FLAG_BITS) + offset] = np.minimum(scaled, 1.0)
+    return matrix
+
+
+def rows_to_arrays(rows):
+    """``(ids, matrix)`` from ``values_list(*COLUMNS)`` rows"""
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, len(FEATURES)), dtype=np.float32)
+    ids, flags, connections, age, endorsements = zip(*rows)
+    none_to_nan = lambda values: [np.nan if v is None else v for v in values]
+    return (
+        np.array(ids, dtype=np.int64),
+        feature_matrix(flags, none_to_nan(connections), none_to_nan(age), none_to_nan(endorsements)),
+    )
+
+
+def squared_distances(matrix, norms, vector):
+    """Squared L2 distance of every row of ``matrix`` to ``vector``"""
+    return np.maximum(norms - 2.0 * (matrix @ vector) + vector @ vector, 0.0)
+
+
+def nearest_centroid(matrix, centroids):
+    """Index of the nearest centroid of every row, computed in chunks"""
+    centroid_norms = (centroids * centroids).sum(axis=1)
+    assignments = np.empty(len(matrix), dtype=np.int32)
+    for start in range(0, len(matrix), CHUNK):
+        block = matrix[start:start + CHUNK]
+        # |x - c|^2 up to the per-row constant |x|^2
+        distances = centroid_norms - 2.0 * (block @ centroids.T)
+        assignments[start:start + CHUNK] = distances.argmin(axis=1)
+    return assignments
+
+
+def kmeans(matrix, count, iterations=8, sample_size=100000, seed=0):
+    """Centroids of ``count`` clusters, trained on a sample of the rows"""
+    rng = np.random.default_rng(seed)
+    if len(matrix) > sample_size:
+        matrix = matrix[rng.choice(len(matrix), sample_size, replace=False)]
+    centroids = matrix[rng.choice(len(matrix), count, replace=False)].copy()
+    for _ in range(iterations):
+        assignments = nearest_centroid(matrix, centroids)
+        sizes = np.bincount(assignments, minlength=count)
+        filled = sizes > 0
+        for dimension in range(matrix.shape[1]):
+            sums = np.bincount(assignments, weights=matrix[:, dimension], minlength=count)
+            # Empty clusters keep their previous centroid
+            centroids[filled, dimension] = sums[filled] / sizes[filled]
+    return centroids
+
+
+class Partitions:
+    """Inverted-file partitioning: k-means centroids and the rows of each"""
+
+    def __init__(self, matrix, count, seed=0):
+        self.centroids = kmeans(matrix, count, seed=seed)
+        assignments = nearest_centroid(matrix, self.centroids)
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(count + 1))
+        self.members = [order[bounds[i]:bounds[i + 1]] for i in range(count)]
+
+    def add(self, positions, matrix):
+        """Put new rows (``positions`` in the index matrix) in their nearest partitions"""
+        assignments = nearest_centroid(matrix[positions], self.centroids)
+        for partition in np.unique(assignments):
+            self.members[partition] = np.concatenate(
+                [self.members[partition], positions[assignments == partition]]
+            )
+
+    def candidates(self, vector, nprobe):
+        distances = ((self.centroids - vector) ** 2).sum(axis=1)
+        probes = np.argpartition(distances, min(nprobe, len(distances) - 1))[:nprobe]
+        return np.concatenate([self.members[p] for p in probes])
+
+
+class SimilarityIndex:
+    """
+    Feature matrix of all analyses, with optional partitioning. The ids,
+    matrix, row norms and partitions are swapped as one tuple, so a search
+    running during a rebuild or an append sees a consistent state.
+    """
+
+    def __init__(self, partition_min_rows=100000, nprobe=8, seed=0):
+        self.partition_min_rows = partition_min_rows
+        self.nprobe = nprobe
+        self.seed = seed
+        self._state = (
+            np.empty(0, dtype=np.int64), np.empty((0, len(FEATURES)), dtype=np.float32),
+            np.empty(0, dtype=np.float32), None,
+        )
+
+    def __len__(self):
+        return len(self._state[0])
+
+    @property
+    def partitions(self):
+        return self._state[3]
+
+    def build(self, ids, matrix):
+        """Replace the contents; ``ids`` must be sorted"""
+        partitions = None
+        if len(ids) >= self.partition_min_rows:
+            partitions = Partitions(matrix, int(math.sqrt(len(ids))), seed=self.seed)
+        self._state = (ids, matrix, (matrix * matrix).sum(axis=1), partitions)
+
+    def upsert(self, ids, matrix):
+        """
+        Update rows already present and append new ones. Returns False when
+        a new id is lower than the current maximum (the ids would no longer
+        be sorted) and the index needs a rebuild instead.
+        """
+        current_ids, current, norms, partitions = self._state
+        positions = np.searchsorted(current_ids, ids)
+        present = positions < len(current_ids)
+        present[present] = current_ids[positions[present]] == ids[present]
+        # Existing rows change in place; readers see either version of a row
+        current[positions[present]] = matrix[present]
+        norms[positions[present]] = (matrix[present] * matrix[present]).sum(axis=1)
+
+        new = ~present
+        if not new.any():
+            return True
+        if len(current_ids) and ids[new].min() < current_ids[-1]:
+            return False
+        order = np.argsort(ids[new])
+        new_ids, new_rows = ids[new][order], matrix[new][order]
+        combined = np.concatenate([current, new_rows])
+        if partitions is not None:
+            partitions.add(np.arange(len(current), len(combined)), combined)
+        self._state = (
+            np.concatenate([current_ids, new_ids]), combined,
+            np.concatenate([norms, (new_rows * new_rows).sum(axis=1)]), partitions,
+        )
+        return True
+
+    def search(self, vector, k, exclude_id=None):
+        """``[(id, distance)]`` of the ``k`` nearest rows to ``vector``"""
+        ids, matrix, norms, partitions = self._state
+        if partitions is not None:
+            positions = partitions.candidates(vector, self.nprobe)
+            # Rows appended after this state was taken
+            positions = positions[positions < len(ids)]
+        else:
+            positions = np.arange(len(ids))
+        if exclude_id is not None:
+            positions = positions[ids[positions] != exclude_id]
+        if not len(positions):
+            return []
+        distances = squared_distances(matrix[positions], norms[positions], vector)
+        k = min(k, len(positions))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top], kind='stable')]
+        return [(int(ids[positions[i]]), float(np.sqrt(distances[i]))) for i in top]
+
+
+class AnalysisIndex:
+    """
+    The process-wide index over the ProfileAnalysis table, built lazily and
+    refreshed at most every ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, refresh_interval=60, partition_min_rows=100000, nprobe=8):
+        self.refresh_interval = refresh_interval
+        self.index = SimilarityIndex(partition_min_rows, nprobe)
+        self.watermark = None
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _queryset(self):
+        from .models import ProfileAnalysis
+        return ProfileAnalysis.objects.order_by('id')
+
+    def rebuild(self):
+        start = time.perf_counter()
+        queryset = self._queryset()
+        watermark = queryset.order_by('-updated_at').values_list('updated_at', flat=True).first()
+        self.index.build(*rows_to_arrays(list(queryset.values_list(*COLUMNS))))
+        self.watermark = watermark
+        logger.info(f"Built similarity index: {len(self.index)} analyses, "
+                    f"{'partitioned' if self.index.partitions is not None else 'exhaustive'}, "
+                    f"{time.perf_counter() - start:.2f}s")
+
+    def refresh(self):
+        queryset = self._queryset()
+        if self.watermark is None:
+            self.rebuild()
+            return
+        changed = list(queryset.filter(updated_at__gte=self.watermark).values_list(*COLUMNS, 'updated_at'))
+        if changed:
+            self.watermark = max(row[-1] for row in changed)
+            if not self.index.upsert(*rows_to_arrays([row[:-1] for row in changed])):
+                self.rebuild()
+                return
+        if queryset.count() != len(self.index):
+            # Rows were deleted (or a lower id was committed late)
+            self.rebuild()
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self.refreshed_at is not None and now - self.refreshed_at < self.refresh_interval:
+            return
+        # Only the first build makes other requests wait; while a refresh
+        # runs they keep searching the current contents
+        if not self._lock.acquire(blocking=self.refreshed_at is None):
+            return
+        try:
+            if self.refreshed_at is None or now - self.refreshed_at >= self.refresh_interval:
+                self.refresh()
+                self.refreshed_at = time.monotonic()
+        finally:
+            self._lock.release()
+
+    def similar(self, analysis, k=10):
+        """``[(analysis_id, distance)]`` of the ``k`` analyses most like ``analysis``"""
+        self.ensure_fresh()
+        vector = feature_matrix(
+            [analysis.flags], [analysis.connections or 0], [analysis.account_age_years or 0],
+            [analysis.skills_endorsements_count or 0],
+        )[0]
+        return self.index.search(vector, k, exclude_id=analysis.id)
+
+    def describe(self):
+        return {
+            'analyses': len(self.index),
+            'partitioned': self.index.partitions is not None,
+        }
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = AnalysisIndex(
+            refresh_interval=getattr(settings, 'SIMILARITY_REFRESH_INTERVAL', 60),
+            partition_min_rows=getattr(settings, 'SIMILARITY_PARTITION_MIN_ROWS', 100000),
+            nprobe=getattr(settings, 'SIMILARITY_NPROBE', 8),
+        )
+    return _index
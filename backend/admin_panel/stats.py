@@ -0,0 +1,151 @@
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from contact.models import ContactSubmission
+from .models import DashboardStats, DailySubmissionCount, ProfileAnalysis
+
+logger = logging.getLogger(__name__)
+
+STATS_ROW_ID = 1
+RECENT_DAYS = 30
+
+RISK_FIELDS = {
+    'low': 'low_risk_count',
+    'medium': 'medium_risk_count',
+    'high': 'high_risk_count',
+}
+
+
+def compute_dashboard_stats():
+    """
+    Compute the dashboard statistics straight from the source tables.
+
+    Submissions and analyses are joined one-to-one, so a single
+    conditional-aggregation query covers every figure.
+    """
+    thirty_days_ago = timezone.now() - timedelta(days=RECENT_DAYS)
+    totals = ContactSubmission.objects.aggregate(
+        total_submissions=Count('id'),
+        processed_submissions=Count('id', filter=Q(is_processed=True)),
+        recent_submissions=Count('id', filter=Q(created_at__gte=thirty_days_ago)),
+        avg_score=Avg('analysis__score'),
+        low=Count('analysis', filter=Q(analysis__risk_level='low')),
+        medium=Count('analysis', filter=Q(analysis__risk_level='medium')),
+        high=Count('analysis', filter=Q(analysis__risk_level='high')),
+    )
+    return _format_stats(
+        totals['total_submissions'],
+        totals['processed_submissions'],
+        totals['recent_submissions'],
+        totals['avg_score'],
+        {level: totals[level] for level in RISK_FIELDS},
+    )
+
+
+def get_dashboard_stats():
+    """Read the dashboard statistics from the rollup tables"""
+    stats = DashboardStats.objects.filter(pk=STATS_ROW_ID).first()
+    if stats is None:
+        # First use (or the rollup was wiped) - fall back and rebuild
+        logger.warning("Dashboard stats rollup missing, rebuilding")
+        return rebuild_dashboard_stats()
+
+    since = (timezone.now() - timedelta(days=RECENT_DAYS)).date()
+    recent = DailySubmissionCount.objects.filter(date__gte=since).values_list('count', flat=True)
+
+    avg_score = stats.score_total / stats.analysis_count if stats.analysis_count else None
+    return _format_stats(
+        stats.total_submissions,
+        stats.processed_submissions,
+        sum(recent),
+        avg_score,
+        {level: getattr(stats, field) for level, field in RISK_FIELDS.items()},
+    )
+
+
+def _format_stats(total, processed, recent, avg_score, risk_distribution):
+    return {
+        'total_submissions': total,
+        'processed_submissions': processed,
+        'pending_submissions': total - processed,
+        'recent_submissions': recent,
+        'avg_score': round(avg_score or 0, 1),
+        'risk_distribution': risk_distribution,
+    }
+
+
+@transaction.atomic
+def rebuild_dashboard_stats():
+    """Recompute the rollup tables from scratch and return the fresh stats"""
+    submissions = ContactSubmission.objects.aggregate(
+        total=Count('id'),
+        processed=Count('id', filter=Q(is_processed=True)),
+    )
+    analyses = ProfileAnalysis.objects.aggregate(
+        count=Count('id'),
+        score_total=Sum('score'),
+        **{field: Count('id', filter=Q(risk_level=level)) for level, field in RISK_FIELDS.items()},
+    )
+
+    DashboardStats.objects.update_or_create(
+        pk=STATS_ROW_ID,
+        defaults={
+            'total_submissions': submissions['total'],
+            'processed_submissions': submissions['processed'],
+            'analysis_count': analyses['count'],
+            'score_total': analyses['score_total'] or 0,
+            'updated_at': timezone.now(),
+            **{field: analyses[field] for field in RISK_FIELDS.values()},
+        },
+    )
+
+    DailySubmissionCount.objects.all().delete()
+    DailySubmissionCount.objects.bulk_create([
+        DailySubmissionCount(date=row['date'], count=row['count'])
+        for row in ContactSubmission.objects.annotate(date=TruncDate('created_at'))
+        .values('date')
+        .annotate(count=Count('id'))
+        .order_by()
+    ])
+
+    return get_dashboard_stats()
+
+
+# Incremental updates, called from admin_panel.signals
+
+def apply_stats_delta(**deltas):
+    """Atomically add ``deltas`` (field -> int) to the rollup row"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    updated = DashboardStats.objects.filter(pk=STATS_ROW_ID).update(
+        updated_at=timezone.now(),
+        **{field: F(field) + value for field, value in deltas.items()},
+    )
+    if not updated:
+        # No rollup yet: build it from the tables, which already include this change
+        rebuild_dashboard_stats()
+
+
+def apply_daily_delta(created_at, delta):
+    """Atomically add ``delta`` to the submission count for ``created_at``'s day"""
+    day = timezone.localdate(created_at) if timezone.is_aware(created_at) else created_at.date()
+    counts = DailySubmissionCount.objects.filter(date=day)
+    if counts.update(count=F('count') + delta):
+        return
+    try:
+        with transaction.atomic():
+            DailySubmissionCount.objects.create(date=day, count=delta)
+    except IntegrityError:
+        # Created concurrently - apply the delta to the existing row
+        counts.update(count=F('count') + delta)
+
+
+def risk_delta(level, delta):
+    field = RISK_FIELDS.get(level)
+    return {field: delta} if field else {}
@@ -3,7 +3,10 @@ from .views import (
     ProfileAnalysisCreateView,
     ProfileAnalysisDetailView,
     SubmissionAnalysisStatusView,
-    AdminDashboardStatsView
+    SimilarProfilesView,
+    PriorAnalysisView,
+    AdminDashboardStatsView,
+    AdminMetricsView
 )
 
 urlpatterns = [
@@ -11,7 +14,12 @@ urlpatterns = [
     path('analyses/', ProfileAnalysisCreateView.as_view(), name='profile_analysis_create'),
     path('analyses/<int:analysis_id>/', ProfileAnalysisDetailView.as_view(), name='profile_analysis_detail'),
     path('submissions/<int:submission_id>/analysis-status/', SubmissionAnalysisStatusView.as_view(), name='submission_analysis_status'),
+    path('submissions/<int:submission_id>/similar/', SimilarProfilesView.as_view(), name='similar_profiles'),
+    path('submissions/<int:submission_id>/prior-analysis/', PriorAnalysisView.as_view(), name='prior_analysis'),
     
     # Dashboard statistics
     path('dashboard/stats/', AdminDashboardStatsView.as_view(), name='admin_dashboard_stats'),
+    
+    # Request metrics aggregated across workers
+    path('metrics/', AdminMetricsView.as_view(), name='admin_metrics'),
 ]
@@ -3,16 +3,28 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.permissions import IsAdminUser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from django.shortcuts import get_object_or_404
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
-from django.db.models import Count, Avg, Q
+from django.db.models import Count, Q
 
 from .models import ProfileAnalysis
+from .similarity import get_index
 from .serializers import ProfileAnalysisSerializer, SubmissionWithAnalysisSerializer
+from .stats import get_dashboard_stats
+from backend.view_cache import cache_response, DASHBOARD_STATS_TAG
+from backend import metrics
+from contact.email_service import outbox_depth
 from contact.models import ContactSubmission
 from contact.serializers import ContactSerializer
 from users.authentication import AdminJWTAuthentication
+import json
+import logging
+from datetime import timedelta
+
+logger = logging.getLogger(__name__)
 
 class ProfileAnalysisCreateView(APIView):
     """API endpoint for creating a profile analysis"""
@@ -26,7 +38,7 @@ class ProfileAnalysisCreateView(APIView):
             return Response({'error': 'Submission ID is required'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Debug info
-        print(f"ProfileAnalysisCreateView - user: {request.user}, submission_id: {submission_id}")
+        logger.debug("ProfileAnalysisCreateView - user: %s, submission_id: %s", request.user, submission_id)
         
         # Check if submission exists
         submission = get_object_or_404(ContactSubmission, id=submission_id)
@@ -87,37 +99,157 @@ class SubmissionAnalysisStatusView(APIView):
             'analysis_id': submission.analysis.id if has_analysis else None
         })
 
+class SimilarProfilesView(APIView):
+    """
+    API endpoint returning the prior analyses most similar to the analysis
+    of a submission (``?k=`` results, default 10, at most 50)
+    """
+    permission_classes = [IsAdminUser]
+    authentication_classes = [AdminJWTAuthentication]
+    
+    def get(self, request, submission_id):
+        analysis = ProfileAnalysis.objects.filter(submission_id=submission_id).first()
+        if analysis is None:
+            get_object_or_404(ContactSubmission, id=submission_id)
+            return Response({'error': 'This submission has not been analyzed yet'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            k = max(1, min(50, int(request.query_params.get('k', 10))))
+        except ValueError:
+            return Response({'error': 'k must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        index = get_index()
+        neighbours = index.similar(analysis, k)
+        found = (ProfileAnalysis.objects.select_related('submission')
+                 .in_bulk([analysis_id for analysis_id, _ in neighbours]))
+        results = []
+        for analysis_id, distance in neighbours:
+            neighbour = found.get(analysis_id)
+            if neighbour is None:
+                # Deleted since the index was refreshed
+                continue
+            results.append({
+                'analysis_id': neighbour.id,
+                'submission_id': neighbour.submission_id,
+                'linkedin_url': neighbour.submission.linkedin_url,
+                'distance': round(distance, 4),
+                'score': neighbour.score,
+                'risk_level': neighbour.risk_level,
+                'summary': neighbour.summary,
+                'created_at': neighbour.created_at,
+            })
+        
+        return Response({
+            'submission_id': submission_id,
+            'analysis_id': analysis.id,
+            'results': results,
+            'index': index.describe(),
+        })
+
+class PriorAnalysisView(APIView):
+    """
+    API endpoint for reusing the analysis of an earlier submission of the
+    same LinkedIn profile (matched on the canonical ``linkedin_profile``).
+    GET returns the most recent such analysis and the values to pre-fill a
+    new one with; POST copies them into an analysis of this submission.
+    Only analyses of submissions from the last ANALYSIS_REUSE_MAX_AGE_DAYS
+    days are offered.
+    """
+    permission_classes = [IsAdminUser]
+    authentication_classes = [AdminJWTAuthentication]
+    
+    def prior_analysis(self, submission):
+        if not submission.linkedin_profile:
+            return None
+        max_age = timedelta(days=getattr(settings, 'ANALYSIS_REUSE_MAX_AGE_DAYS', 90))
+        return (ProfileAnalysis.objects.for_profile(submission.linkedin_profile, since=timezone.now() - max_age)
+                .exclude(submission_id=submission.id).select_related('submission').first())
+    
+    def get(self, request, submission_id):
+        submission = get_object_or_404(ContactSubmission, id=submission_id)
+        prior = self.prior_analysis(submission)
+        return Response({
+            'submission_id': submission.id,
+            'linkedin_profile': submission.linkedin_profile,
+            'analysis': ProfileAnalysisSerializer(prior).data if prior else None,
+            'prefill': prior.reusable_values() if prior else None,
+        })
+    
+    def post(self, request, submission_id):
+        with transaction.atomic():
+            submission = get_object_or_404(ContactSubmission.objects.select_for_update(), id=submission_id)
+            if ProfileAnalysis.objects.filter(submission_id=submission.id).exists():
+                return Response({'error': 'Analysis already exists for this submission'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            prior = self.prior_analysis(submission)
+            if prior is None:
+                return Response({'error': 'No recent analysis of this LinkedIn profile to reuse'},
+                                status=status.HTTP_404_NOT_FOUND)
+            
+            analysis = ProfileAnalysis.objects.create(
+                submission=submission,
+                created_by=request.user if request.user.pk else None,
+                **prior.reusable_values(),
+            )
+            submission.is_processed = True
+            submission.save(update_fields=['is_processed'])
+        
+        logger.info(f"Reused analysis {prior.id} for submission {submission.id} ({submission.linkedin_profile})")
+        return Response({
+            'reused_analysis_id': prior.id,
+            'analysis': ProfileAnalysisSerializer(analysis).data,
+        }, status=status.HTTP_201_CREATED)
+
 class AdminDashboardStatsView(APIView):
     """API endpoint to get stats for admin dashboard"""
     permission_classes = [IsAdminUser]
     authentication_classes = [AdminJWTAuthentication]
     
+    @cache_response(scope='role', tags=[DASHBOARD_STATS_TAG])
     def get(self, request):
-        # Get overall stats
-        total_submissions = ContactSubmission.objects.count()
-        processed_submissions = ContactSubmission.objects.filter(is_processed=True).count()
-        pending_submissions = total_submissions - processed_submissions
-        
-        # Get recent submissions (last 30 days)
-        thirty_days_ago = timezone.now() - timezone.timedelta(days=30)
-        recent_submissions = ContactSubmission.objects.filter(created_at__gte=thirty_days_ago).count()
-        
-        # Get average analysis score
-        analyses = ProfileAnalysis.objects.all()
-        avg_score = analyses.aggregate(Avg('score'))['score__avg'] or 0
+        # Single-row read from the rollup maintained by admin_panel.signals
+        return Response(get_dashboard_stats())
+
+class PrometheusTextRenderer(BaseRenderer):
+    """Renders an already formatted Prometheus exposition string"""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+    
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, str):
+            return data.encode(self.charset)
+        # Errors (e.g. 401/403) are dicts
+        return json.dumps(data).encode(self.charset)
+
+class AdminMetricsView(APIView):
+    """
+    API endpoint for request metrics aggregated across all workers.
+    Returns JSON by default, or the Prometheus text format with
+    ``?format=prometheus`` (or ``Accept: text/plain``).
+    """
+    permission_classes = [IsAdminUser]
+    authentication_classes = [AdminJWTAuthentication]
+    renderer_classes = [JSONRenderer, PrometheusTextRenderer]
+    
+    def get(self, request):
+        totals, workers = metrics.collect()
+        depth = outbox_depth()
         
-        # Risk level distribution
-        risk_distribution = {
-            'low': ProfileAnalysis.objects.filter(risk_level='low').count(),
-            'medium': ProfileAnalysis.objects.filter(risk_level='medium').count(),
-            'high': ProfileAnalysis.objects.filter(risk_level='high').count(),
-        }
+        if request.accepted_renderer.format == 'prometheus':
+            gauges = {
+                'email_queue_depth': (
+                    'Unsent messages in the email outbox.',
+                    [((('status', status),), count) for status, count in depth.items()],
+                ),
+            }
+            return Response(
+                metrics.prometheus_text(totals, gauges),
+                content_type='text/plain; version=0.0.4; charset=utf-8',
+            )
         
         return Response({
-            'total_submissions': total_submissions,
-            'processed_submissions': processed_submissions,
-            'pending_submissions': pending_submissions,
-            'recent_submissions': recent_submissions,
-            'avg_score': round(avg_score, 1),
-            'risk_distribution': risk_distribution
+            'workers': workers,
+            'endpoints': metrics.snapshot(totals),
+            'email_queue': depth,
         })
@@ -0,0 +1,44 @@
+"""
+``async def`` handlers on Django REST framework views.
+
+DRF 3.14 only dispatches to sync handlers. ``AsyncAPIView`` runs the same
+request pipeline - parsing, authentication, permissions, throttling,
+exception handling - but awaits the handler, so under ASGI (backend/asgi.py)
+a request waiting on the network or on the password pool (users/passwords.py)
+holds no thread. The sync steps of the pipeline may query the database
+(e.g. JWT users) and run through ``sync_to_async``; handlers use the async
+ORM (``aget``, ``asave``, ...) or wrap sync code the same way.
+
+Under WSGI (``runserver``, the test client) Django runs these views with
+``async_to_sync``, so they work unchanged.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """An ``APIView`` whose handlers are ``async def``"""
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            # OPTIONS and 405s come from the sync APIView handlers
+            if hasattr(response, '__await__'):
+                response = await response
+        except Exception as exc:
+            # The exception handler logs request.user, which may query
+            response = await sync_to_async(self.handle_exception)(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,266 @@
+"""
+Two-tier cache backend: a small in-process LRU in front of a shared cache
+(Redis, or a file-based fallback) that every gunicorn worker talks to.
+
+Reads are served from the local LRU for at most ``LOCAL_TIMEOUT`` seconds.
+Deletes are broadcast across workers without a pub/sub channel: each one
+appends the deleted keys to an *invalidation log* in the shared tier (a
+sequence counter plus one short-lived entry per delete), and every worker
+reads the entries past its last seen sequence number at most every
+``GENERATION_CHECK_INTERVAL`` seconds and drops just those keys. Only
+``clear`` - or a log the worker can no longer read in full - drops its
+whole LRU, through a *generation* counter. Plain ``set`` calls do not
+broadcast, so keys that other workers must see change immediately should
+be invalidated with ``delete``.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .instrumentation import record_cache
+
+GENERATION_KEY = 'two-tier:generation'
+SEQUENCE_KEY = 'two-tier:sequence'
+LOG_KEY = 'two-tier:invalidated:{}'
+# Seconds a log entry is kept; a worker idle for longer drops its LRU
+LOG_TIMEOUT = 60
+# A worker further behind than this drops its LRU instead of reading the log
+MAX_LOG_READ = 500
+_MISSING = object()
+
+
+class TwoTierCache(BaseCache):
+    """
+    Django cache backend. ``LOCATION`` is the alias of the shared cache in
+    ``CACHES``; ``OPTIONS`` accepts ``LOCAL_TIMEOUT``, ``LOCAL_MAX_ENTRIES``
+    and ``GENERATION_CHECK_INTERVAL``.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location or 'shared'
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 1000)
+        self.generation_interval = options.get('GENERATION_CHECK_INTERVAL', 1.0)
+
+        # key -> (expires_at, pickled value)
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = None
+        self._sequence = None
+        self._generation_checked = 0.0
+
+        # Hit/miss counters for instrumentation
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    # Local tier
+
+    def _local_key(self, key, version):
+        return (key, version)
+
+    def _local_get(self, key, version):
+        now = time.monotonic()
+        local_key = self._local_key(key, version)
+        with self._lock:
+            entry = self._local.get(local_key)
+            if entry is None:
+                return _MISSING
+            expires_at, pickled = entry
+            if expires_at <= now:
+                del self._local[local_key]
+                return _MISSING
+            self._local.move_to_end(local_key)
+        return pickle.loads(pickled)
+
+    def _local_set(self, key, value, version, timeout=DEFAULT_TIMEOUT):
+        ttl = self.local_timeout
+        if timeout is not DEFAULT_TIMEOUT and timeout is not None:
+            if timeout <= 0:
+                self._local_delete(key, version)
+                return
+            ttl = min(ttl, timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        local_key = self._local_key(key, version)
+        with self._lock:
+            self._local[local_key] = (time.monotonic() + ttl, pickled)
+            self._local.move_to_end(local_key)
+            while len(self._local) > self.local_max_entries:
+                self._local.popitem(last=False)
+
+    def _local_delete(self, key, version):
+        with self._lock:
+            self._local.pop(self._local_key(key, version), None)
+
+    def _local_clear(self):
+        with self._lock:
+            self._local.clear()
+
+    # Invalidation broadcast
+
+    def _check_generation(self):
+        """Drop the local entries other workers deleted since the last check"""
+        now = time.monotonic()
+        if now - self._generation_checked < self.generation_interval:
+            return
+        self._generation_checked = now
+        shared = self.shared
+        state = shared.get_many([GENERATION_KEY, SEQUENCE_KEY])
+        generation, sequence = state.get(GENERATION_KEY), state.get(SEQUENCE_KEY)
+        if generation != self._generation:
+            self._local_clear()
+            self._generation, self._sequence = generation, sequence
+            return
+        if sequence == self._sequence:
+            return
+
+        previous, self._sequence = self._sequence, sequence
+        if previous is None or sequence is None or not 0 < sequence - previous <= MAX_LOG_READ:
+            # First check, or the counter was evicted and restarted
+            self._local_clear()
+            return
+        log_keys = [LOG_KEY.format(n) for n in range(previous + 1, sequence + 1)]
+        entries = shared.get_many(log_keys)
+        if len(entries) < len(log_keys):
+            # Expired, or not written yet by the deleting worker
+            self._local_clear()
+            return
+        with self._lock:
+            for keys in entries.values():
+                for local_key in keys:
+                    self._local.pop(local_key, None)
+
+    def _publish_deletes(self, keys, version):
+        """Append deleted keys to the invalidation log and drop them locally"""
+        local_keys = [self._local_key(key, version) for key in keys]
+        with self._lock:
+            for local_key in local_keys:
+                self._local.pop(local_key, None)
+        shared = self.shared
+        # A unique starting value, so a counter evicted and restarted can
+        # never replay sequence numbers a worker has already read
+        shared.add(SEQUENCE_KEY, time.time_ns() // 1000, None)
+        try:
+            sequence = shared.incr(SEQUENCE_KEY)
+        except ValueError:
+            # Evicted between add() and incr(); the next check of every
+            # worker sees the restart and drops its LRU
+            shared.set(SEQUENCE_KEY, time.time_ns() // 1000, None)
+            return
+        shared.set(LOG_KEY.format(sequence), local_keys, LOG_TIMEOUT)
+
+    def _bump_generation(self):
+        shared = self.shared
+        shared.add(GENERATION_KEY, 0, None)
+        try:
+            self._generation = shared.incr(GENERATION_KEY)
+        except ValueError:
+            # Evicted between add() and incr()
+            shared.set(GENERATION_KEY, 1, None)
+            self._generation = 1
+        self._generation_checked = time.monotonic()
+        self._local_clear()
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        self._check_generation()
+        value = self._local_get(key, version)
+        if value is not _MISSING:
+            self.local_hits += 1
+            record_cache(hits=1)
+            return value
+
+        value = self.shared.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self.misses += 1
+            record_cache(misses=1)
+            return default
+        self.shared_hits += 1
+        record_cache(hits=1)
+        self._local_set(key, value, version)
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        self._check_generation()
+        found, remote = {}, []
+        for key in keys:
+            value = self._local_get(key, version)
+            if value is _MISSING:
+                remote.append(key)
+            else:
+                self.local_hits += 1
+                found[key] = value
+
+        if remote:
+            fetched = self.shared.get_many(remote, version=version)
+            for key, value in fetched.items():
+                self._local_set(key, value, version)
+            self.shared_hits += len(fetched)
+            self.misses += len(remote) - len(fetched)
+            found.update(fetched)
+        record_cache(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(key, value, version, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(key, value, version, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(key, value, version, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        self._publish_deletes([key], version)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self._publish_deletes(keys, version)
+
+    def has_key(self, key, version=None):
+        self._check_generation()
+        if self._local_get(key, version) is not _MISSING:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        # Counters always live in the shared tier so every worker sees them
+        self._local_delete(key, version)
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local_delete(key, version)
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        self.shared.clear()
+        self._bump_generation()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
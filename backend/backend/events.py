@@ -0,0 +1,244 @@
+"""
+Publish/subscribe for the Server-Sent Events stream (see backend/sse.py).
+
+Model signal receivers call ``publish_on_commit(channel, event, data)``;
+channels are ``ADMIN_CHANNEL`` (every admin) and ``USER_CHANNEL`` (one
+user, by normalized email). Events carry ids and states only - clients
+fetch the details from the regular endpoints - so they can never leak more
+than a list endpoint would.
+
+Each process keeps a ``Hub`` of the streams it serves. A published event
+is dispatched to the local hub directly and sent to the other processes
+through the shared broker: Redis pub/sub when ``REDIS_URL`` is set,
+PostgreSQL ``LISTEN``/``NOTIFY`` when the database is PostgreSQL, none
+otherwise (a single process, e.g. ``runserver``). A process starts
+listening on the broker - one connection in a background thread - only
+when its first stream subscribes, so processes that merely publish (the
+email worker, management commands) never hold a listener.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+ADMIN_CHANNEL = 'admin'
+USER_CHANNEL = 'user:{email}'
+
+# Redis channel / PostgreSQL notification channel shared by all processes
+BROKER_CHANNEL = 'lktool_events'
+
+# Sent to a stream instead of the events it was too slow to take
+RESYNC_EVENT = 'resync'
+
+# Tells listeners which events this process already dispatched itself
+ORIGIN = uuid.uuid4().hex
+
+
+class Subscription:
+    """The queue of one stream, filled from any thread, read on its event loop"""
+
+    def __init__(self, channels, loop, maxsize):
+        self.channels = tuple(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def deliver(self, message):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # A client this far behind re-reads its data instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({'event': RESYNC_EVENT, 'data': {}})
+
+    async def get(self, timeout):
+        """The next event, or None after ``timeout`` seconds without one"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Hub:
+    """The subscriptions of this process, by channel"""
+
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len({subscription for subscribers in self._channels.values() for subscription in subscribers})
+
+    def subscribe(self, channels, loop, maxsize=100):
+        subscription = Subscription(channels, loop, maxsize)
+        with self._lock:
+            for channel in subscription.channels:
+                self._channels.setdefault(channel, set()).add(subscription)
+        start_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._channels.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._channels[channel]
+
+    def dispatch(self, message):
+        """Hand ``message`` to the streams of its channel; safe from any thread"""
+        with self._lock:
+            subscribers = list(self._channels.get(message['channel'], ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The stream's loop has shut down
+                self.unsubscribe(subscription)
+
+
+hub = Hub()
+
+
+# Brokers
+
+class RedisBroker:
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+
+    def send(self, payload):
+        self.client.publish(BROKER_CHANNEL, payload)
+
+    def listen(self, callback):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(BROKER_CHANNEL)
+        try:
+            for message in pubsub.listen():
+                callback(message['data'])
+        finally:
+            pubsub.close()
+
+
+class PostgresBroker:
+    # Seconds a listener waits on its socket before checking it again
+    POLL_INTERVAL = 30
+
+    def send(self, payload):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [BROKER_CHANNEL, payload])
+
+    def listen(self, callback):
+        # A connection of its own, outside the pool: Django's are borrowed
+        # per request
+        listener = connection.Database.connect(**connection.get_connection_params(), autocommit=True)
+        try:
+            listener.execute(f'LISTEN {BROKER_CHANNEL}')
+            while True:
+                for notify in listener.notifies(timeout=self.POLL_INTERVAL):
+                    callback(notify.payload)
+        finally:
+            listener.close()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """The shared broker of this deployment, or None"""
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                kind = getattr(settings, 'EVENTS_BROKER', '') or (
+                    'redis' if getattr(settings, 'REDIS_URL', None)
+                    else 'postgres' if connection.vendor == 'postgresql' else 'local'
+                )
+                if kind == 'redis':
+                    _broker = RedisBroker(settings.REDIS_URL)
+                elif kind == 'postgres':
+                    _broker = PostgresBroker()
+                else:
+                    _broker = False
+                logger.info(f"Event broker: {kind}")
+    return _broker or None
+
+
+def _received(payload):
+    try:
+        message = json.loads(payload)
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed event payload: {payload!r:.200}")
+        return
+    if message.get('origin') != ORIGIN:
+        hub.dispatch(message)
+
+
+_listener = None
+
+
+def start_listener():
+    """Listen on the broker in a daemon thread, reconnecting on errors"""
+    global _listener
+    broker = get_broker()
+    if broker is None or _listener is not None:
+        return
+    with _broker_lock:
+        if _listener is not None:
+            return
+
+        def run():
+            delay = 1
+            while True:
+                started = time.monotonic()
+                try:
+                    broker.listen(_received)
+                except Exception as e:
+                    logger.warning(f"Event listener disconnected: {e}")
+                if time.monotonic() - started > 60:
+                    delay = 1
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+
+        _listener = threading.Thread(target=run, name='event-listener', daemon=True)
+        _listener.start()
+
+
+# Publishing
+
+def publish(channel, event, data):
+    """Send ``event`` to the streams subscribed to ``channel``, in every process"""
+    message = {'origin': ORIGIN, 'channel': channel, 'event': event, 'data': data}
+    hub.dispatch(message)
+    broker = get_broker()
+    if broker is None:
+        return
+    try:
+        broker.send(json.dumps(message, cls=DjangoJSONEncoder))
+    except Exception as e:
+        # Streams are a convenience on top of polling; never fail the request
+        logger.warning(f"Could not publish {event} event: {e}")
+
+
+def publish_on_commit(channel, event, data):
+    """``publish`` once the current transaction commits (right away outside one)"""
+    transaction.on_commit(lambda: publish(channel, event, data))
+
+
+def user_channel(email):
+    from contact.models import ContactSubmission
+
+    return USER_CHANNEL.format(email=ContactSubmission.normalize_email(email))
@@ -0,0 +1,147 @@
+"""
+``Idempotency-Key`` support for API views that create or change records.
+
+A client that sends a POST with an ``Idempotency-Key`` header (any unique
+string, e.g. a UUID, kept for retries of the same action) gets the original
+response replayed for every repeat of that request, instead of a second
+submission. Requests without the header are handled as before.
+
+Keys are kept in ``IdempotencyKey`` rows, so all workers and instances see
+them, and are replayed for ``IDEMPOTENCY_KEY_TTL`` seconds. The first
+request claims its key by inserting the row: the unique constraint on
+(scope, key) lets exactly one insert succeed, and the others get an
+IntegrityError. A repeat arriving while the first is still being handled
+gets 409 and retries, and once the response is stored repeats get a copy
+of it with ``Idempotent-Replayed: true``. A key reused for a different
+request (another body or URL) gets 422. Server errors are not stored, so
+the client's retry runs the request again. Expired rows are deleted by the
+``purge_expired`` command.
+"""
+import functools
+import hashlib
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+DEFAULT_TTL = 60 * 60 * 24
+# How long a claimed key blocks repeats if its worker dies mid-request
+DEFAULT_LOCK_TIMEOUT = 60
+
+
+def _fingerprint(request, kwargs):
+    """What identifies a request besides its key: view arguments and body"""
+    body = request.data
+    if hasattr(body, 'lists'):
+        body = dict(body.lists())
+    payload = json.dumps([request.method, kwargs, body], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _scope(view, request):
+    owner = f'user-{request.user.pk}' if request.user.is_authenticated else 'anonymous'
+    return f'{view.__class__.__name__}:{owner}'
+
+
+def _claim(scope, digest, fingerprint, lock_timeout):
+    """
+    Insert the key's row; returns ``(row, created)``, where the row is the
+    first request's when ``created`` is false
+    """
+    from contact.models import IdempotencyKey
+
+    for _ in range(2):
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                entry = IdempotencyKey.objects.create(
+                    scope=scope, key=digest, fingerprint=fingerprint,
+                    expires_at=now + timedelta(seconds=lock_timeout),
+                )
+            return entry, True
+        except IntegrityError:
+            pass
+        entry = IdempotencyKey.objects.filter(scope=scope, key=digest).first()
+        if entry is not None and entry.expires_at > now:
+            return entry, False
+        # Expired but not purged yet (or deleted meanwhile): claim it again
+        IdempotencyKey.objects.filter(scope=scope, key=digest, expires_at__lte=now).delete()
+    return None, False
+
+
+def _error(message, status_code):
+    return Response({"success": False, "error": message}, status=status_code)
+
+
+def idempotent(method):
+    """
+    Replay stored responses of an APIView method for repeated
+    ``Idempotency-Key`` headers. Keys are scoped per view and per user, so
+    one client can never be served another's response.
+    """
+    @functools.wraps(method)
+    def wrapper(view, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return method(view, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return _error(f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters",
+                          status.HTTP_400_BAD_REQUEST)
+
+        from contact.models import IdempotencyKey
+
+        scope = _scope(view, request)
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        fingerprint = _fingerprint(request, kwargs)
+        lock_timeout = getattr(settings, 'IDEMPOTENCY_LOCK_TIMEOUT', DEFAULT_LOCK_TIMEOUT)
+
+        # First writer wins: only one request can insert the key
+        entry, created = _claim(scope, digest, fingerprint, lock_timeout)
+        if not created:
+            return _replay(entry, fingerprint)
+
+        claimed = IdempotencyKey.objects.filter(pk=entry.pk, status_code__isnull=True)
+        try:
+            response = method(view, request, *args, **kwargs)
+        except Exception:
+            claimed.delete()
+            raise
+
+        if response.status_code >= 500 or not isinstance(response, Response):
+            claimed.delete()
+        else:
+            ttl = getattr(settings, 'IDEMPOTENCY_KEY_TTL', DEFAULT_TTL)
+            claimed.update(
+                status_code=response.status_code, response=response.data,
+                expires_at=timezone.now() + timedelta(seconds=ttl),
+            )
+        return response
+    return wrapper
+
+
+def _replay(entry, fingerprint):
+    if entry is not None and entry.fingerprint != fingerprint:
+        return _error(f"This {HEADER} was already used for a different request",
+                      status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if entry is None or entry.status_code is None:
+        # Still being handled (or the key keeps expiring under us)
+        response = _error("The request with this key is still being processed",
+                          status.HTTP_409_CONFLICT)
+        response['Retry-After'] = '1'
+        return response
+
+    logger.info(f"Replaying idempotent response ({entry.status_code})")
+    response = Response(entry.response, status=entry.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
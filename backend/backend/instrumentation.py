@@ -0,0 +1,137 @@
+"""
+Per-request performance accounting.
+
+``ServerTimingMiddleware`` (backend/middleware.py) starts a ``RequestMetrics``
+for each API request and makes it current through a context variable; the
+database wrapper, the cache backend and the email queue add to it with the
+helpers below. Outside a request they do nothing.
+"""
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Where the time of one request went"""
+
+    def __init__(self, request_id):
+        self.request_id = request_id
+        self.started = time.perf_counter()
+        self.duration = None
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.timings = {}
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+        return self.duration
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting queries and SQL time"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.db_queries += 1
+
+    def server_timing(self):
+        """Value of the ``Server-Timing`` response header"""
+        parts = [
+            f'total;dur={self.duration * 1000:.1f}',
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.db_queries} queries"',
+            f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+        ]
+        for name, duration in self.timings.items():
+            parts.append(f'{name};dur={duration * 1000:.1f}')
+        return ', '.join(parts)
+
+    def as_log_fields(self):
+        fields = {
+            'request_id': self.request_id,
+            'duration_ms': round(self.duration * 1000, 1),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 1),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+        }
+        for name, duration in self.timings.items():
+            fields[f'{name}_ms'] = round(duration * 1000, 1)
+        return fields
+
+
+def new_request_id(incoming=None):
+    """Reuse a sane incoming ``X-Request-ID`` (e.g. from the proxy), else make one"""
+    if incoming and len(incoming) <= 64 and incoming.replace('-', '').isalnum():
+        return incoming
+    return uuid.uuid4().hex
+
+
+def start_request(request_id):
+    """Make a new ``RequestMetrics`` current; returns it and a reset token"""
+    metrics = RequestMetrics(request_id)
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_metrics():
+    return _current.get()
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper of every database connection: counts the query for the
+    current request, if any. Connections are per thread, and under ASGI a
+    request's queries run in threads of their own, so the wrapper is
+    installed on the connections rather than around the request.
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.db_wrapper(execute, sql, params, many, context)
+
+
+def instrument_connection(connection, **kwargs):
+    """Install ``count_queries`` on ``connection`` (a ``connection_created`` receiver)"""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+def record_cache(hits=0, misses=0):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_hits += hits
+        metrics.cache_misses += misses
+
+
+@contextmanager
+def timed(name):
+    """Add the duration of the block to the current request under ``name``"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class RequestIdFilter(logging.Filter):
+    """Tag log records emitted during a request with its ``request_id``"""
+
+    def filter(self, record):
+        metrics = _current.get()
+        if metrics is not None and not hasattr(record, 'request_id'):
+            record.request_id = metrics.request_id
+        return True
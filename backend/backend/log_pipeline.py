@@ -0,0 +1,186 @@
+"""
+Non-blocking, structured logging.
+
+Request threads only filter (level and sampling) and enqueue log records;
+a ``QueueListener`` thread per process formats them and writes to the
+stream, so request latency does not depend on stdout throughput. The
+``LOGGING`` dict is built by ``build_logging_config`` from the
+``LOG_LEVELS``, ``LOG_SAMPLING`` and ``LOG_FORMAT`` settings.
+"""
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+DEFAULT_QUEUE_SIZE = 10000
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+def extra_fields(record):
+    """The ``extra={...}`` fields passed to a logging call"""
+    return {
+        key: value for key, value in vars(record).items()
+        if key not in _RECORD_ATTRS and not key.startswith('_')
+    }
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable lines with ``extra`` fields appended as key=value pairs"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def formatMessage(self, record):
+        message = super().formatMessage(record)
+        fields = extra_fields(record)
+        if fields:
+            message += ' ' + ' '.join(f'{key}={value!r}' for key, value in fields.items())
+        return message
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra={...}`` fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            **extra_fields(record),
+        }
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of the records of chosen loggers.
+
+    ``rates`` maps logger names to a keep ratio between 0 and 1; the most
+    specific matching name wins. Warnings and errors are never sampled out.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = {name: float(rate) for name, rate in (rates or {}).items()}
+        self._cache = {}
+
+    def _rate(self, name):
+        rate = self._cache.get(name)
+        if rate is None:
+            rate, candidate = 1.0, name
+            while candidate:
+                if candidate in self.rates:
+                    rate = self.rates[candidate]
+                    break
+                candidate = candidate.rpartition('.')[0]
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to a background listener thread that formats and writes
+    them. The queue is bounded; when it is full records are dropped (and
+    counted) rather than blocking the request.
+    """
+
+    def __init__(self, stream='stdout', format='text', queue_size=DEFAULT_QUEUE_SIZE):
+        super().__init__(queue.Queue(queue_size))
+        target = logging.StreamHandler(getattr(sys, stream) if isinstance(stream, str) else stream)
+        target.setFormatter(StructuredFormatter() if format == 'json' else TextFormatter())
+        self.target = target
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._start()
+        atexit.register(self._stop)
+
+    def _start(self):
+        self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def _stop(self):
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+
+    def prepare(self, record):
+        # Unlike QueueHandler.prepare, leave message formatting to the
+        # listener thread; the copy keeps later handlers unaffected
+        return copy.copy(record)
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            # Forked (e.g. gunicorn --preload): threads do not survive fork
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def parse_mapping(value, cast=str):
+    """Parse ``"name=value,other=value"`` from an environment variable"""
+    mapping = {}
+    for item in (value or '').split(','):
+        name, sep, setting = item.partition('=')
+        if sep and name.strip():
+            mapping[name.strip()] = cast(setting.strip())
+    return mapping
+
+
+def build_logging_config(levels=None, sampling=None, format='text', queue_size=DEFAULT_QUEUE_SIZE,
+                         root_level='INFO'):
+    """
+    ``LOGGING`` dict routing every logger through one ``AsyncQueueHandler``.
+    ``levels`` maps logger names to levels, ``sampling`` logger names to
+    keep ratios (see ``SamplingFilter``).
+    """
+    loggers = {
+        name: {'level': level.upper() if isinstance(level, str) else level}
+        for name, level in (levels or {}).items()
+    }
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'filters': {
+            'sampling': {
+                '()': 'backend.log_pipeline.SamplingFilter',
+                'rates': sampling or {},
+            },
+            'request_id': {
+                '()': 'backend.instrumentation.RequestIdFilter',
+            },
+        },
+        'handlers': {
+            'queue': {
+                '()': 'backend.log_pipeline.AsyncQueueHandler',
+                'format': format,
+                'queue_size': queue_size,
+                'filters': ['sampling', 'request_id'],
+            },
+        },
+        'root': {
+            'handlers': ['queue'],
+            'level': root_level,
+        },
+        'loggers': loggers,
+    }
@@ -0,0 +1,322 @@
+"""
+Request metrics shared by all gunicorn workers.
+
+Each worker process appends its counters to its own memory-mapped file in
+``METRICS_DIR``; readers sum the files of every worker, so no locking is
+needed between processes. Files of exited workers are kept, which makes all
+counters cumulative for the lifetime of the directory, as Prometheus
+expects. ``ServerTimingMiddleware`` records one observation per API request.
+"""
+import glob
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_METRICS_DIR = '/tmp/lktool-metrics'
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+
+HEADER = struct.Struct('q')  # bytes in use
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+INITIAL_SIZE = 1 << 16
+
+
+def _bucket_label(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+def _key(name, **labels):
+    return json.dumps([name, sorted(labels.items())], separators=(',', ':'))
+
+
+class MmapValues:
+    """
+    Append-only ``key -> float`` store in a memory-mapped file, written by a
+    single process. Each entry is a length-prefixed key padded to 8 bytes
+    followed by a double; the header is updated only after an entry is
+    complete, so concurrent readers never see a partial one.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < INITIAL_SIZE:
+            self._file.truncate(INITIAL_SIZE)
+            size = INITIAL_SIZE
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._used = HEADER.unpack_from(self._map, 0)[0] or HEADER.size
+        self._positions = {key: pos for key, _, pos in _read_entries(self._map, self._used)}
+
+    def _grow(self, needed):
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        self._map.close()
+        self._file.truncate(size)
+        self._map = mmap.mmap(self._file.fileno(), size)
+
+    def _position(self, key):
+        pos = self._positions.get(key)
+        if pos is None:
+            encoded = key.encode()
+            padded = KEY_LENGTH.size + len(encoded)
+            padded += -padded % 8
+            end = self._used + padded + VALUE.size
+            if end > len(self._map):
+                self._grow(end)
+            KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+            self._map[self._used + KEY_LENGTH.size:self._used + KEY_LENGTH.size + len(encoded)] = encoded
+            pos = self._used + padded
+            VALUE.pack_into(self._map, pos, 0.0)
+            self._used = end
+            HEADER.pack_into(self._map, 0, self._used)
+            self._positions[key] = pos
+        return pos
+
+    def inc(self, key, amount=1.0):
+        pos = self._position(key)
+        VALUE.pack_into(self._map, pos, VALUE.unpack_from(self._map, pos)[0] + amount)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _read_entries(buffer, used):
+    pos = HEADER.size
+    while pos + KEY_LENGTH.size <= used:
+        length = KEY_LENGTH.unpack_from(buffer, pos)[0]
+        key_start = pos + KEY_LENGTH.size
+        key = bytes(buffer[key_start:key_start + length]).decode()
+        padded = KEY_LENGTH.size + length
+        padded += -padded % 8
+        value_pos = pos + padded
+        yield key, VALUE.unpack_from(buffer, value_pos)[0], value_pos
+        pos = value_pos + VALUE.size
+
+
+def read_file(path):
+    """All ``(key, value)`` pairs stored in one worker's file"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        return []
+    used = min(HEADER.unpack_from(data, 0)[0], len(data))
+    return [(key, value) for key, value, _ in _read_entries(data, used)]
+
+
+class MetricsRegistry:
+    """The current process's writer; reopened after a fork"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._values = None
+
+    def _store(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            os.makedirs(self.directory, exist_ok=True)
+            self._values = MmapValues(os.path.join(self.directory, f'metrics-{pid}.db'))
+            self._pid = pid
+        return self._values
+
+    def observe_request(self, endpoint, method, status, duration, db_time=0.0, db_queries=0):
+        labels = {'endpoint': endpoint, 'method': method}
+        bucket = next(bound for bound in LATENCY_BUCKETS if duration <= bound)
+        with self._lock:
+            values = self._store()
+            values.inc(_key('http_requests_total', status=str(status), **labels))
+            # Buckets are stored per bucket and made cumulative when read
+            values.inc(_key('http_request_duration_seconds_bucket', le=_bucket_label(bucket), **labels))
+            values.inc(_key('http_request_duration_seconds_sum', **labels), duration)
+            values.inc(_key('http_request_duration_seconds_count', **labels))
+            values.inc(_key('db_time_seconds_total', **labels), db_time)
+            values.inc(_key('db_queries_total', **labels), db_queries)
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry(getattr(settings, 'METRICS_DIR', DEFAULT_METRICS_DIR))
+    return _registry
+
+
+def record_request(request, response, metrics):
+    """Record a finished API request (called by ``ServerTimingMiddleware``)"""
+    match = getattr(request, 'resolver_match', None)
+    endpoint = match.route if match is not None else 'unmatched'
+    try:
+        get_registry().observe_request(
+            endpoint, request.method, response.status_code,
+            metrics.duration, metrics.db_time, metrics.db_queries,
+        )
+    except OSError as e:
+        # Metrics must never fail a request
+        logger.warning(f"Could not record request metrics: {str(e)}")
+
+
+# Reading
+
+def collect(directory=None):
+    """Sum every worker's values; returns ``({(name, labels): value}, worker_count)``"""
+    directory = directory or getattr(settings, 'METRICS_DIR', DEFAULT_METRICS_DIR)
+    totals = {}
+    paths = glob.glob(os.path.join(directory, 'metrics-*.db'))
+    for path in paths:
+        try:
+            entries = read_file(path)
+        except OSError:
+            continue
+        for key, value in entries:
+            name, labels = json.loads(key)
+            series = (name, tuple(tuple(label) for label in labels))
+            totals[series] = totals.get(series, 0.0) + value
+    return totals, len(paths)
+
+
+def _quantile(buckets, count, q):
+    """Estimate a quantile from non-cumulative ``{upper_bound: count}`` buckets"""
+    if not count:
+        return None
+    rank, seen, lower = q * count, 0.0, 0.0
+    for bound in LATENCY_BUCKETS:
+        in_bucket = buckets.get(bound, 0.0)
+        if in_bucket and seen + in_bucket >= rank:
+            if bound == float('inf'):
+                return lower
+            return lower + (bound - lower) * (rank - seen) / in_bucket
+        seen += in_bucket
+        lower = bound if bound != float('inf') else lower
+    return lower
+
+
+def snapshot(totals):
+    """Per-endpoint summary for the JSON metrics endpoint"""
+    endpoints = {}
+    bounds = {_bucket_label(bound): bound for bound in LATENCY_BUCKETS}
+    for (name, labels), value in totals.items():
+        labels = dict(labels)
+        entry = endpoints.setdefault((labels['endpoint'], labels['method']), {
+            'endpoint': labels['endpoint'],
+            'method': labels['method'],
+            'requests': 0,
+            'status': {},
+            'buckets': {},
+            'latency_sum': 0.0,
+            'db_time_seconds': 0.0,
+            'db_queries': 0,
+        })
+        if name == 'http_requests_total':
+            entry['requests'] += int(value)
+            entry['status'][labels['status']] = int(value)
+        elif name == 'http_request_duration_seconds_bucket':
+            entry['buckets'][bounds[labels['le']]] = value
+        elif name == 'http_request_duration_seconds_sum':
+            entry['latency_sum'] = value
+        elif name == 'db_time_seconds_total':
+            entry['db_time_seconds'] = round(value, 6)
+        elif name == 'db_queries_total':
+            entry['db_queries'] = int(value)
+
+    result = []
+    for entry in endpoints.values():
+        buckets, count = entry.pop('buckets'), entry['requests']
+        latency_sum = entry.pop('latency_sum')
+        entry['latency_ms'] = {
+            'avg': round(latency_sum / count * 1000, 2) if count else None,
+            **{
+                name: round(value * 1000, 2) if value is not None else None
+                for name, value in (
+                    ('p50', _quantile(buckets, count, 0.5)),
+                    ('p95', _quantile(buckets, count, 0.95)),
+                    ('p99', _quantile(buckets, count, 0.99)),
+                )
+            },
+        }
+        result.append(entry)
+    return sorted(result, key=lambda e: (e['endpoint'], e['method']))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _value(value):
+    """A sample value at full precision; counts are printed as integers"""
+    value = float(value)
+    if value.is_integer():
+        return str(int(value))
+    if value != value:
+        return 'NaN'
+    if value in (float('inf'), float('-inf')):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(value)
+
+
+def prometheus_text(totals, gauges=None):
+    """Render the totals in the Prometheus text exposition format"""
+    lines = [
+        '# HELP http_requests_total API requests by endpoint, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    by_name = {}
+    for (name, labels), value in sorted(totals.items()):
+        by_name.setdefault(name, []).append((labels, value))
+
+    for labels, value in by_name.get('http_requests_total', []):
+        lines.append(f'http_requests_total{_labels(labels)} {_value(value)}')
+
+    lines += [
+        '# HELP http_request_duration_seconds API request latency.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    # Make the per-bucket counts cumulative for each endpoint/method
+    histograms = {}
+    for labels, value in by_name.get('http_request_duration_seconds_bucket', []):
+        labels = dict(labels)
+        le = labels.pop('le')
+        histograms.setdefault(tuple(sorted(labels.items())), {})[le] = value
+    for series, buckets in sorted(histograms.items()):
+        cumulative = 0.0
+        for bound in LATENCY_BUCKETS:
+            label = _bucket_label(bound)
+            cumulative += buckets.get(label, 0.0)
+            lines.append(f'http_request_duration_seconds_bucket{_labels(series + (("le", label),))} {_value(cumulative)}')
+    for suffix in ('sum', 'count'):
+        for labels, value in by_name.get(f'http_request_duration_seconds_{suffix}', []):
+            lines.append(f'http_request_duration_seconds_{suffix}{_labels(labels)} {_value(value)}')
+
+    for name, help_text in (
+        ('db_time_seconds_total', 'Time spent in SQL queries.'),
+        ('db_queries_total', 'SQL queries executed.'),
+    ):
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter']
+        for labels, value in by_name.get(name, []):
+            lines.append(f'{name}{_labels(labels)} {_value(value)}')
+
+    for name, (help_text, samples) in (gauges or {}).items():
+        lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge']
+        for labels, value in samples:
+            lines.append(f'{name}{_labels(labels)} {_value(value)}')
+    return '\n'.join(lines) + '\n'
@@ -1,3 +1,17 @@
+import logging
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .instrumentation import end_request, instrument_connection, new_request_id, start_request
+from .metrics import record_request
+
+logger = logging.getLogger(__name__)
+request_logger = logging.getLogger('backend.requests')
+
+
 class CSRFDebugMiddleware:
     """
     Middleware that logs detailed information about CSRF verification.
@@ -11,22 +25,126 @@ class CSRFDebugMiddleware:
         response = self.get_response(request)
         
         # Only debug API endpoints
-        if request.path.startswith('/api/'):
+        if request.path.startswith('/api/') and logger.isEnabledFor(logging.DEBUG):
             # Check if CSRF was enforced
             csrf_enforced = not getattr(request, '_dont_enforce_csrf_checks', False)
             
             # Log detailed CSRF information for debugging
-            print(f"CSRF Debug - Path: {request.path}")
-            print(f"CSRF Debug - Method: {request.method}")
-            print(f"CSRF Debug - CSRF Enforced: {csrf_enforced}")
+            logger.debug(
+                "CSRF Debug",
+                extra={'path': request.path, 'method': request.method, 'csrf_enforced': csrf_enforced},
+            )
             
             # Check for JWT auth token
             if request.META.get('HTTP_AUTHORIZATION', '').startswith('Bearer '):
-                print("JWT token detected")
+                logger.debug("JWT token detected")
                 
                 # Check admin access 
                 if request.user and request.user.is_authenticated:
                     if request.user.is_staff or getattr(request.user, 'role', '') == 'admin':
-                        print(f"Admin JWT token detected: {request.user.email}")
+                        logger.debug("Admin JWT token detected: %s", request.user.email)
         
         return response
+
+
+class ServerTimingMiddleware:
+    """
+    Tags each request with an ID and reports where the time of API requests
+    went - wall time, SQL queries and time, cache hits/misses and email
+    enqueue time - in a ``Server-Timing`` header and one log line.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Connections opened from now on, and those already open here
+        connection_created.connect(instrument_connection, dispatch_uid='backend.instrumentation')
+        for connection in connections.all(initialized_only=True):
+            instrument_connection(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.start(request):
+            return self.tag(request, self.get_response(request))
+        metrics, token = start_request(request.request_id)
+        request.metrics = metrics
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish()
+            end_request(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        if not self.start(request):
+            return self.tag(request, await self.get_response(request))
+        # The context variable carries over to the sync_to_async threads
+        # the request's ORM calls run in
+        metrics, token = start_request(request.request_id)
+        request.metrics = metrics
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish()
+            end_request(token)
+        return self.report(request, response, metrics)
+
+    @staticmethod
+    def start(request):
+        """Assign the request ID; True for requests that are measured"""
+        request.request_id = new_request_id(request.META.get('HTTP_X_REQUEST_ID'))
+        return request.path.startswith('/api/')
+
+    @staticmethod
+    def tag(request, response):
+        response['X-Request-ID'] = request.request_id
+        return response
+
+    def report(self, request, response, metrics):
+        self.tag(request, response)
+        response['Server-Timing'] = metrics.server_timing()
+        record_request(request, response, metrics)
+        request_logger.info(
+            f"{request.method} {request.path} {response.status_code}",
+            extra={
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **metrics.as_log_fields(),
+            },
+        )
+        return response
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs in async mode. WhiteNoise 6 is sync-only, so
+    under ASGI Django would run every request through it in a thread that
+    waits for the async views below; this serves static files in a thread
+    and passes everything else straight on.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, **kwargs):
+        super().__init__(get_response, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -12,7 +12,11 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import logging
 from datetime import timedelta
+from django.utils.deprecation import MiddlewareMixin
+
+from backend.log_pipeline import build_logging_config, parse_mapping
 
 # Try to import optional packages, with fallbacks if not installed
 try:
@@ -86,30 +90,31 @@ INSTALLED_APPS = [
     "corsheaders",
 ]
 
+logger = logging.getLogger(__name__)
+
 # Create a custom middleware to debug CORS requests
-class CorsDebugMiddleware:
-    def __init__(self, get_response):
-        self.get_response = get_response
-
-    def __call__(self, request):
-        # Process the request
-        response = self.get_response(request)
-        
+class CorsDebugMiddleware(MiddlewareMixin):
+    def process_response(self, request, response):
         # Log CORS headers for debugging
-        if 'HTTP_ORIGIN' in request.META:
-            print(f"CORS Debug - Request from: {request.META['HTTP_ORIGIN']}")
-            print(f"CORS Debug - Response status: {response.status_code}")
-            print(f"CORS Debug - CORS headers: {response.has_header('Access-Control-Allow-Origin')}")
+        if 'HTTP_ORIGIN' in request.META and logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "CORS Debug",
+                extra={
+                    'origin': request.META['HTTP_ORIGIN'],
+                    'status': response.status_code,
+                    'cors_headers': response.has_header('Access-Control-Allow-Origin'),
+                },
+            )
             
         return response
 
 MIDDLEWARE = [
+    'backend.middleware.ServerTimingMiddleware',  # Request ID + Server-Timing, outermost to time everything
     "corsheaders.middleware.CorsMiddleware",
     'backend.settings.CorsDebugMiddleware',   # Add this for debugging
-    'django.middleware.cache.UpdateCacheMiddleware',
     "django.middleware.security.SecurityMiddleware",
     'django.middleware.gzip.GZipMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'backend.middleware.StaticFilesMiddleware',  # WhiteNoise, async-capable
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -117,7 +122,6 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'users.middleware.RoleBasedMiddleware',  # Add custom role middleware
-    'django.middleware.cache.FetchFromCacheMiddleware',
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -134,17 +138,86 @@ STATICFILES_DIRS = [
 # Optional but recommended: compressed manifest storage for cache‑busting
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
-# Add Django cache settings
+# Shared cache tier used by every gunicorn worker: Redis when REDIS_URL is
+# set, otherwise a file-based cache that all workers on this box can see
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'lktool',
+    }
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_DIR', '/tmp/lktool-cache'),
+        'KEY_PREFIX': 'lktool',
+    }
+
+# The default cache fronts the shared tier with a small per-process LRU
+# (see backend/cache_backends.py)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
-    }
+        'BACKEND': 'backend.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'LOCAL_TIMEOUT': 5,
+            'LOCAL_MAX_ENTRIES': 1000,
+            'GENERATION_CHECK_INTERVAL': 1.0,
+        },
+    },
+    'shared': SHARED_CACHE,
 }
 
-# Cache timeouts
-CACHE_MIDDLEWARE_SECONDS = 60 * 15  # 15 minutes
-CACHE_MIDDLEWARE_KEY_PREFIX = 'lktool'
+# Per-view response cache (see backend/view_cache.py) - entries are keyed
+# by user/role and invalidated by model signals, so no site-wide middleware
+VIEW_CACHE_TIMEOUT = 60 * 5  # 5 minutes
+
+# Profile analysis scoring (see admin_panel/scoring.py). Overrides of the
+# default indicator weights and risk thresholds, e.g.
+# PROFILE_SCORE_WEIGHTS="newly_created=-15,connections=10" and
+# PROFILE_RISK_THRESHOLDS="low=75,medium=45"; run `manage.py
+# rescore_analyses` after changing them
+PROFILE_SCORE_WEIGHTS = parse_mapping(os.environ.get('PROFILE_SCORE_WEIGHTS'), float)
+PROFILE_RISK_THRESHOLDS = parse_mapping(os.environ.get('PROFILE_RISK_THRESHOLDS'), int)
+
+# Similar-profile search (see admin_panel/similarity.py): seconds between
+# incremental refreshes of each worker's index, the table size from which
+# it is partitioned, and the partitions scanned per query
+SIMILARITY_REFRESH_INTERVAL = int(os.environ.get('SIMILARITY_REFRESH_INTERVAL', 60))
+SIMILARITY_PARTITION_MIN_ROWS = int(os.environ.get('SIMILARITY_PARTITION_MIN_ROWS', 100000))
+SIMILARITY_NPROBE = int(os.environ.get('SIMILARITY_NPROBE', 8))
+
+# Analyses of a LinkedIn profile that admins may reuse for a new submission
+# of the same profile (admin_panel.views.PriorAnalysisView), by age in days
+ANALYSIS_REUSE_MAX_AGE_DAYS = int(os.environ.get('ANALYSIS_REUSE_MAX_AGE_DAYS', 90))
+
+# Idempotency-Key replays (backend/idempotency.py): seconds a stored
+# response is replayed for repeats of its key, and seconds a request in
+# progress holds its key if its worker dies
+IDEMPOTENCY_KEY_TTL = int(os.environ.get('IDEMPOTENCY_KEY_TTL', 60 * 60 * 24))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.environ.get('IDEMPOTENCY_LOCK_TIMEOUT', 60))
+
+# Server-Sent Events (backend/events.py, backend/sse.py): the broker that
+# carries events between processes ('redis', 'postgres' or 'local'; by
+# default Redis when REDIS_URL is set, else the PostgreSQL database), the
+# seconds between keep-alives on idle streams, the events buffered for a
+# slow client before it is told to resync, and the lifetime of the signed
+# tickets streams are opened with
+EVENTS_BROKER = os.environ.get('EVENTS_BROKER', '')
+EVENTS_HEARTBEAT = int(os.environ.get('EVENTS_HEARTBEAT', 15))
+EVENTS_QUEUE_SIZE = int(os.environ.get('EVENTS_QUEUE_SIZE', 100))
+EVENTS_TICKET_TIMEOUT = int(os.environ.get('EVENTS_TICKET_TIMEOUT', 30))
+
+# Password hashing in async views (users/passwords.py): hashes computed in
+# parallel per worker process (hashlib releases the GIL, so up to one per
+# CPU helps) and how many more may wait before sign-ins get a 503
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 16))
+
+# Memory-mapped request metrics, one file per worker process, aggregated by
+# /api/admin/metrics/ (see backend/metrics.py)
+METRICS_DIR = os.environ.get('METRICS_DIR', '/tmp/lktool-metrics')
 
 # Add React build directory to templates
 TEMPLATES = [
@@ -165,16 +238,37 @@ TEMPLATES = [
 WSGI_APPLICATION = "backend.wsgi.application"
 
 
-# Database configuration with connection pooling
+# Database configuration. Under ASGI every request runs its ORM calls in a
+# thread context of its own, so persistent connections (CONN_MAX_AGE) are
+# never reused - they only linger until garbage-collected. On PostgreSQL
+# each worker process keeps a psycopg connection pool instead: a request
+# borrows a connection and returns it when Django closes it at the end of
+# the request, so there is no TLS handshake per request and at most
+# DB_POOL_MAX_SIZE sessions per process (times WEB_CONCURRENCY, within the
+# plan's connection limit). DB_POOL_TIMEOUT is how long a request waits for
+# a free connection. DB_POOL_MAX_SIZE=0 turns the pool off, e.g. behind
+# pgbouncer; DB_CONN_MAX_AGE then applies (only useful with sync WSGI
+# workers).
+DB_POOL_MIN_SIZE = int(os.environ.get('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 8))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 10))
+
 DATABASES = {
     'default': {
         **dj_database_url.config(default=os.environ.get("DATABASE_URL")),
-        'CONN_MAX_AGE': 600,  # Keep connections alive for 10 minutes
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
         'OPTIONS': {
             'connect_timeout': 5,  # Reduce connection timeout to 5 seconds
         }
     }
 }
+if DATABASES['default'].get('ENGINE') == 'django.db.backends.postgresql' and DB_POOL_MAX_SIZE > 0:
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # Pooled connections are never persistent
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': min(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE),
+        'max_size': DB_POOL_MAX_SIZE,
+        'timeout': DB_POOL_TIMEOUT,
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -228,6 +322,34 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'EXCEPTION_HANDLER': 'users.utils.custom_exception_handler',
+    # Rate limits of the anonymous auth and contact endpoints
+    # (backend/throttling.py): '<scope>' per client - IP address, or user
+    # when signed in - and '<scope>.email' per email address in the body.
+    # Override with e.g. THROTTLE_RATES=login=5/m,login.email=5/h
+    'DEFAULT_THROTTLE_RATES': {
+        'login': '30/m',
+        'login.email': '10/15m',
+        'register': '10/h',
+        'register.email': '3/h',
+        'password_reset': '10/h',
+        'password_reset.email': '3/h',
+        'verification_email': '10/h',
+        'verification_email.email': '3/h',
+        'contact_message': '10/h',
+        **parse_mapping(os.environ.get('THROTTLE_RATES')),
+    },
+    # Proxies appending to X-Forwarded-For in front of the app (Render's
+    # load balancer); the client IP is the address the outermost one saw
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 1)),
+}
+
+# Multiples of the per-client rate limits for signed-in users, by
+# subscription tier
+THROTTLE_TIER_MULTIPLIERS = {
+    'free': 1,
+    'basic': 2,
+    'premium': 5,
+    **parse_mapping(os.environ.get('THROTTLE_TIER_MULTIPLIERS'), float),
 }
 
 # Simple JWT settings optimized for performance
@@ -245,6 +367,10 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Seconds a regular user's principal is reused for the same access token
+# (jti) instead of re-reading the user row; 0 disables the cache
+JWT_PRINCIPAL_CACHE_TIMEOUT = int(os.environ.get('JWT_PRINCIPAL_CACHE_TIMEOUT', 60))
+
 # Fix CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # Keep this for development
 
@@ -275,9 +401,13 @@ CORS_ALLOW_HEADERS = [
     "x-csrftoken",
     "x-requested-with",
     "cache-control",  # Add this
-    "pragma"          # Add this
+    "pragma",         # Add this
+    "idempotency-key",
 ]
 
+# Lets the frontend tell replayed responses apart
+CORS_EXPOSE_HEADERS = ["idempotent-replayed"]
+
 # Let preflight responses be cached for 1 hour
 CORS_PREFLIGHT_MAX_AGE = 3600
 
@@ -317,48 +447,25 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL') or EMAIL_HOST_USER
 # Admin email for receiving notifications
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL') or DEFAULT_FROM_EMAIL
 
-# Show email settings in logs for debugging
-print(f"\n--- Email Configuration ---")
-print(f"EMAIL_BACKEND: {EMAIL_BACKEND}")
-print(f"EMAIL_HOST: {EMAIL_HOST}")
-print(f"EMAIL_PORT: {EMAIL_PORT}")
-print(f"EMAIL_USE_TLS: {EMAIL_USE_TLS}")
-print(f"EMAIL_HOST_USER: {EMAIL_HOST_USER}")
-print(f"DEFAULT_FROM_EMAIL: {DEFAULT_FROM_EMAIL}")
-print(f"ADMIN_EMAIL: {ADMIN_EMAIL}")
-print("-------------------------\n")
-
 # Frontend URL for email verification links
 FRONTEND_URL = os.environ.get('FRONTEND_URL')
 
 # Email background processing setting
 SEND_VERIFICATION_EMAIL = True 
 
+# Email outbox - messages are queued in the database and delivered by
+# `python manage.py send_queued_emails` with exponential backoff
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.environ.get('EMAIL_OUTBOX_MAX_ATTEMPTS', 6))
+EMAIL_OUTBOX_BACKOFF_SECONDS = int(os.environ.get('EMAIL_OUTBOX_BACKOFF_SECONDS', 30))
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = int(os.environ.get('EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', 3600))
+# Authenticated SMTP connections kept open by each worker process
+EMAIL_SMTP_POOL_SIZE = int(os.environ.get('EMAIL_SMTP_POOL_SIZE', 2))
+EMAIL_SMTP_IDLE_TIMEOUT = int(os.environ.get('EMAIL_SMTP_IDLE_TIMEOUT', 60))
+
 # Admin email for receiving contact form submissions
 ADMIN_EMAIL = os.environ.get('ADMIN_EMAIL', DEFAULT_FROM_EMAIL)
 
-# Add email debugging in development
-if DEBUG:
-    print("\n--- Email Configuration ---")
-    print(f"EMAIL_BACKEND: {EMAIL_BACKEND}")
-    print(f"EMAIL_HOST: {EMAIL_HOST}")
-    print(f"EMAIL_PORT: {EMAIL_PORT}")
-    print(f"EMAIL_USE_TLS: {EMAIL_USE_TLS}")
-    print(f"EMAIL_HOST_USER: {EMAIL_HOST_USER}")
-    print(f"EMAIL_HOST_PASSWORD: {'*' * 8 if EMAIL_HOST_PASSWORD else 'Not set'}")
-    print(f"DEFAULT_FROM_EMAIL: {DEFAULT_FROM_EMAIL}")
-    print(f"FRONTEND_URL: {FRONTEND_URL}")
-    print("-------------------------\n")
-
-# Enhanced email logging
-if not DEBUG and os.environ.get('EMAIL_HOST_USER') and os.environ.get('EMAIL_HOST_PASSWORD'):
-    print("\n--- Production Email Configuration ---")
-    print(f"EMAIL_HOST: {EMAIL_HOST}")
-    print(f"EMAIL_PORT: {EMAIL_PORT}")
-    print(f"EMAIL_HOST_USER: {EMAIL_HOST_USER}")
-    print(f"DEFAULT_FROM_EMAIL: {DEFAULT_FROM_EMAIL}")
-    print(f"ADMIN_EMAIL: {ADMIN_EMAIL}")
-    print("-----------------------------------\n")
+# The email configuration is logged at startup by ContactConfig.ready()
 
 # Production security settings
 SECURE_SSL_REDIRECT = True
@@ -398,29 +505,28 @@ ADMIN_PASSWORD = os.environ.get('ADMIN_PASSWORD')
 # Add Google OAuth Client ID
 GOOGLE_OAUTH_CLIENT_ID = os.environ.get('GOOGLE_OAUTH_CLIENT_ID')
 
+# Google's ID token signing certificates (see users/google_auth.py); the URL
+# can point at a local stand-in endpoint for testing
+GOOGLE_CERTS_URL = os.environ.get('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')
+GOOGLE_CERTS_REFRESH_MARGIN = int(os.environ.get('GOOGLE_CERTS_REFRESH_MARGIN', 300))
+
 # Make DEBUG logging visible
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-        },
-    },
-    'root': {
-        'handlers': ['console'],
-        'level': 'INFO',
-    },
-    'loggers': {
-        'django': {
-            'handlers': ['console'],
-            'level': 'INFO',
-            'propagate': True,
-        },
-        'unified_auth_api': {  # Add this logger for our app
-            'handlers': ['console'],
-            'level': 'DEBUG',
-            'propagate': True,
-        },
-    },
+# Logging goes through a queue so formatting and I/O happen off the request
+# thread (see backend/log_pipeline.py). Levels and sampling are per logger,
+# e.g. LOG_LEVELS="contact=DEBUG,users.views=WARNING" and
+# LOG_SAMPLING="contact.views=0.1" (keep 10% of DEBUG/INFO records)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # 'text' or 'json'
+LOG_LEVELS = {
+    'django': 'INFO',
+    'unified_auth_api': 'DEBUG',
+    **parse_mapping(os.environ.get('LOG_LEVELS')),
 }
+LOG_SAMPLING = parse_mapping(os.environ.get('LOG_SAMPLING'), float)
+
+LOGGING = build_logging_config(
+    levels=LOG_LEVELS,
+    sampling=LOG_SAMPLING,
+    format=LOG_FORMAT,
+    queue_size=int(os.environ.get('LOG_QUEUE_SIZE', 10000)),
+    root_level=os.environ.get('LOG_LEVEL', 'INFO'),
+)
@@ -0,0 +1,126 @@
+"""
+Server-Sent Events stream at ``EVENTS_PATH``, served by the ASGI
+application (backend/asgi.py) outside Django's request cycle: an open
+stream is one idle coroutine holding neither a thread nor a database
+connection.
+
+``EventSource`` cannot send an Authorization header, so clients first POST
+to the ticket endpoint (``contact.views.EventTicketView``) with their JWT
+and connect with ``?ticket=``. A ticket is the signed list of the user's
+channels, valid for ``EVENTS_TICKET_TIMEOUT`` seconds; checking it needs
+no cache or database, whichever process serves the stream.
+
+Events are not replayed: after (re)connecting, clients catch up through
+the regular endpoints (e.g. the ``since=`` sync of the user submissions).
+"""
+import asyncio
+import json
+import logging
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core import signing
+from django.core.serializers.json import DjangoJSONEncoder
+
+from . import events
+
+logger = logging.getLogger(__name__)
+
+EVENTS_PATH = '/api/events/'
+TICKET_SALT = 'backend.sse.ticket'
+
+
+def issue_ticket(user):
+    """A short-lived ticket for the event channels of ``user``"""
+    channels = [events.user_channel(user.email)] if user.id else []
+    if user.is_staff or getattr(user, 'role', None) == 'admin':
+        channels.append(events.ADMIN_CHANNEL)
+    return signing.dumps(channels, salt=TICKET_SALT)
+
+
+def redeem_ticket(ticket):
+    """The channels of ``ticket``, or None if it is forged or expired"""
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=getattr(settings, 'EVENTS_TICKET_TIMEOUT', 30))
+    except signing.BadSignature:
+        return None
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=DjangoJSONEncoder)}\n\n".encode()
+
+
+def cors_headers(scope):
+    """CORS headers for the stream, following the django-cors-headers settings"""
+    origin = dict(scope['headers']).get(b'origin')
+    if origin is None:
+        return []
+    allowed = getattr(settings, 'CORS_ALLOW_ALL_ORIGINS', False) or \
+        origin.decode('latin-1') in getattr(settings, 'CORS_ALLOWED_ORIGINS', ())
+    return [(b'access-control-allow-origin', origin), (b'vary', b'origin')] if allowed else []
+
+
+async def reject(send, status, error, headers):
+    await send({
+        'type': 'http.response.start', 'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps({'error': error}).encode()})
+
+
+async def wait_for_disconnect(receive):
+    # The request body (empty for a GET) arrives first
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def event_stream(scope, receive, send):
+    """ASGI application of the stream"""
+    headers = cors_headers(scope)
+    if scope['method'] == 'OPTIONS':
+        await send({'type': 'http.response.start', 'status': 204, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    if scope['method'] != 'GET':
+        await reject(send, 405, 'Method not allowed', headers)
+        return
+
+    ticket = parse_qs(scope.get('query_string', b'').decode('latin-1')).get('ticket', [''])[0]
+    channels = redeem_ticket(ticket) if ticket else None
+    if not channels:
+        await reject(send, 401, 'A valid event ticket is required', headers)
+        return
+
+    heartbeat = getattr(settings, 'EVENTS_HEARTBEAT', 15)
+    subscription = events.hub.subscribe(
+        channels, asyncio.get_running_loop(), getattr(settings, 'EVENTS_QUEUE_SIZE', 100)
+    )
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start', 'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Stop proxies (nginx and the like) from buffering the stream
+                (b'x-accel-buffering', b'no'),
+                *headers,
+            ],
+        })
+        await send({
+            'type': 'http.response.body', 'more_body': True,
+            'body': b'retry: 5000\n' + format_event('ready', {'channels': len(channels)}),
+        })
+        while True:
+            next_message = asyncio.ensure_future(subscription.get(heartbeat))
+            done, _ = await asyncio.wait({next_message, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if disconnected in done:
+                next_message.cancel()
+                break
+            message = next_message.result()
+            # A comment line on idle streams keeps proxies from timing out
+            body = b': keep-alive\n\n' if message is None else format_event(message['event'], message['data'])
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        events.hub.unsubscribe(subscription)
+        disconnected.cancel()
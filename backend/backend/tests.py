@@ -0,0 +1,189 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from backend.idempotency import idempotent
+from backend.metrics import prometheus_text
+from backend.throttling import ClientRateThrottle, SlidingWindowCounter
+from backend.view_cache import USER_SUBMISSIONS_TAG, _tag_versions
+from contact.models import ContactSubmission, IdempotencyKey, RateLimitCounter
+from users.models import UserSubscription
+
+# Start of a 60-second window
+T = 600000 * 60
+
+
+class SlidingWindowCounterTests(TestCase):
+    def test_limit_and_reject_without_writing(self):
+        counter = SlidingWindowCounter(3, 60)
+        for _ in range(3):
+            self.assertEqual(counter.hit('k', now=T + 1), (True, 0))
+        allowed, wait = counter.hit('k', now=T + 1)
+        self.assertFalse(allowed)
+        self.assertEqual(RateLimitCounter.objects.get(key='k').count, 3)
+        # Other keys are counted separately
+        self.assertTrue(counter.hit('other', now=T + 1)[0])
+
+    def test_previous_window_decays(self):
+        counter = SlidingWindowCounter(4, 60)
+        for _ in range(4):
+            counter.hit('k', now=T + 59)
+        # Three quarters into the next window, 4 * 0.25 = 1 still counts
+        self.assertFalse(counter.hit('k', now=T + 60)[0])
+        for _ in range(3):
+            self.assertTrue(counter.hit('k', now=T + 105)[0])
+        self.assertFalse(counter.hit('k', now=T + 105)[0])
+
+    def test_wait_is_exact(self):
+        """Requests are rejected until ``wait`` has passed, and allowed right after"""
+        counter = SlidingWindowCounter(3, 60)
+        for _ in range(3):
+            counter.hit('k', now=T + 10)
+
+        # Full window: one slot opens when 3 * (1 - t/60) <= 2 in the next window
+        allowed, wait = counter.hit('k', now=T + 10)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 70)
+        self.assertFalse(counter.hit('k', now=T + 10 + wait - 1)[0])
+        self.assertTrue(counter.hit('k', now=T + 10 + wait)[0])
+
+        # Next window holds 1, previous 3: 3 * (1 - t/60) <= 1 at t = 40
+        allowed, wait = counter.hit('k', now=T + 81)
+        self.assertFalse(allowed)
+        self.assertAlmostEqual(wait, 19)
+        self.assertFalse(counter.hit('k', now=T + 81 + wait - 1)[0])
+        self.assertTrue(counter.hit('k', now=T + 81 + wait)[0])
+
+    def test_wait_with_empty_previous_window(self):
+        counter = SlidingWindowCounter(2, 60)
+        counter.hit('k', now=T)
+        counter.hit('k', now=T)
+        allowed, wait = counter.hit('k', now=T + 30)
+        self.assertFalse(allowed)
+        # 2 * (1 - t/60) <= 1 at t = 30 in the next window
+        self.assertAlmostEqual(wait, 60)
+
+
+class TierScalingTests(TestCase):
+    factory = APIRequestFactory()
+
+    def scaled(self, user=None):
+        request = self.factory.get('/')
+        if user is not None:
+            force_authenticate(request, user=user)
+        request = Request(request)
+        if user is not None:
+            request.user = user
+        return ClientRateThrottle().scale(request, 10)
+
+    def user(self, email, tier=None):
+        user = get_user_model().objects.create_user(email=email, password='x')
+        if tier is not None:
+            UserSubscription.objects.create(user=user, tier=tier)
+        return user
+
+    def test_limits_scale_with_tier(self):
+        self.assertEqual(self.scaled(), 10)
+        self.assertEqual(self.scaled(self.user('free@example.com')), 10)
+        self.assertEqual(self.scaled(self.user('free2@example.com', 'free')), 10)
+        self.assertEqual(self.scaled(self.user('basic@example.com', 'basic')), 20)
+        self.assertEqual(self.scaled(self.user('premium@example.com', 'premium')), 50)
+
+    def test_multiplier_keeps_at_least_one_request(self):
+        with self.settings(THROTTLE_TIER_MULTIPLIERS={'free': 0.01}):
+            self.assertEqual(self.scaled(self.user('free@example.com')), 1)
+
+
+class CountingView(APIView):
+    """Counts its runs, answering 503 for ``fail`` and calling ``during`` while it runs"""
+    runs = 0
+    during = None
+
+    @idempotent
+    def post(self, request):
+        CountingView.runs += 1
+        if CountingView.during:
+            CountingView.during()
+        if request.data.get('fail'):
+            return Response({'error': 'unavailable'}, status=503)
+        return Response({'run': CountingView.runs}, status=201)
+
+
+class IdempotencyTests(TestCase):
+    factory = APIRequestFactory()
+
+    def setUp(self):
+        CountingView.runs = 0
+        CountingView.during = None
+        self.user = get_user_model().objects.create_user(email='user@example.com', password='x')
+
+    def post(self, data, user=None, key='key-1'):
+        request = self.factory.post('/', data, format='json', HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=user or self.user)
+        return CountingView.as_view()(request)
+
+    def test_repeat_is_replayed(self):
+        first = self.post({'a': 1})
+        second = self.post({'a': 1})
+        self.assertEqual((first.status_code, first.data), (201, {'run': 1}))
+        self.assertEqual((second.status_code, second.data), (201, {'run': 1}))
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(CountingView.runs, 1)
+
+    def test_keys_are_per_user(self):
+        self.post({'a': 1})
+        other = get_user_model().objects.create_user(email='other@example.com', password='x')
+        self.assertEqual(self.post({'a': 1}, user=other).data, {'run': 2})
+
+    def test_same_key_for_a_different_request(self):
+        self.post({'a': 1})
+        self.assertEqual(self.post({'a': 2}).status_code, 422)
+        self.assertEqual(CountingView.runs, 1)
+
+    def test_repeat_while_in_progress(self):
+        repeats = []
+        CountingView.during = lambda: repeats.append(self.post({'a': 1}))
+        first = self.post({'a': 1})
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(repeats[0].status_code, 409)
+        self.assertEqual(repeats[0]['Retry-After'], '1')
+        self.assertEqual(CountingView.runs, 1)
+
+    def test_server_errors_are_not_stored(self):
+        self.assertEqual(self.post({'fail': True}).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        # The retry runs the request again
+        self.assertEqual(self.post({'fail': True}).status_code, 503)
+        self.assertEqual(CountingView.runs, 2)
+
+    def test_expired_key_is_claimed_again(self):
+        self.post({'a': 1})
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+        self.assertEqual(self.post({'a': 2}).data, {'run': 2})
+
+
+class TagInvalidationTests(TestCase):
+    def test_tags_are_invalidated_on_commit(self):
+        tag = USER_SUBMISSIONS_TAG.format(email='user@example.com')
+        before = _tag_versions([tag])
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ContactSubmission.objects.create(email='User@Example.com')
+            # A read before the commit still sees the old version
+            self.assertEqual(_tag_versions([tag]), before)
+        self.assertTrue(callbacks)
+        self.assertNotEqual(_tag_versions([tag]), before)
+
+
+class PrometheusTextTests(TestCase):
+    def test_values_keep_full_precision(self):
+        text = prometheus_text({
+            ('http_requests_total', (('method', 'GET'),)): 1234567.0,
+            ('db_time_seconds_total', ()): 12345.678901,
+        }, {'workers': ('Live workers.', [((), float('inf'))])})
+        self.assertIn('http_requests_total{method="GET"} 1234567\n', text)
+        self.assertIn('db_time_seconds_total 12345.678901\n', text)
+        self.assertIn('workers +Inf\n', text)
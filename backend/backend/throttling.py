@@ -0,0 +1,200 @@
+"""
+Rate limits of the anonymous auth and contact endpoints.
+
+Each login attempt costs a PBKDF2 hash, and sign-ups, password resets and
+contact messages each queue an email. The DRF throttles below run in
+``APIView.initial`` and reject bursts before the handler hashes anything
+or touches the database.
+
+Limits are sliding windows counted in ``RateLimitCounter`` rows, so all
+worker processes and instances see the same counts. Each key has one
+counter per fixed window. A request passes when the current window's
+count, plus the previous window's count weighted by how much of it still
+overlaps the sliding window, stays within the limit. Like the submission
+quota (contact/quota.py), a request takes its slot with a single
+conditional ``UPDATE ... SET count = count + 1 WHERE count < room``, so
+concurrent requests can never exceed the limit. That costs one SELECT,
+plus that UPDATE (or the first INSERT of the window) when the request
+passes; rejected requests write nothing. Expired rows are deleted by the
+``purge_expired`` command.
+
+Views set a ``throttle_scope``. Rates come from ``DEFAULT_THROTTLE_RATES``
+as ``'<requests>/<period>'``, where the period is s, m, h or d with an
+optional count, e.g. ``'10/15m'``.
+
+* ``ClientRateThrottle`` applies ``<scope>`` per client: the IP address,
+  or the user when signed in. A user's limit is multiplied by their
+  subscription tier's ``THROTTLE_TIER_MULTIPLIERS`` entry. Admins are
+  never limited.
+* ``EmailRateThrottle`` applies ``<scope>.email`` per email address in
+  the request body, so one account cannot be targeted from many addresses.
+"""
+import hashlib
+import logging
+import math
+import re
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])[a-z]*$')
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """``(requests, window seconds)`` of a rate like ``'10/15m'``; None means no limit"""
+    if rate is None:
+        return None
+    match = RATE_RE.match(rate.replace(' ', '').lower())
+    if not match:
+        raise ImproperlyConfigured(f"Invalid throttle rate: {rate!r}")
+    requests, count, unit = match.groups()
+    return int(requests), int(count or 1) * PERIODS[unit]
+
+
+class SlidingWindowCounter:
+    """Sliding-window request counts of ``limit`` per ``window`` seconds"""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+
+    def hit(self, key, now=None):
+        """Count a request for ``key``; returns ``(allowed, seconds to wait)``"""
+        from contact.models import RateLimitCounter
+
+        index, offset = divmod(time.time() if now is None else now, self.window)
+        index = int(index)
+        counts = dict(
+            RateLimitCounter.objects.filter(key=key, window__in=[index - 1, index])
+            .values_list('window', 'count')
+        )
+        previous, current = counts.get(index - 1, 0), counts.get(index, 0)
+        # Requests this window may hold, as the previous window's weight decays
+        room = math.floor(self.limit - previous * (self.window - offset) / self.window)
+
+        # Over the limit already: reject without writing anything
+        if current >= room:
+            return False, self.wait(previous, current, offset)
+
+        if index not in counts:
+            # A counter is read as the previous window's during the next one
+            expires_at = datetime.fromtimestamp((index + 2) * self.window, tz=dt_timezone.utc)
+            try:
+                with transaction.atomic():
+                    RateLimitCounter.objects.create(key=key, window=index, count=1, expires_at=expires_at)
+                return True, 0
+            except IntegrityError:
+                # A concurrent request created it first
+                pass
+
+        # Concurrent requests may have taken the last slots meanwhile
+        counters = RateLimitCounter.objects.filter(key=key, window=index, count__lt=room)
+        if counters.update(count=F('count') + 1) == 1:
+            return True, 0
+        return False, self.wait(previous, room, offset)
+
+    def wait(self, previous, current, offset):
+        """Seconds until the weighted count leaves room for one more request"""
+        room = self.limit - 1
+        if current <= room and previous:
+            # Later in this window, as the previous window's weight decays
+            return max((1 - (room - current) / previous) * self.window - offset, 0)
+        # In the next window, as this one's weight decays
+        decay = max(1 - room / current, 0) if current else 0
+        return self.window - offset + decay * self.window
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Limits the requests of each ``get_key`` value to the rate named by ``rate_name``"""
+
+    def rate_name(self, scope):
+        raise NotImplementedError
+
+    def get_key(self, request):
+        """What to count requests by, or None not to limit this request"""
+        raise NotImplementedError
+
+    def scale(self, request, limit):
+        return limit
+
+    def allow_request(self, request, view):
+        self.delay = None
+        scope = getattr(view, 'throttle_scope', None)
+        if scope is None:
+            return True
+        name = self.rate_name(scope)
+        try:
+            rate = parse_rate(api_settings.DEFAULT_THROTTLE_RATES[name])
+        except KeyError:
+            raise ImproperlyConfigured(f"No throttle rate set for {name!r}")
+        key = self.get_key(request) if rate is not None else None
+        if key is None:
+            return True
+
+        limit, window = rate
+        counter = SlidingWindowCounter(self.scale(request, limit), window)
+        # Hashed: keys stay short and free of user input
+        digest = hashlib.sha256(key.encode()).hexdigest()[:24]
+        allowed, self.delay = counter.hit(f'{name}:{digest}')
+        if not allowed:
+            logger.warning(f"Throttled {name} request from {self.get_ident(request)}")
+        return allowed
+
+    def wait(self):
+        return self.delay
+
+
+class ClientRateThrottle(SlidingWindowThrottle):
+    """``<scope>`` per user (scaled by subscription tier) or, when signed out, per IP address"""
+
+    def rate_name(self, scope):
+        return scope
+
+    def get_key(self, request):
+        user = request.user
+        if not user.is_authenticated:
+            return f'ip:{self.get_ident(request)}'
+        if user.is_staff or getattr(user, 'role', None) == 'admin':
+            return None
+        return f'user:{user.pk}'
+
+    def scale(self, request, limit):
+        if not request.user.is_authenticated:
+            return limit
+        from contact.quota import get_user_tier
+
+        multipliers = getattr(settings, 'THROTTLE_TIER_MULTIPLIERS', {})
+        return max(int(limit * multipliers.get(get_user_tier(request.user), 1)), 1)
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """``<scope>.email`` per email address in the request body"""
+
+    def rate_name(self, scope):
+        return f'{scope}.email'
+
+    def get_key(self, request):
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return f'email:{email.strip().lower()}'
+
+
+def lifted_rates(rate='1000000/m'):
+    """
+    ``REST_FRAMEWORK`` with every throttle rate raised out of reach, for
+    ``override_settings`` in benchmarks and load tests: the limiter still
+    runs (and its cost is measured) but never rejects.
+    """
+    rates = {name: rate for name in settings.REST_FRAMEWORK.get('DEFAULT_THROTTLE_RATES', {})}
+    return {**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}
@@ -8,6 +8,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 from users.views import GoogleAuthView  # Import the view directly
 from contact.admin_views import AdminSubmissionsView, AdminSubmissionDetailView, AdminProcessedSubmissionsView
+from contact.views import EventTicketView
 
 urlpatterns = [
     # Django admin site
@@ -24,6 +25,10 @@ urlpatterns = [
     path('api/admin/processed/', AdminProcessedSubmissionsView.as_view(), name='admin_processed_submissions'),
     path('api/admin/processed/<int:submission_id>/', AdminProcessedSubmissionsView.as_view(), name='admin_delete_submission'),
     
+    # Server-Sent Events: tickets here, the stream itself is served by the
+    # ASGI application (backend/asgi.py, backend/sse.py)
+    path('api/events/ticket/', EventTicketView.as_view(), name='event_ticket'),
+    
     # IMPORTANT: Add legacy auth routes for compatibility with frontend
     path('auth/', include('users.urls')),  # This will handle /auth/signup/ as well
     
@@ -0,0 +1,115 @@
+"""
+Per-view response caching for authenticated API endpoints.
+
+Unlike Django's site-wide cache middleware, cache keys include the caller's
+identity (user id or role) and the query string, and entries are grouped
+under *tags* that model signal receivers bump to invalidate them.
+"""
+import functools
+import hashlib
+import logging
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60 * 5
+TAG_PREFIX = 'view-tag:'
+
+# Tag templates shared by the cached views and the invalidation receivers
+DASHBOARD_STATS_TAG = 'dashboard_stats'
+SUBSCRIPTION_TAG = 'subscription:{user_id}'
+USER_SUBMISSIONS_TAG = 'user_submissions:{email}'
+
+
+def _tag_versions(tags):
+    """Current version of each tag, creating missing ones"""
+    keys = [TAG_PREFIX + tag for tag in tags]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            # A unique starting value, so entries cached under an evicted
+            # tag version can never be served again
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [str(versions[key]) for key in keys]
+
+
+def invalidate_tags(*tags):
+    """Invalidate every cached response stored under any of ``tags``"""
+    # Deleting (rather than overwriting) the versions makes the two-tier
+    # cache broadcast the change to every worker; the next read re-creates
+    # each tag with a fresh unique version
+    cache.delete_many([TAG_PREFIX + tag for tag in tags])
+
+
+def invalidate_tags_on_commit(*tags):
+    """
+    ``invalidate_tags`` once the current transaction commits (right away
+    outside one): a read between an earlier invalidation and the commit
+    would cache the old rows under the new version
+    """
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def _scope_value(request, scope):
+    user = request.user
+    if scope == 'role':
+        return 'admin' if user.is_staff or getattr(user, 'role', None) == 'admin' else 'user'
+    return f'user-{user.id}'
+
+
+def _build_key(view, request, scope, tags):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    parts = [
+        view.__class__.__name__,
+        _scope_value(request, scope),
+        query,
+        *_tag_versions(tags),
+    ]
+    digest = hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return f"view:{view.__class__.__name__}:{digest}"
+
+
+def cache_response(timeout=None, scope='user', tags=()):
+    """
+    Cache successful GET responses of an APIView method.
+
+    ``scope`` is ``'user'`` (one entry per user) or ``'role'`` (shared by
+    all admins / all regular users). ``tags`` are format strings filled in
+    with ``user_id``, ``email`` and the URL kwargs; bumping a tag with
+    ``invalidate_tags`` drops every response cached under it.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method != 'GET' or not request.user.is_authenticated:
+                return method(view, request, *args, **kwargs)
+
+            context = {
+                'user_id': request.user.id,
+                'email': (request.user.email or '').strip().lower(),
+                **kwargs,
+            }
+            key = _build_key(view, request, scope, [tag.format(**context) for tag in tags])
+
+            cached = cache.get(key)
+            if cached is not None:
+                status_code, data = cached
+                response = Response(data, status=status_code)
+                response['X-Cache'] = 'HIT'
+                return response
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, (response.status_code, response.data),
+                          timeout or getattr(settings, 'VIEW_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
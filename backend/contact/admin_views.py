@@ -2,13 +2,39 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAdminUser
-from django.core.paginator import Paginator
 from django.utils import timezone
 from .models import ContactSubmission
 from .serializers import ContactSubmissionSerializer, AdminAnalysisSerializer
 from users.authentication import AdminJWTAuthentication
+from backend.idempotency import idempotent
 from .email_service import send_notification_email
-import traceback
+from .pagination import KeysetPaginator, InvalidCursor
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Columns returned by the processed submissions list
+PROCESSED_SUBMISSION_FIELDS = (
+    'id', 'linkedin_url', 'message', 'email', 'created_at',
+    'name', 'subject', 'message_type', 'user_id', 'admin_reply',
+    'admin_reply_date', 'is_processed',
+)
+
+
+def _page_payload(items, page_obj, paginator, request, page):
+    """Build the list response shared by the admin submission list views"""
+    payload = {
+        'submissions': items,
+        'next_cursor': page_obj.next_cursor,
+        'has_more': page_obj.has_more,
+        'current_page': page,
+    }
+    if page_obj.total_count is not None:
+        page_size = paginator.get_page_size(request)
+        payload['total_count'] = page_obj.total_count
+        payload['total_pages'] = max(1, (page_obj.total_count + page_size - 1) // page_size)
+    return payload
+
 
 class AdminSubmissionsView(APIView):
     """
@@ -19,16 +45,15 @@ class AdminSubmissionsView(APIView):
     
     def get(self, request):
         # Debug info
-        print(f"AdminSubmissionsView - user: {request.user}, is_staff: {request.user.is_staff}, role: {getattr(request.user, 'role', 'unknown')}")
+        logger.debug("AdminSubmissionsView - user: %s, is_staff: %s, role: %s", request.user, request.user.is_staff, getattr(request.user, 'role', 'unknown'))
         
         try:
             # Get filter parameters
             status_filter = request.query_params.get('status')
             page = int(request.query_params.get('page', 1))
-            page_size = int(request.query_params.get('page_size', 10))
             
-            # Build query - use proper ordering to ensure latest submissions appear first
-            submissions = ContactSubmission.objects.all().order_by('-created_at')
+            # Build query - newest submissions first, keyset-paginated on (created_at, id)
+            submissions = ContactSubmission.objects.select_related('user')
             
             # Apply filters
             if status_filter == 'pending':
@@ -36,20 +61,15 @@ class AdminSubmissionsView(APIView):
             elif status_filter == 'processed':
                 submissions = submissions.filter(is_processed=True)
                 
-            # Paginate results
-            paginator = Paginator(submissions, page_size)
-            page_obj = paginator.get_page(page)
+            # Paginate results in SQL
+            paginator = KeysetPaginator('created_at')
+            page_obj = paginator.paginate(submissions, request)
             
             # Serialize data
-            serializer = ContactSubmissionSerializer(page_obj, many=True)
+            serializer = ContactSubmissionSerializer(page_obj.items, many=True)
             
             # Add cache busting headers to response
-            response = Response({
-                'submissions': serializer.data,
-                'total_count': paginator.count,
-                'total_pages': paginator.num_pages,
-                'current_page': page
-            })
+            response = Response(_page_payload(serializer.data, page_obj, paginator, request, page))
             
             # Add cache control headers to prevent caching
             response["Cache-Control"] = "no-cache, no-store, must-revalidate, private"
@@ -57,9 +77,10 @@ class AdminSubmissionsView(APIView):
             response["Expires"] = "0"
             
             return response
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Error in AdminSubmissionsView.get: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminSubmissionsView.get: {str(e)}")
             return Response({
                 'error': 'An error occurred while fetching submissions',
                 'detail': str(e)
@@ -73,7 +94,7 @@ class AdminSubmissionDetailView(APIView):
     authentication_classes = [AdminJWTAuthentication]
     
     def get(self, request, submission_id):
-        print(f"AdminSubmissionDetailView - user: {request.user}, is_staff: {request.user.is_staff}")
+        logger.debug("AdminSubmissionDetailView - user: %s, is_staff: %s", request.user, request.user.is_staff)
         
         try:
             submission = ContactSubmission.objects.get(id=submission_id)
@@ -88,15 +109,14 @@ class AdminSubmissionDetailView(APIView):
                 form_data = submission.form_data
                 data['form_data'] = form_data if form_data else {}
             except Exception as e:
-                print(f"Warning: Could not access form_data: {e}")
+                logger.warning(f"Could not access form_data: {e}")
                 data['form_data'] = {}
             
             return Response(data)
         except ContactSubmission.DoesNotExist:
             return Response({"error": "Submission not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"Error in AdminSubmissionDetailView: {e}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminSubmissionDetailView: {e}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class AdminReplyView(APIView):
@@ -106,23 +126,24 @@ class AdminReplyView(APIView):
     permission_classes = [IsAdminUser]
     authentication_classes = [AdminJWTAuthentication]
     
+    @idempotent
     def post(self, request, submission_id):
         try:
             submission = ContactSubmission.objects.get(id=submission_id)
             
             # Debug the request data
-            print(f"AdminReplyView - Processing reply for submission {submission_id}")
-            print(f"Request data: {request.data}")
+            logger.debug("AdminReplyView - Processing reply for submission %s", submission_id)
+            logger.debug("Request data: %s", request.data)
             
             # Get data from request
             reply_text = request.data.get('reply')
             form_data = request.data.get('form_data')
             
             if form_data:
-                print(f"Form data received: {type(form_data)}")
-                print(f"Form data sample: {list(form_data.items())[:5]}")
+                logger.debug("Form data received: %s", type(form_data))
+                logger.debug("Form data sample: %s", list(form_data.items())[:5])
             else:
-                print("No form data received in request")
+                logger.debug("No form data received in request")
             
             # Update submission with admin reply
             submission.admin_reply = reply_text
@@ -132,10 +153,9 @@ class AdminReplyView(APIView):
                 try:
                     # Store form_data as a JSON field - use proper data structure
                     submission.form_data = form_data
-                    print(f"Form data saved to submission {submission_id}")
+                    logger.debug("Form data saved to submission %s", submission_id)
                 except Exception as e:
-                    print(f"Warning: Could not save form_data: {e}")
-                    print(traceback.format_exc())
+                    logger.warning(f"Could not save form_data: {e}", exc_info=True)
             
             submission.admin_reply_date = timezone.now()
             submission.is_processed = True
@@ -152,8 +172,7 @@ class AdminReplyView(APIView):
         except ContactSubmission.DoesNotExist:
             return Response({"error": "Submission not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"Error in AdminReplyView: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminReplyView: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 class AdminProcessedSubmissionsView(APIView):
@@ -164,58 +183,38 @@ class AdminProcessedSubmissionsView(APIView):
     authentication_classes = [AdminJWTAuthentication]
     
     def get(self, request):
-        print(f"AdminProcessedSubmissionsView - user: {request.user}, is_staff: {request.user.is_staff}")
+        logger.debug("AdminProcessedSubmissionsView - user: %s, is_staff: %s", request.user, request.user.is_staff)
         
         try:
-            # Get filter parameters
             page = int(request.query_params.get('page', 1))
-            page_size = int(request.query_params.get('page_size', 10))
-            
-            # Use a raw query to avoid the field that might not exist
-            from django.db import connection
-            
-            # Query only the fields we know exist
-            query = """
-            SELECT id, linkedin_url, message, email, created_at, 
-                   name, subject, message_type, user_id, admin_reply, 
-                   admin_reply_date, is_processed
-            FROM contact_contactsubmission
-            WHERE is_processed = true
-            ORDER BY admin_reply_date DESC
-            """
-            
-            with connection.cursor() as cursor:
-                cursor.execute(query)
-                columns = [col[0] for col in cursor.description]
-                submissions_raw = [dict(zip(columns, row)) for row in cursor.fetchall()]
-            
-            # Manual pagination
-            total_count = len(submissions_raw)
-            total_pages = (total_count + page_size - 1) // page_size if total_count > 0 else 1
-            
-            start = (page - 1) * page_size
-            end = min(start + page_size, total_count)
-            paginated_submissions = submissions_raw[start:end]
+            
+            # Query only the fields we know exist; LIMIT and the keyset
+            # predicate on (admin_reply_date, id) are pushed into SQL
+            submissions = ContactSubmission.objects.filter(
+                is_processed=True
+            ).values(*PROCESSED_SUBMISSION_FIELDS)
+            
+            paginator = KeysetPaginator('admin_reply_date', nullable=True)
+            page_obj = paginator.paginate(submissions, request)
             
             # Add empty form_data to each submission
-            for sub in paginated_submissions:
+            paginated_submissions = []
+            for sub in page_obj.items:
+                sub = dict(sub)
                 sub['form_data'] = {}
                 # Format dates as strings
                 if sub['created_at']:
-                    sub['created_at'] = sub['created_at'].isoformat() if hasattr(sub['created_at'], 'isoformat') else sub['created_at']
+                    sub['created_at'] = sub['created_at'].isoformat()
                 if sub['admin_reply_date']:
-                    sub['admin_reply_date'] = sub['admin_reply_date'].isoformat() if hasattr(sub['admin_reply_date'], 'isoformat') else sub['admin_reply_date']
+                    sub['admin_reply_date'] = sub['admin_reply_date'].isoformat()
+                paginated_submissions.append(sub)
             
-            return Response({
-                'submissions': paginated_submissions,
-                'total_count': total_count,
-                'total_pages': total_pages,
-                'current_page': page
-            })
+            return Response(_page_payload(paginated_submissions, page_obj, paginator, request, page))
             
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            print(f"Error in AdminProcessedSubmissionsView.get: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminProcessedSubmissionsView.get: {str(e)}")
             return Response({
                 'error': 'An error occurred while fetching processed submissions',
                 'detail': str(e)
@@ -230,6 +229,5 @@ class AdminProcessedSubmissionsView(APIView):
         except ContactSubmission.DoesNotExist:
             return Response({"error": "Submission not found"}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"Error in AdminProcessedSubmissionsView.delete: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminProcessedSubmissionsView.delete: {str(e)}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+class ContactConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'contact'
+
+    def ready(self):
+        # Register model signal receivers
+        from . import signals  # noqa: F401
+        from .email_service import log_email_configuration
+        log_email_configuration()
@@ -1,15 +1,51 @@
 import logging
-from django.core.mail import send_mail as django_send_mail
+from datetime import timedelta
 from django.core.mail import EmailMultiAlternatives
 from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
 import traceback
 
+from backend.instrumentation import timed
+
+from .smtp_pool import get_smtp_pool
+
 logger = logging.getLogger(__name__)
 
+# Outbox retry policy (overridable from settings)
+DEFAULT_MAX_ATTEMPTS = 6
+DEFAULT_BACKOFF_SECONDS = 30
+DEFAULT_MAX_BACKOFF_SECONDS = 60 * 60
+# How long a worker may hold a claimed message before another worker retries it
+DEFAULT_LEASE_SECONDS = 5 * 60
+
+
+def log_email_configuration():
+    """Log the effective email settings once at startup (password masked)"""
+    logger.debug(
+        "Email configuration",
+        extra={
+            'email_backend': settings.EMAIL_BACKEND,
+            'email_host': settings.EMAIL_HOST,
+            'email_port': settings.EMAIL_PORT,
+            'email_use_tls': settings.EMAIL_USE_TLS,
+            'email_host_user': settings.EMAIL_HOST_USER,
+            'email_host_password': '*' * 8 if settings.EMAIL_HOST_PASSWORD else 'Not set',
+            'default_from_email': settings.DEFAULT_FROM_EMAIL,
+            'admin_email': settings.ADMIN_EMAIL,
+            'frontend_url': getattr(settings, 'FRONTEND_URL', None),
+        },
+    )
+
+
 def send_notification_email(subject, message, recipient_list=None, html_message=None):
     """
-    Send email notification with HTML support and better error handling
-    
+    Queue an email notification for background delivery
+
+    The message is written to the ``EmailOutbox`` table and delivered by the
+    ``send_queued_emails`` management command, so the calling request only
+    pays for a single INSERT.
+
     Args:
         subject (str): Email subject
         message (str): Plain text email content
@@ -18,44 +54,177 @@ def send_notification_email(subject, message, recipient_list=None, html_message=
     """
     if recipient_list is None:
         recipient_list = [settings.ADMIN_EMAIL]
-    
+
     try:
-        # Log the email attempt
-        logger.info(f"Sending email notification: Subject: {subject}, To: {recipient_list}")
-        
-        # Ensure we have the proper settings
-        if not settings.EMAIL_HOST_USER or not settings.DEFAULT_FROM_EMAIL:
-            logger.error("Email settings are not configured properly")
-            return False
-            
-        # If we have HTML content, use EmailMultiAlternatives for both formats
-        if html_message:
-            email = EmailMultiAlternatives(
-                subject=subject,
-                body=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                to=recipient_list
-            )
-            email.attach_alternative(html_message, "text/html")
-            result = email.send(fail_silently=False)
-        else:
-            # Regular plain text email
-            result = django_send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=recipient_list,
-                fail_silently=False
-            )
-        
-        if result:
-            logger.info(f"Email notification sent successfully to {recipient_list}")
-            return True
-        else:
-            logger.error(f"Failed to send email notification to {recipient_list}")
-            return False
-            
+        with timed('email'):
+            enqueue_email(subject, message, recipient_list, html_message=html_message)
+        return True
     except Exception as e:
-        logger.error(f"Error sending email: {str(e)}")
+        logger.error(f"Error queueing email: {str(e)}")
         logger.error(traceback.format_exc())
         return False
+
+
+def enqueue_email(subject, message, recipient_list, html_message=None, from_email=None):
+    """Write a message to the outbox and return the ``EmailOutbox`` row"""
+    from .models import EmailOutbox
+
+    outbox = EmailOutbox(
+        subject=subject,
+        body=message,
+        html_body=html_message,
+        from_email=from_email,
+    )
+    outbox.recipient_list = [r for r in recipient_list if r]
+    outbox.save()
+
+    logger.info(f"Queued email {outbox.id}: Subject: {subject}, To: {outbox.recipient_list}")
+    return outbox
+
+
+def build_email_message(subject, message, recipient_list, html_message=None, from_email=None):
+    """Build an ``EmailMultiAlternatives`` message ready for delivery"""
+    from_email = from_email or settings.DEFAULT_FROM_EMAIL
+
+    # Ensure we have the proper settings
+    if not settings.EMAIL_HOST_USER or not from_email:
+        raise RuntimeError("Email settings are not configured properly")
+
+    email = EmailMultiAlternatives(
+        subject=subject,
+        body=message,
+        from_email=from_email,
+        to=recipient_list
+    )
+    # If we have HTML content, send both formats
+    if html_message:
+        email.attach_alternative(html_message, "text/html")
+    return email
+
+
+def deliver_email(subject, message, recipient_list, html_message=None, from_email=None):
+    """
+    Send an email synchronously over a pooled SMTP connection. Raises on failure.
+
+    Only the outbox worker should call this from request-independent code.
+    """
+    email = build_email_message(subject, message, recipient_list, html_message, from_email)
+    error = get_smtp_pool().send_messages([email])[0]
+    if error is not None:
+        raise error
+    return 1
+
+
+def get_backoff(attempts):
+    """Exponential backoff delay (in seconds) after ``attempts`` failed tries"""
+    base = getattr(settings, 'EMAIL_OUTBOX_BACKOFF_SECONDS', DEFAULT_BACKOFF_SECONDS)
+    cap = getattr(settings, 'EMAIL_OUTBOX_MAX_BACKOFF_SECONDS', DEFAULT_MAX_BACKOFF_SECONDS)
+    return min(cap, base * (2 ** max(0, attempts - 1)))
+
+
+def claim_due_emails(batch_size=50):
+    """
+    Lease up to ``batch_size`` due outbox messages for this worker.
+
+    Claimed rows get their attempt counter bumped and ``next_attempt_at``
+    pushed out by the lease period, so concurrent workers skip them and a
+    crashed worker's messages become due again once the lease expires.
+    """
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    lease = getattr(settings, 'EMAIL_OUTBOX_LEASE_SECONDS', DEFAULT_LEASE_SECONDS)
+
+    with transaction.atomic():
+        due = EmailOutbox.objects.filter(
+            status=EmailOutbox.STATUS_PENDING,
+            next_attempt_at__lte=now,
+        ).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        messages = list(due[:batch_size])
+
+        for outbox in messages:
+            outbox.attempts += 1
+            outbox.next_attempt_at = now + timedelta(seconds=lease)
+        EmailOutbox.objects.bulk_update(messages, ['attempts', 'next_attempt_at'])
+
+    return messages
+
+
+def record_delivery(outbox, error=None):
+    """Mark a claimed message as sent, or schedule its retry after ``error``"""
+    from .models import EmailOutbox
+
+    now = timezone.now()
+    max_attempts = getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+
+    if error is None:
+        outbox.status = EmailOutbox.STATUS_SENT
+        outbox.sent_at = now
+        outbox.last_error = None
+        logger.info(f"Email {outbox.id} sent successfully to {outbox.recipient_list}")
+    else:
+        outbox.last_error = str(error)
+        if outbox.attempts >= max_attempts:
+            outbox.status = EmailOutbox.STATUS_FAILED
+            logger.error(f"Email {outbox.id} failed permanently after {outbox.attempts} attempts: {error}")
+        else:
+            delay = get_backoff(outbox.attempts)
+            outbox.next_attempt_at = now + timedelta(seconds=delay)
+            logger.warning(f"Email {outbox.id} attempt {outbox.attempts} failed, retrying in {delay}s: {error}")
+
+    outbox.save(update_fields=['status', 'sent_at', 'last_error', 'next_attempt_at'])
+
+
+def process_outbox(batch_size=50):
+    """
+    Deliver one batch of due outbox messages over a single pooled connection.
+
+    Returns a ``(sent, failed)`` tuple for the batch.
+    """
+    claimed = claim_due_emails(batch_size)
+
+    # Build messages first; malformed rows fail without touching SMTP
+    batch, errors = [], {}
+    for outbox in claimed:
+        try:
+            batch.append((outbox, build_email_message(
+                outbox.subject,
+                outbox.body,
+                outbox.recipient_list,
+                html_message=outbox.html_body,
+                from_email=outbox.from_email,
+            )))
+        except Exception as e:
+            errors[outbox.id] = e
+
+    if batch:
+        results = get_smtp_pool().send_messages([email for _, email in batch])
+        for (outbox, _), error in zip(batch, results):
+            errors[outbox.id] = error
+
+    sent = failed = 0
+    for outbox in claimed:
+        error = errors.get(outbox.id)
+        record_delivery(outbox, error=error)
+        if error is None:
+            sent += 1
+        else:
+            failed += 1
+    return sent, failed
+
+
+def outbox_depth():
+    """Number of unsent messages in the outbox, by status"""
+    from django.db.models import Count
+    from .models import EmailOutbox
+
+    depth = {EmailOutbox.STATUS_PENDING: 0, EmailOutbox.STATUS_FAILED: 0}
+    rows = (EmailOutbox.objects
+            .exclude(status=EmailOutbox.STATUS_SENT)
+            .values('status')
+            .annotate(count=Count('id')))
+    for row in rows:
+        depth[row['status']] = row['count']
+    return depth
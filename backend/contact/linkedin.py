@@ -0,0 +1,59 @@
+"""
+Canonical form of LinkedIn profile URLs.
+
+The same profile is submitted in many spellings: with or without scheme or
+``www.``, from the mobile or a country subdomain, in mixed case, with a
+trailing slash, a sub-page (``/details/experience/``) or tracking parameters
+(``?trk=...``, ``?originalSubdomain=...``). All of them identify the member
+by the ``/in/<slug>`` path segment, so the lowercased slug is the canonical
+key stored in ``ContactSubmission.linkedin_profile`` and used to find earlier
+analyses of the same profile.
+"""
+import re
+from urllib.parse import unquote, urlsplit
+
+LINKEDIN_DOMAIN = 'linkedin.com'
+PROFILE_URL = 'https://www.linkedin.com/in/{slug}/'
+
+# Letters (any script), digits and hyphens; LinkedIn allows 3-100 characters
+# for custom URLs, generated ones may be a little longer
+SLUG_RE = re.compile(r'^[^\W_](?:[\w-]*[^\W_])?$')
+SLUG_MAX_LENGTH = 200
+
+
+def canonical_profile(url):
+    """
+    The canonical profile slug of a LinkedIn profile URL, or None when
+    ``url`` is not a LinkedIn member profile (company pages, posts, ...).
+    """
+    url = (url or '').strip()
+    if not url:
+        return None
+    if '://' not in url:
+        url = f'https://{url}'
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').rstrip('.')
+    except ValueError:
+        return None
+    if host != LINKEDIN_DOMAIN and not host.endswith('.' + LINKEDIN_DOMAIN):
+        return None
+
+    # Query string and fragment only carry tracking data and are dropped
+    segments = [unquote(segment) for segment in parts.path.split('/') if segment]
+    try:
+        # Usually the first segment; the mobile site prefixes e.g. /mwlite
+        position = [segment.lower() for segment in segments].index('in')
+    except ValueError:
+        return None
+    if position + 1 >= len(segments):
+        return None
+    slug = segments[position + 1].strip().lower()
+    if len(slug) > SLUG_MAX_LENGTH or not SLUG_RE.match(slug):
+        return None
+    return slug
+
+
+def profile_url(slug):
+    """The normalized profile URL of a canonical slug"""
+    return PROFILE_URL.format(slug=slug)
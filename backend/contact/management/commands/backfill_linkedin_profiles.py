@@ -0,0 +1,63 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from contact.linkedin import canonical_profile
+from contact.models import ContactSubmission
+
+
+class Command(BaseCommand):
+    help = ("Store the canonical LinkedIn profile (ContactSubmission.linkedin_profile) of existing "
+            "submissions, in id order so the table is never locked as a whole")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Submissions read per query')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every row, not only rows without a canonical profile')
+
+    def handle(self, *args, **options):
+        submissions = ContactSubmission.objects.filter(linkedin_url__isnull=False).order_by('id')
+        if not options['all']:
+            submissions = submissions.filter(linkedin_profile__isnull=True)
+        start, last_id, seen, updated, invalid = time.perf_counter(), 0, 0, 0, 0
+        while True:
+            rows = list(submissions.filter(id__gt=last_id)
+                        .values_list('id', 'linkedin_url', 'linkedin_profile')[:options['batch_size']])
+            if not rows:
+                break
+            last_id, seen = rows[-1][0], seen + len(rows)
+            changed = []
+            for submission_id, url, current in rows:
+                profile = canonical_profile(url)
+                invalid += profile is None
+                if profile != current:
+                    changed.append((submission_id, profile))
+            self.update(changed)
+            updated += len(changed)
+            self.stdout.write(f"  Up to id {last_id}: {seen} read, {updated} updated")
+        self.stdout.write(self.style.SUCCESS(
+            f"Canonicalized {updated} LinkedIn URLs in {time.perf_counter() - start:.1f}s "
+            f"({invalid} are not profile URLs)"
+        ))
+
+    def update(self, changed):
+        """Write the column only: no signals, created_at untouched"""
+        if not changed:
+            return
+        if connection.vendor == 'postgresql':
+            # One UPDATE ... FROM (VALUES ...) per batch; far cheaper than
+            # building bulk_update's CASE WHEN id = ... expression
+            table = ContactSubmission._meta.db_table
+            values = ', '.join(['(%s, %s::varchar)'] * len(changed))
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'UPDATE {table} AS submission SET linkedin_profile = new.profile '
+                    f'FROM (VALUES {values}) AS new (id, profile) WHERE submission.id = new.id',
+                    [value for row in changed for value in row],
+                )
+        else:
+            ContactSubmission.objects.bulk_update(
+                [ContactSubmission(id=submission_id, linkedin_profile=profile) for submission_id, profile in changed],
+                ['linkedin_profile'], batch_size=1000,
+            )
@@ -0,0 +1,121 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from contact.smtp_pool import SMTPConnectionPool
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Minimal SMTP server speaking just enough of the protocol for smtplib.
+    ``server.handshake_latency`` is slept on connect and on AUTH to stand in
+    for the TLS handshake and login round trips of a real provider.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        time.sleep(self.server.handshake_latency)
+        self.reply("220 localhost stand-in SMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors='replace').strip().upper()
+
+            if command.startswith('EHLO'):
+                self.wfile.write(b"250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif command.startswith('HELO'):
+                self.reply("250 localhost")
+            elif command.startswith('AUTH'):
+                time.sleep(self.server.handshake_latency)
+                self.reply("235 Authentication successful")
+            elif command.startswith('DATA'):
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                self.server.received += 1
+                self.reply("250 OK")
+            elif command.startswith('QUIT'):
+                self.reply("221 Bye")
+                return
+            else:
+                # MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_latency):
+        super().__init__(('127.0.0.1', 0), StandInSMTPHandler)
+        self.handshake_latency = handshake_latency
+        self.received = 0
+
+
+class Command(BaseCommand):
+    help = "Benchmark per-message SMTP connections against pooled, batched delivery using a local stand-in server"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=200,
+                            help='Number of messages to send in each run')
+        parser.add_argument('--handshake-latency', type=float, default=0.05,
+                            help='Seconds slept by the stand-in server on connect and on AUTH')
+
+    def handle(self, *args, **options):
+        count = options['messages']
+        server = StandInSMTPServer(options['handshake_latency'])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+
+        smtp_settings = dict(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST=host,
+            EMAIL_PORT=port,
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER='bench',
+            EMAIL_HOST_PASSWORD='bench',
+        )
+
+        try:
+            with override_settings(**smtp_settings):
+                messages = [
+                    EmailMultiAlternatives(
+                        subject=f"Benchmark message {i}",
+                        body="Benchmark body",
+                        from_email='bench@localhost',
+                        to=['admin@localhost'],
+                    )
+                    for i in range(count)
+                ]
+
+                # Before: a fresh connection (handshake + login) per message
+                start = time.perf_counter()
+                for message in messages:
+                    get_connection(fail_silently=False).send_messages([message])
+                before = time.perf_counter() - start
+
+                # After: one pooled, authenticated connection for the batch
+                pool = SMTPConnectionPool(size=1)
+                start = time.perf_counter()
+                errors = pool.send_messages(messages)
+                after = time.perf_counter() - start
+                pool.close_all()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        failed = sum(1 for e in errors if e is not None)
+        self.stdout.write(f"Stand-in SMTP server received {server.received} messages")
+        self.stdout.write(f"Per-message connections: {count / before:8.1f} msg/s ({before:.2f}s)")
+        self.stdout.write(
+            f"Pooled batch delivery:   {count / after:8.1f} msg/s ({after:.2f}s, "
+            f"{pool.connects} connection(s), {failed} failed)"
+        )
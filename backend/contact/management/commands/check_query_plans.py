@@ -0,0 +1,72 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from contact.models import ContactSubmission
+from contact.pagination import KeysetPaginator
+
+TABLE = ContactSubmission._meta.db_table
+
+
+def hot_queries():
+    """The ContactSubmission queries issued by the busiest endpoints"""
+    email = 'someone@example.com'
+    since = timezone.now() - timedelta(days=30)
+    by_created = KeysetPaginator('created_at')
+    by_reply = KeysetPaginator('admin_reply_date', nullable=True)
+
+    queries = [
+        ('UserSubmissionsView', ContactSubmission.objects.filter(email=email).order_by('-created_at')),
+        ('UserAnalysesView', ContactSubmission.objects.filter(
+            email=email, is_processed=True, analysis__isnull=False,
+        ).order_by('-created_at')),
+        ('SubmitFormView quota seed', ContactSubmission.objects.filter(user_id=1, created_at__gte=since)),
+    ]
+    # Admin lists: every segment the keyset paginator reads
+    for name, queryset, paginator in [
+        ('AdminSubmissionsView (all)', ContactSubmission.objects.all(), by_created),
+        ('AdminSubmissionsView (pending)', ContactSubmission.objects.filter(is_processed=False), by_created),
+        ('AdminProcessedSubmissionsView', ContactSubmission.objects.filter(is_processed=True), by_reply),
+    ]:
+        for i, segment in enumerate(paginator.get_segments(queryset)):
+            queries.append((f'{name} segment {i + 1}', segment[:11]))
+    return queries
+
+
+def uses_sequential_scan(plan):
+    """True when the plan reads the submissions table without an index"""
+    return f'Seq Scan on {TABLE}' in plan
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the hot ContactSubmission queries and fail if any of them cannot use an index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Print every query plan')
+
+    def handle(self, *args, **options):
+        # The index plan targets the production database; SQLite's planner
+        # cannot use an index for Django's bare boolean predicates anyway
+        if connection.vendor != 'postgresql':
+            raise CommandError(f"Query plan checks require PostgreSQL, not {connection.vendor}")
+
+        # Small tables make the planner prefer sequential scans; disable
+        # them so the check reports whether an index *can* be used
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+
+        failures = []
+        for name, queryset in hot_queries():
+            plan = queryset.explain()
+            if options['verbose_plans']:
+                self.stdout.write(f"-- {name}\n{plan}\n")
+            if uses_sequential_scan(plan):
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"{name}: sequential scan on {TABLE}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{name}: index scan"))
+
+        if failures:
+            raise CommandError(f"{len(failures)} hot query(s) do not use an index: {', '.join(failures)}")
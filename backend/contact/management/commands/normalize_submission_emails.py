@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from django.db.models.functions import Lower, Trim
+
+from contact.models import ContactSubmission
+
+
+class Command(BaseCommand):
+    help = ("Lowercase and trim the email of existing submissions, which the user views match "
+            "exactly, in id ranges so the table is never locked as a whole")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Submission ids per UPDATE')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        normalized = Lower(Trim('email'))
+        last_id = ContactSubmission.objects.aggregate(last=Max('id'))['last'] or 0
+        start, updated = time.perf_counter(), 0
+        for low in range(0, last_id, batch_size):
+            # UPDATE ... SET email = lower(trim(email)): the column only, no
+            # signals, updated_at untouched
+            updated += (
+                ContactSubmission.objects.filter(id__gt=low, id__lte=low + batch_size)
+                .exclude(email=normalized)
+                .update(email=normalized)
+            )
+            self.stdout.write(f"  Up to id {min(low + batch_size, last_id)}: {updated} updated")
+        self.stdout.write(self.style.SUCCESS(
+            f"Normalized {updated} submission emails in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from contact.models import IdempotencyKey, RateLimitCounter
+
+
+class Command(BaseCommand):
+    help = "Delete expired rate-limit counters and idempotency keys"
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        counters, _ = RateLimitCounter.objects.filter(expires_at__lt=now).delete()
+        keys, _ = IdempotencyKey.objects.filter(expires_at__lt=now).delete()
+        self.stdout.write(f"Deleted {counters} expired rate-limit counter(s) and {keys} idempotency key(s)")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from contact.email_service import process_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the EmailOutbox table, retrying failures with exponential backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50,
+                            help='Maximum number of messages to claim per batch')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='Seconds to sleep when the outbox is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Drain the currently due messages and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+
+        self.stdout.write(f"Email worker started (batch size {batch_size})")
+        try:
+            while True:
+                # Long-running process: drop connections that went stale
+                close_old_connections()
+                sent, failed = process_outbox(batch_size)
+
+                if sent or failed:
+                    self.stdout.write(f"Delivered {sent} email(s), {failed} failed")
+
+                # A full batch means more work is probably waiting
+                if sent + failed < batch_size:
+                    if options['once']:
+                        break
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write("Email worker stopped")
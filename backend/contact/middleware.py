@@ -1,6 +1,9 @@
 from django.conf import settings
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 class CSRFExemptMiddleware:
     """Middleware that exempts specific paths from CSRF verification."""
     
@@ -15,7 +18,7 @@ class CSRFExemptMiddleware:
         
         # Add debug information
         if request.path.startswith('/api/admin/'):
-            print(f"Admin endpoint accessed: {request.path}")
+            logger.debug("Admin endpoint accessed: %s", request.path)
             
         request._api_debug = {
             'path': path,
@@ -29,8 +32,7 @@ class CSRFExemptMiddleware:
             request._dont_enforce_csrf_checks = True
             
             # Add debug log
-            if settings.DEBUG:
-                print(f"CSRF exemption applied to: {path}")
+            logger.debug("CSRF exemption applied to: %s", path)
         
         response = self.get_response(request)
         return response
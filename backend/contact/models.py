@@ -1,7 +1,11 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 import json
 
+from .linkedin import canonical_profile
+
 User = get_user_model()
 
 class ContactSubmission(models.Model):
@@ -10,9 +14,14 @@ class ContactSubmission(models.Model):
     """
     # Basic fields
     linkedin_url = models.URLField(max_length=1024, blank=True, null=True)
+    # Canonical profile slug of linkedin_url (see contact/linkedin.py), set on save
+    linkedin_profile = models.CharField(max_length=200, blank=True, null=True)
     message = models.TextField(blank=True, null=True)
     email = models.EmailField()
     created_at = models.DateTimeField(auto_now_add=True)
+    # Last change of any field, set on save; the watermark of the users'
+    # incremental submission sync (contact.views.UserSubmissionsView)
+    updated_at = models.DateTimeField(default=timezone.now)
     
     # For contact form messages
     name = models.CharField(max_length=255, blank=True, null=True)
@@ -30,6 +39,37 @@ class ContactSubmission(models.Model):
     # Store form data as JSON string - Comment this out if column doesn't exist yet
     # _form_data = models.TextField(db_column='form_data', blank=True, null=True)
     
+    class Meta:
+        indexes = [
+            # User's own submissions: email is normalized to lowercase on save,
+            # so lookups are exact matches instead of UPPER() comparisons
+            models.Index(fields=['email', 'created_at'], name='contact_email_created_idx'),
+            # Latest change / changes since a watermark of a user's submissions
+            models.Index(fields=['email', 'updated_at'], name='contact_email_updated_idx'),
+            models.Index(fields=['user', 'created_at'], name='contact_user_created_idx'),
+            # Admin lists, keyset-paginated on (created_at, id) / (admin_reply_date, id)
+            models.Index(fields=['created_at', 'id'], name='contact_created_idx'),
+            models.Index(fields=['is_processed', 'created_at', 'id'], name='contact_processed_created_idx'),
+            models.Index(fields=['is_processed', 'admin_reply_date', 'id'], name='contact_processed_reply_idx'),
+            # Earlier submissions (and analyses) of the same LinkedIn profile
+            models.Index(fields=['linkedin_profile', 'created_at'], name='contact_profile_created_idx'),
+        ]
+    
+    @staticmethod
+    def normalize_email(email):
+        """Canonical form used for storing and looking up submission emails"""
+        return (email or '').strip().lower()
+    
+    def save(self, *args, **kwargs):
+        self.email = self.normalize_email(self.email)
+        self.linkedin_profile = canonical_profile(self.linkedin_url)
+        self.updated_at = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'updated_at', 'linkedin_profile'} if 'linkedin_url' in update_fields else {'updated_at'}
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+    
     @property
     def form_data(self):
         """
@@ -65,3 +105,137 @@ class ContactSubmission(models.Model):
         if self.subject:
             return f"{self.name} - {self.subject}"
         return f"{self.email} - {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Outgoing email queued by request handlers and delivered by the
+    ``send_queued_emails`` worker, so SMTP latency never blocks a request.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True, null=True)
+    from_email = models.CharField(max_length=255, blank=True, null=True)
+    # JSON encoded list of recipient addresses
+    recipients = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time the worker may (re)try this message; also acts as a
+    # lease while a worker is delivering it
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        verbose_name = 'Queued Email'
+        verbose_name_plural = 'Email Outbox'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    @property
+    def recipient_list(self):
+        try:
+            return json.loads(self.recipients)
+        except (ValueError, TypeError):
+            return []
+
+    @recipient_list.setter
+    def recipient_list(self, value):
+        self.recipients = json.dumps(list(value or []))
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipient_list)} ({self.status})"
+
+
+class MonthlySubmissionCount(models.Model):
+    """
+    Per-(user, month) submission counter used for subscription quota checks,
+    incremented in the same transaction as the submission insert.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_submission_counts')
+    # First day of the counted month
+    month = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Monthly Submission Count'
+        verbose_name_plural = 'Monthly Submission Counts'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month'], name='unique_user_month_count'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month:%Y-%m}: {self.count}"
+
+
+class RateLimitCounter(models.Model):
+    """
+    Requests counted under one rate-limit key in one fixed window, for the
+    sliding-window throttles of backend/throttling.py
+    """
+    key = models.CharField(max_length=100)
+    # Window number: seconds since the epoch // window length
+    window = models.BigIntegerField()
+    count = models.PositiveIntegerField(default=0)
+    # When the window stops counting as the previous one; purged after that
+    # by the purge_expired command
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Rate Limit Counter'
+        verbose_name_plural = 'Rate Limit Counters'
+        constraints = [
+            models.UniqueConstraint(fields=['key', 'window'], name='unique_rate_limit_window'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='rate_limit_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} #{self.window}: {self.count}"
+
+
+class IdempotencyKey(models.Model):
+    """
+    A request's ``Idempotency-Key`` and its stored response, for the replays
+    of backend/idempotency.py
+    """
+    # View class and owner the key belongs to
+    scope = models.CharField(max_length=100)
+    # SHA-256 of the client's key
+    key = models.CharField(max_length=64)
+    # SHA-256 of the request; repeats must match it
+    fingerprint = models.CharField(max_length=64)
+    # Null while the first request is still being handled
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # End of the replay period, or of the claim while in progress; purged
+    # after that by the purge_expired command
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'Idempotency Key'
+        verbose_name_plural = 'Idempotency Keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_key'),
+        ]
+        indexes = [
+            models.Index(fields=['expires_at'], name='idempotency_expires_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope} {self.key[:8]}: {self.status_code or 'in progress'}"
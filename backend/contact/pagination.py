@@ -0,0 +1,164 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when an ``after=`` cursor cannot be decoded"""
+
+
+class KeysetPage:
+    """A single page of keyset-paginated results"""
+
+    def __init__(self, items, next_cursor=None, has_more=False, total_count=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+        self.total_count = total_count
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a descending ``(sort_field, id)`` key.
+
+    Instead of OFFSET/slicing in Python, each page is fetched with
+    ``WHERE (sort_field, id) < (cursor) ORDER BY sort_field DESC, id DESC LIMIT n``
+    so the cost of a page does not grow with the size of the table.
+    For a ``nullable`` sort field, rows with a NULL value are ordered last.
+    """
+
+    def __init__(self, sort_field, nullable=False, page_size=10, max_page_size=100):
+        self.sort_field = sort_field
+        self.nullable = nullable
+        self.page_size = page_size
+        self.max_page_size = max_page_size
+
+    # Cursor encoding
+
+    def encode_cursor(self, row):
+        """Build an opaque cursor from the last row of a page"""
+        value = _get(row, self.sort_field)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([value, _get(row, 'id')], separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor, model):
+        """
+        Decode an opaque cursor into a ``(sort_value, id)`` pair, with the
+        sort value converted by ``model``'s sort field (e.g. to a datetime)
+        """
+        field = model._meta.get_field(self.sort_field)
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            pk = int(pk)
+            if value is not None:
+                value = field.to_python(value)
+            # Cursors are written with a UTC offset
+            if isinstance(value, datetime) and value.tzinfo is None:
+                raise ValueError('naive datetime')
+        except (ValueError, TypeError, ValidationError):
+            raise InvalidCursor('Invalid pagination cursor')
+        return value, pk
+
+    # Query building
+
+    def get_segments(self, queryset, cursor=None):
+        """
+        Split the ordered result into index-friendly querysets.
+
+        A nullable sort field is read as two segments - non-NULL values by
+        ``(sort_field, id)`` descending, then NULL values by ``id`` - which
+        gives NULLS LAST ordering while each part can still walk a plain
+        ``(sort_field, id)`` b-tree index.
+        """
+        field = self.sort_field
+        ordered = queryset.order_by(f'-{field}', '-id')
+
+        if cursor is None:
+            if not self.nullable:
+                return [ordered]
+            return [
+                ordered.filter(**{f'{field}__isnull': False}),
+                queryset.filter(**{f'{field}__isnull': True}).order_by('-id'),
+            ]
+
+        value, pk = self.decode_cursor(cursor, queryset.model)
+        if value is None:
+            # Already inside the trailing NULL block - only the id decides
+            return [queryset.filter(**{f'{field}__isnull': True, 'id__lt': pk}).order_by('-id')]
+
+        after = ordered.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk}))
+        if not self.nullable:
+            return [after]
+        return [after, queryset.filter(**{f'{field}__isnull': True}).order_by('-id')]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get('page_size', self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate(self, queryset, request, with_count=None):
+        """
+        Return a ``KeysetPage`` for the request.
+
+        ``after=<cursor>`` continues from a previous page. Without a cursor,
+        the legacy ``page=`` parameter is honoured with a SQL OFFSET so that
+        existing clients keep working. The total count is only computed when
+        ``with_count`` is true (defaults to ``count=true`` in the query string,
+        or to true in legacy page mode where clients expect ``total_pages``).
+        """
+        page_size = self.get_page_size(request)
+        cursor = request.query_params.get('after')
+
+        if with_count is None:
+            with_count = (
+                request.query_params.get('count', '').lower() in ('1', 'true')
+                or not cursor
+            )
+        total_count = queryset.count() if with_count else None
+
+        offset = 0
+        if not cursor:
+            try:
+                page = max(1, int(request.query_params.get('page', 1)))
+            except (TypeError, ValueError):
+                page = 1
+            offset = (page - 1) * page_size
+
+        # Fetch one extra row to know whether another page exists
+        rows = self._fetch(self.get_segments(queryset, cursor), offset, page_size + 1)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        next_cursor = self.encode_cursor(rows[-1]) if has_more else None
+        return KeysetPage(rows, next_cursor, has_more, total_count)
+
+    @staticmethod
+    def _fetch(segments, offset, limit):
+        """Read ``limit`` rows across ``segments``, skipping ``offset`` rows first"""
+        rows = []
+        for segment in segments:
+            if offset:
+                # Legacy page mode: skip segments entirely covered by the offset
+                size = segment.count()
+                if offset >= size:
+                    offset -= size
+                    continue
+            rows.extend(segment[offset:offset + limit - len(rows)])
+            offset = 0
+            if len(rows) >= limit:
+                break
+        return rows
+
+
+def _get(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
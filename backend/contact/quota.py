@@ -0,0 +1,126 @@
+"""
+Monthly submission quotas per subscription tier.
+
+Usage is tracked in ``MonthlySubmissionCount`` rows (one per user and month)
+instead of counting ``ContactSubmission`` rows on every submit. A submission
+slot is reserved with a single conditional ``UPDATE ... SET count = count + 1
+WHERE count < limit``, which is race-free under concurrent submits, and the
+current usage and tier are cached for cheap reads.
+"""
+import logging
+from datetime import datetime, time, timezone as dt_timezone
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Submissions allowed per calendar month; None means unlimited
+TIER_LIMITS = {
+    'free': 1,
+    'basic': 24,
+    'premium': None,
+}
+
+USAGE_CACHE_TIMEOUT = 60 * 60
+TIER_CACHE_TIMEOUT = 60 * 15
+
+
+def current_month(now=None):
+    """First day of the current month (UTC)"""
+    now = now or timezone.now()
+    return now.date().replace(day=1)
+
+
+def _usage_key(user_id, month):
+    return f"quota:usage:{user_id}:{month:%Y%m}"
+
+
+def _tier_key(user_id):
+    return f"quota:tier:{user_id}"
+
+
+def get_user_tier(user):
+    """Subscription tier for ``user``, cached until the subscription changes"""
+    from users.models import UserSubscription
+
+    key = _tier_key(user.id)
+    tier = cache.get(key)
+    if tier is None:
+        tier = (
+            UserSubscription.objects.filter(user=user)
+            .values_list('tier', flat=True)
+            .first()
+        ) or 'free'
+        tier = tier.lower()
+        cache.set(key, tier, TIER_CACHE_TIMEOUT)
+    return tier
+
+
+def invalidate_user_tier(user_id):
+    cache.delete(_tier_key(user_id))
+
+
+def get_limit(tier):
+    return TIER_LIMITS.get(tier)
+
+
+def _get_or_create_counter(user, month):
+    """
+    Fetch the counter row for ``user``/``month``, creating it on first use.
+
+    A new row is seeded with the submissions already made this month so
+    that switching from COUNT(*) to counters does not reset anyone's usage.
+    """
+    from .models import ContactSubmission, MonthlySubmissionCount
+
+    counter = MonthlySubmissionCount.objects.filter(user=user, month=month).first()
+    if counter is not None:
+        return counter
+
+    start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    existing = ContactSubmission.objects.filter(
+        user=user,
+        created_at__gte=start,
+    ).count()
+    try:
+        with transaction.atomic():
+            return MonthlySubmissionCount.objects.create(user=user, month=month, count=existing)
+    except IntegrityError:
+        # A concurrent request created it first
+        return MonthlySubmissionCount.objects.get(user=user, month=month)
+
+
+def reserve_submission(user):
+    """
+    Atomically claim one submission slot for ``user`` in the current month.
+
+    Must be called inside the same ``transaction.atomic()`` block that
+    inserts the submission, so a failed insert releases the slot.
+    Returns ``(allowed, tier)``.
+    """
+    from .models import MonthlySubmissionCount
+
+    month = current_month()
+    tier = get_user_tier(user)
+    limit = get_limit(tier)
+
+    # Cheap rejection from cache before touching the database
+    cached = cache.get(_usage_key(user.id, month))
+    if limit is not None and cached is not None and cached >= limit:
+        return False, tier
+
+    counter = _get_or_create_counter(user, month)
+    counters = MonthlySubmissionCount.objects.filter(pk=counter.pk)
+    if limit is not None:
+        counters = counters.filter(count__lt=limit)
+    allowed = counters.update(count=F('count') + 1) == 1
+
+    if allowed:
+        # Refresh the cached usage only once the insert has committed
+        transaction.on_commit(lambda: cache.delete(_usage_key(user.id, month)))
+    else:
+        cache.set(_usage_key(user.id, month), limit, USAGE_CACHE_TIMEOUT)
+    return allowed, tier
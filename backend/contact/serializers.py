@@ -1,5 +1,9 @@
 from rest_framework import serializers
+from .linkedin import canonical_profile
 from .models import ContactSubmission
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ContactSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,8 +17,10 @@ class ContactSerializer(serializers.ModelSerializer):
     def validate_linkedin_url(self, value):
         if not value:
             raise serializers.ValidationError("LinkedIn URL is required.")
-        if "linkedin.com" not in value:
-            raise serializers.ValidationError("Please enter a valid LinkedIn URL.")
+        if canonical_profile(value) is None:
+            raise serializers.ValidationError(
+                "Please enter a valid LinkedIn profile URL (https://www.linkedin.com/in/<name>)."
+            )
         return value
     
     def validate_email(self, value):
@@ -31,7 +37,7 @@ class ContactSerializer(serializers.ModelSerializer):
             if 'analysis' in representation and representation['analysis'] is None:
                 representation['analysis'] = {}
         except Exception as e:
-            print(f"Error processing analysis field: {str(e)}")
+            logger.error(f"Error processing analysis field: {str(e)}")
             representation['analysis'] = {}
         return representation
 
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from backend.events import ADMIN_CHANNEL, publish_on_commit, user_channel
+from backend.view_cache import (
+    invalidate_tags_on_commit, DASHBOARD_STATS_TAG, SUBSCRIPTION_TAG, USER_SUBMISSIONS_TAG,
+)
+from users.models import UserSubscription
+from .models import ContactSubmission
+from .quota import invalidate_user_tier
+
+
+@receiver([post_save, post_delete], sender=UserSubscription)
+def subscription_changed(sender, instance, **kwargs):
+    """Drop the cached tier so quota checks see subscription changes immediately"""
+    invalidate_user_tier(instance.user_id)
+    invalidate_tags_on_commit(SUBSCRIPTION_TAG.format(user_id=instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=ContactSubmission)
+def submission_changed(sender, instance, **kwargs):
+    """Invalidate cached responses that include this submission"""
+    invalidate_tags_on_commit(
+        DASHBOARD_STATS_TAG,
+        USER_SUBMISSIONS_TAG.format(email=ContactSubmission.normalize_email(instance.email)),
+    )
+
+
+def _submission_event(instance):
+    return {
+        'id': instance.id,
+        'is_processed': instance.is_processed,
+        'has_reply': bool(instance.admin_reply),
+        'updated_at': instance.updated_at,
+    }
+
+
+@receiver(post_save, sender=ContactSubmission)
+def publish_submission_saved(sender, instance, created, **kwargs):
+    """Push the change to the owner's event stream and to admins"""
+    event = 'submission.created' if created else 'submission.updated'
+    data = _submission_event(instance)
+    publish_on_commit(user_channel(instance.email), event, data)
+    if created:
+        data = {**data, 'email': instance.email, 'linkedin_url': instance.linkedin_url,
+                'message_type': instance.message_type, 'created_at': instance.created_at}
+    publish_on_commit(ADMIN_CHANNEL, event, data)
+
+
+@receiver(post_delete, sender=ContactSubmission)
+def publish_submission_deleted(sender, instance, **kwargs):
+    publish_on_commit(user_channel(instance.email), 'submission.deleted', {'id': instance.id})
+    publish_on_commit(ADMIN_CHANNEL, 'submission.deleted', {'id': instance.id})
@@ -0,0 +1,158 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 2
+# Close and reopen connections that sat idle for longer than this, since
+# SMTP servers (Gmail included) drop idle sessions after a while
+DEFAULT_IDLE_TIMEOUT = 60
+
+# Errors that mean the session is gone and the message should be retried
+# once over a fresh connection
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)
+
+
+class PooledConnection:
+    """An open email backend connection plus its last-used timestamp"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.last_used = time.monotonic()
+
+    def open(self):
+        # Returns True only when a new session (TLS handshake + login) was made
+        return bool(self.backend.open())
+
+    def close(self):
+        try:
+            self.backend.close()
+        except Exception:
+            pass
+
+
+class SMTPConnectionPool:
+    """
+    Keeps a small pool of authenticated email backend connections alive
+    so that the TLS handshake and login are paid once per connection
+    instead of once per message.
+    """
+
+    def __init__(self, size=None, idle_timeout=None, backend=None, **backend_kwargs):
+        self.size = size or getattr(settings, 'EMAIL_SMTP_POOL_SIZE', DEFAULT_POOL_SIZE)
+        self.idle_timeout = idle_timeout or getattr(settings, 'EMAIL_SMTP_IDLE_TIMEOUT', DEFAULT_IDLE_TIMEOUT)
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        # Counters used by the benchmark and for logging
+        self.connects = 0
+
+    def _new_connection(self):
+        return PooledConnection(get_connection(self.backend, fail_silently=False, **self.backend_kwargs))
+
+    def acquire(self):
+        """Check out a live connection, opening a new session if needed"""
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._new_connection()
+
+            if time.monotonic() - conn.last_used > self.idle_timeout:
+                conn.close()
+                conn = self._new_connection()
+
+            if conn.open():
+                self.connects += 1
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn, broken=False):
+        """Return a connection to the pool, or drop it if it is broken"""
+        if broken:
+            conn.close()
+        else:
+            conn.last_used = time.monotonic()
+            self._idle.put(conn)
+        self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def send_messages(self, messages):
+        """
+        Send ``messages`` over one pooled connection.
+
+        Messages go out one ``send_messages`` call at a time on the same
+        session so that a failure can be attributed to a single message.
+        If the server drops the session, the pool reconnects and retries
+        that message once. Returns a list of errors aligned with
+        ``messages`` (``None`` for each message that was accepted).
+        """
+        errors = [None] * len(messages)
+        if not messages:
+            return errors
+
+        try:
+            conn = self.acquire()
+        except Exception as e:
+            logger.error(f"Could not open SMTP connection: {e}")
+            return [e] * len(messages)
+
+        broken = False
+        try:
+            for i, message in enumerate(messages):
+                try:
+                    errors[i] = self._send_one(conn, message)
+                except RECONNECT_ERRORS as e:
+                    logger.warning(f"SMTP session lost, reconnecting: {e}")
+                    conn.close()
+                    try:
+                        conn.open()
+                        self.connects += 1
+                        errors[i] = self._send_one(conn, message)
+                    except Exception as retry_error:
+                        # Server is unreachable - fail the rest of the batch fast
+                        broken = True
+                        for j in range(i, len(messages)):
+                            errors[j] = retry_error
+                        break
+                except Exception as e:
+                    errors[i] = e
+        finally:
+            self.release(conn, broken=broken)
+        return errors
+
+    @staticmethod
+    def _send_one(conn, message):
+        if not conn.backend.send_messages([message]):
+            return RuntimeError(f"SMTP server did not accept the message for {message.to}")
+        return None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_smtp_pool():
+    """Process-wide connection pool for the configured email backend"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SMTPConnectionPool()
+    return _pool
@@ -0,0 +1,104 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from contact.management.commands.check_query_plans import hot_queries, uses_sequential_scan
+from contact.models import ContactSubmission
+from contact.pagination import InvalidCursor, KeysetPaginator
+
+START = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def make_submissions(sort_values):
+    """One submission per value, in id order, with admin_reply_date set to it"""
+    ContactSubmission.objects.bulk_create(
+        ContactSubmission(email=f'user{i}@example.com') for i in range(len(sort_values))
+    )
+    ids = list(ContactSubmission.objects.order_by('id').values_list('id', flat=True))
+    for pk, value in zip(ids, sort_values):
+        ContactSubmission.objects.filter(pk=pk).update(admin_reply_date=value)
+    return ids
+
+
+def raw_cursor(value, pk):
+    raw = json.dumps([value, pk]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+class KeysetPaginatorTests(TestCase):
+    factory = APIRequestFactory()
+
+    def walk(self, paginator, page_size):
+        """Ids of every page, following next_cursor from the first page"""
+        queryset = ContactSubmission.objects.values('id', paginator.sort_field)
+        pages, cursor = [], None
+        while True:
+            params = {'page_size': page_size, **({'after': cursor} if cursor else {})}
+            page = paginator.paginate(queryset, Request(self.factory.get('/', params)))
+            pages.append([row['id'] for row in page.items])
+            if not page.has_more:
+                return pages
+            cursor = page.next_cursor
+
+    def test_nulls_last_walk_crosses_the_null_boundary(self):
+        a, b, c, d, e = make_submissions([
+            START, None, START + timedelta(days=2), None, START + timedelta(days=1),
+        ])
+        pages = self.walk(KeysetPaginator('admin_reply_date', nullable=True), page_size=2)
+        # Non-NULL dates descending, then the NULLs by id descending; the
+        # second page's cursor sits on the last dated row
+        self.assertEqual(pages, [[c, e], [a, d], [b]])
+
+    def test_walk_from_a_cursor_inside_the_null_block(self):
+        ids = make_submissions([None, None, None, START])
+        pages = self.walk(KeysetPaginator('admin_reply_date', nullable=True), page_size=1)
+        self.assertEqual(pages, [[ids[3]], [ids[2]], [ids[1]], [ids[0]]])
+
+    def test_equal_sort_values_are_ordered_by_id(self):
+        ids = make_submissions([START, START + timedelta(days=1), START, START, START])
+        pages = self.walk(KeysetPaginator('admin_reply_date'), page_size=2)
+        self.assertEqual(pages, [[ids[1], ids[4]], [ids[3], ids[2]], [ids[0]]])
+
+    def test_impossible_datetime_is_an_invalid_cursor(self):
+        paginator = KeysetPaginator('created_at')
+        for value in ['2024-13-45T00:00:00+00:00', 'not a date', '2024-01-01T00:00:00', 12]:
+            with self.subTest(value=value), self.assertRaises(InvalidCursor):
+                paginator.decode_cursor(raw_cursor(value, 1), ContactSubmission)
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPaginator('created_at')
+        cursor = paginator.encode_cursor({'id': 7, 'created_at': START})
+        self.assertEqual(paginator.decode_cursor(cursor, ContactSubmission), (START, 7))
+
+
+class NormalizeSubmissionEmailsTests(TestCase):
+    def test_existing_emails_are_lowercased(self):
+        ids = make_submissions([None, None, None])
+        # Rows stored before save() normalized emails
+        for pk, email in zip(ids, [' Jane.Doe@Example.com', 'JOHN@EXAMPLE.COM']):
+            ContactSubmission.objects.filter(pk=pk).update(email=email)
+
+        call_command('normalize_submission_emails', batch_size=2, stdout=StringIO())
+        emails = list(ContactSubmission.objects.order_by('id').values_list('email', flat=True))
+        self.assertEqual(emails, ['jane.doe@example.com', 'john@example.com', 'user2@example.com'])
+
+
+@skipUnless(connection.vendor == 'postgresql', "Index plans are checked on PostgreSQL")
+class QueryPlanTests(TestCase):
+    """The hot ContactSubmission queries (manage.py check_query_plans) can use an index"""
+
+    def test_hot_queries_use_an_index(self):
+        # Empty tables make the planner prefer sequential scans
+        with connection.cursor() as cursor:
+            cursor.execute('SET enable_seqscan = off')
+        for name, queryset in hot_queries():
+            with self.subTest(name):
+                self.assertFalse(uses_sequential_scan(queryset.explain()))
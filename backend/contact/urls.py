@@ -1,10 +1,11 @@
 from django.urls import path
-from .views import SubmitFormView, UserSubmissionsView, ContactMessageView, AdminReplyView
+from .views import SubmitFormView, UserSubmissionsView, UserAnalysesView, ContactMessageView, AdminReplyView
 
 urlpatterns = [
     # User-facing endpoints
     path('submit/', SubmitFormView.as_view(), name='submit_contact'),
     path('user-submissions/', UserSubmissionsView.as_view(), name='user_submissions'),
+    path('user-analyses/', UserAnalysesView.as_view(), name='user_analyses'),
     path('message/', ContactMessageView.as_view(), name='contact_message'),
     
     # Admin reply endpoint
@@ -10,24 +10,37 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAdminUser, IsAuthenticated, AllowAny
 from django.core.mail import send_mail
 import json
-import traceback
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Count, Max, Q
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date
+from datetime import timedelta, timezone as dt_timezone
+import hashlib
 
 from .serializers import ContactSerializer, ContactFormSerializer
 from .models import ContactSubmission
 from .email_service import send_notification_email
-from users.models import UserSubscription  # Import from users app, not contact app
+from .quota import reserve_submission
+from admin_panel.serializers import ProfileAnalysisSerializer
+from backend.idempotency import idempotent
+from backend.sse import EVENTS_PATH, issue_ticket
+from backend.throttling import ClientRateThrottle
+from backend.view_cache import cache_response, USER_SUBMISSIONS_TAG
 
 logger = logging.getLogger(__name__)
 
+# How far before a client's watermark incremental syncs start re-reading rows
+SYNC_OVERLAP = timedelta(seconds=5)
+
 class ContactFormView(APIView):
     """
     API endpoint for submitting contact forms
     """
     permission_classes = [AllowAny]
     
+    @idempotent
     def post(self, request):
         # Create a copy of request data to modify
         data = request.data.copy()
@@ -36,29 +49,29 @@ class ContactFormView(APIView):
         if request.user.is_authenticated:
             # Use the exact authenticated email (don't rely on form input)
             user_email = request.user.email
-            print(f"Associating submission with authenticated user: {user_email}")
+            logger.debug("Associating submission with authenticated user: %s", user_email)
             data['email'] = user_email
             
         # Debug the submission data
-        print(f"Processing submission with data: {data}")
+        logger.debug("Processing submission with data: %s", data)
         
         serializer = ContactSerializer(data=data)
         if serializer.is_valid():
             submission = serializer.save()
-            print(f"Created submission ID {submission.id} for email {submission.email}")
+            logger.debug("Created submission ID %s for email %s", submission.id, submission.email)
             
             # Add user reference if authenticated
             if request.user.is_authenticated:
                 submission.user = request.user
                 submission.save(update_fields=['user'])
-                print(f"Updated submission with user reference: {request.user}")
+                logger.debug("Updated submission with user reference: %s", request.user)
             
             # Send email notification to admin
 
             return Response({"message": "Form submitted successfully!"}, status=status.HTTP_201_CREATED)
         
         # Debug validation errors
-        print(f"Validation errors: {serializer.errors}")
+        logger.debug("Validation errors: %s", serializer.errors)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class ContactMessageView(APIView):
@@ -66,6 +79,8 @@ class ContactMessageView(APIView):
     API endpoint for sending contact form messages
     """
     permission_classes = [AllowAny]
+    throttle_classes = [ClientRateThrottle]
+    throttle_scope = 'contact_message'
     
     def post(self, request):
         # Create a copy of request data
@@ -87,75 +102,67 @@ class ContactMessageView(APIView):
 class SubmitFormView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @idempotent
     def post(self, request):
         # Add the authenticated user's email to the submission data
         data = request.data.copy()
         data['email'] = request.user.email
         
-        # Check subscription limits before allowing submission
-        user = request.user
-        current_month_submissions = self._get_monthly_submission_count(user)
+        logger.debug("Processing submission with data: %s", data)
         
-        # Get user's subscription tier
-        try:
-            subscription = UserSubscription.objects.get(user=user)
-            tier = subscription.tier
-        except UserSubscription.DoesNotExist:
-            tier = 'free'
+        serializer = ContactSerializer(data=data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Reserve a quota slot and insert the submission in one transaction,
+        # so concurrent submits can never exceed the monthly limit
+        with transaction.atomic():
+            allowed, tier = reserve_submission(request.user)
             
-        # Check limits based on tier
-        if tier == 'free' and current_month_submissions >= 1:
+            if allowed:
+                # Associate the submission with the authenticated user
+                logger.debug("Associating submission with authenticated user: %s", request.user.email)
+                submission = serializer.save(user=request.user)
+        
+        # Check limits based on tier (premium users have unlimited submissions)
+        if not allowed and tier == 'basic':
             return Response({
                 "success": False,
-                "error": "Free tier is limited to 1 submission. Please upgrade for more submissions.",
+                "error": "Basic tier is limited to 24 submissions per month. Please upgrade to premium for unlimited submissions.",
                 "limit_reached": True,
-                "current_tier": "free"
+                "current_tier": "basic"
             }, status=status.HTTP_403_FORBIDDEN)
-        elif tier == 'basic' and current_month_submissions >= 24:
+        elif not allowed:
             return Response({
                 "success": False,
-                "error": "Basic tier is limited to 24 submissions per month. Please upgrade to premium for unlimited submissions.",
+                "error": "Free tier is limited to 1 submission. Please upgrade for more submissions.",
                 "limit_reached": True,
-                "current_tier": "basic"
+                "current_tier": "free"
             }, status=status.HTTP_403_FORBIDDEN)
         
-        # Premium users have unlimited submissions
-        
-        print(f"Processing submission with data: {data}")
-        
-        serializer = ContactSerializer(data=data)
-        if serializer.is_valid():
-            # Associate the submission with the authenticated user
-            print(f"Associating submission with authenticated user: {request.user.email}")
-            submission = serializer.save(user=request.user)
-            
-            # Send email notification to admin
-            
-            # Return the submission data along with a success message
-            return Response({
-                "success": True, 
-                "data": serializer.data,
-                "message": "LinkedIn profile submitted successfully!"
-            }, status=status.HTTP_201_CREATED)
-            
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-    
-    def _get_monthly_submission_count(self, user):
-        """Count submissions by this user in the current month"""
-        from django.utils import timezone
-        now = timezone.now()
-        start_of_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        # Send email notification to admin
         
-        from .models import ContactSubmission
-        return ContactSubmission.objects.filter(
-            user=user,
-            created_at__gte=start_of_month
-        ).count()
+        # Return the submission data along with a success message
+        return Response({
+            "success": True, 
+            "data": serializer.data,
+            "message": "LinkedIn profile submitted successfully!"
+        }, status=status.HTTP_201_CREATED)
 
 
 class UserSubmissionsView(APIView):
     """
-    API endpoint for users to view their own submissions
+    API endpoint for users to view their own submissions.
+    
+    Without parameters the whole history is returned as a list. Clients that
+    poll can sync incrementally instead: ``?since=`` (empty) returns the same
+    rows as ``{"submissions": [...], "count": N, "watermark": W}``, and
+    ``?since=W`` then only the submissions changed after that watermark.
+    ``count`` is the user's total, so a client whose merged list has a
+    different length knows rows were deleted and resyncs.
+    
+    ETag and Last-Modified come from the user's latest ``updated_at``, so
+    conditional requests are answered with 304 after a single index lookup.
     """
     permission_classes = [IsAuthenticated]
     
@@ -164,75 +171,111 @@ class UserSubmissionsView(APIView):
         user_email = request.user.email
         
         # Debug the user email and query
-        print(f"Fetching submissions for authenticated user: {user_email}")
+        logger.debug("Fetching submissions for authenticated user: %s", user_email)
+        
+        since = request.query_params.get('since')
+        watermark = None
+        if since:
+            try:
+                # A '+' in the offset arrives as a space when not URL-encoded
+                watermark = parse_datetime(since.replace(' ', '+'))
+            except ValueError:
+                # Well-formed but impossible, e.g. month 13
+                watermark = None
+            # Watermarks always carry a UTC offset
+            if watermark is None or watermark.tzinfo is None:
+                return Response({"error": "since must be a watermark returned by this endpoint"},
+                                status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Filter strictly by the authenticated user's email
+            # Filter strictly by the authenticated user's (normalized) email
             submissions = ContactSubmission.objects.filter(
-                email__iexact=user_email
-            ).order_by('-created_at')
+                email=ContactSubmission.normalize_email(user_email)
+            )
             
-            # Build simple dictionaries with only required fields
-            submissions_list = []
-            for sub in submissions:
-                submission_data = {
-                    'id': sub.id,
-                    'linkedin_url': sub.linkedin_url,
-                    'message': sub.message,
-                    'email': sub.email,
-                    'is_processed': sub.is_processed,
-                    'created_at': sub.created_at.isoformat(),
-                }
+            # Any change (including deletions, through the count) moves the
+            # validators; this reads only the (email, updated_at) index
+            state = submissions.aggregate(latest=Max('updated_at'), count=Count('*'))
+            latest = state['latest']
+            etag = '"{}"'.format(hashlib.md5(
+                f"{request.user.id}:{latest and latest.isoformat()}:{state['count']}:{since}".encode()
+            ).hexdigest())
+            last_modified = int(latest.timestamp()) if latest else None
+            
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is None:
+                if watermark is not None:
+                    # Overlap the previous sync a little: a save that committed
+                    # late may carry an updated_at just below the watermark
+                    submissions = submissions.filter(updated_at__gt=watermark - SYNC_OVERLAP)
+                submissions_list = [
+                    self.submission_data(sub) for sub in submissions.order_by('-created_at')
+                ]
                 
-                # Only include these fields if they have values
-                if hasattr(sub, 'admin_reply') and sub.admin_reply:
-                    submission_data['admin_reply'] = sub.admin_reply
-                    
-                if hasattr(sub, 'admin_reply_date') and sub.admin_reply_date:
-                    submission_data['admin_reply_date'] = sub.admin_reply_date.isoformat()
+                # Debug the query results
+                logger.debug("Found %s submissions for %s", len(submissions_list), user_email)
                 
-                submissions_list.append(submission_data)
-            
-            # Debug the query results
-            print(f"Found {len(submissions_list)} submissions for {user_email}")
-            
-            # Add strong cache control headers to prevent browser/CDN caching
-            response = Response(submissions_list)
-            response["Cache-Control"] = "no-cache, no-store, must-revalidate, private"
-            response["Pragma"] = "no-cache"
-            response["Expires"] = "0"
-            
-            # Add a unique ETag based on user email to prevent other users' data being served
-            import hashlib
-            user_hash = hashlib.md5(user_email.encode()).hexdigest()[:10]
-            response["ETag"] = f"\"user-{user_hash}-{len(submissions_list)}\""
+                if since is None:
+                    response = Response(submissions_list)
+                else:
+                    response = Response({
+                        'submissions': submissions_list,
+                        'count': state['count'],
+                        'watermark': latest and latest.astimezone(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ'),
+                    })
+            else:
+                response = not_modified
             
+            # Browsers may keep the response but must revalidate it every time;
+            # private keeps shared caches from storing one user's data
+            response["Cache-Control"] = "private, no-cache"
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
             return response
             
         except Exception as e:
             # Log the full error with traceback for debugging
-            import traceback
-            print(f"Error in UserSubmissionsView: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in UserSubmissionsView: {str(e)}")
             return Response(
                 {"error": "An error occurred while fetching your submissions"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    
+    @staticmethod
+    def submission_data(sub):
+        """Plain dictionary with only the fields the user sees"""
+        submission_data = {
+            'id': sub.id,
+            'linkedin_url': sub.linkedin_url,
+            'message': sub.message,
+            'email': sub.email,
+            'is_processed': sub.is_processed,
+            'created_at': sub.created_at.isoformat(),
+        }
+        
+        # Only include these fields if they have values
+        if sub.admin_reply:
+            submission_data['admin_reply'] = sub.admin_reply
+        if sub.admin_reply_date:
+            submission_data['admin_reply_date'] = sub.admin_reply_date.isoformat()
+        return submission_data
 
 class UserAnalysesView(APIView):
     """API endpoint for users to view analyses of their submissions"""
     permission_classes = [IsAuthenticated]
     
+    @cache_response(scope='user', tags=[USER_SUBMISSIONS_TAG])
     def get(self, request):
         # Get current user's email
         user_email = request.user.email
         
         # Fetch submissions with analyses
         submissions = ContactSubmission.objects.filter(
-            email__iexact=user_email, 
+            email=ContactSubmission.normalize_email(user_email),
             is_processed=True,
             analysis__isnull=False
-        ).order_by('-created_at')
+        ).select_related('analysis').order_by('-created_at')
         
         data = []
         for submission in submissions:
@@ -240,15 +283,29 @@ class UserAnalysesView(APIView):
                 'id': submission.id,
                 'linkedin_url': submission.linkedin_url,
                 'created_at': submission.created_at,
-                'analysis': submission.analysis
+                'analysis': ProfileAnalysisSerializer(submission.analysis).data
             })
         
         return Response(data)
 
+class EventTicketView(APIView):
+    """
+    API endpoint issuing a one-time ticket for the Server-Sent Events
+    stream (backend/sse.py), which EventSource opens without headers
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        return Response({
+            'ticket': issue_ticket(request.user),
+            'url': request.build_absolute_uri(EVENTS_PATH),
+        }, status=status.HTTP_201_CREATED)
+
 class AdminReplyView(APIView):
     """API endpoint for admins to reply to user submissions"""
     permission_classes = [IsAdminUser]
     
+    @idempotent
     def post(self, request, submission_id):
         try:
             submission = ContactSubmission.objects.get(id=submission_id)
@@ -5,11 +5,12 @@ from rest_framework.permissions import IsAdminUser
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 import datetime
-import traceback
+import logging
 from .models import UserSubscription
 from .authentication import AdminJWTAuthentication
 
 User = get_user_model()  # This properly gets the CustomUser model
+logger = logging.getLogger(__name__)
 
 class AdminUserSubscriptionView(APIView):
     """API endpoint for admin users to manage subscriptions"""
@@ -32,8 +33,7 @@ class AdminUserSubscriptionView(APIView):
             
             return Response(data)
         except Exception as e:
-            print(f"ERROR in AdminUserSubscriptionView.get: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminUserSubscriptionView.get: {str(e)}")
             return Response({
                 'error': f"Failed to fetch subscriptions: {str(e)}"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -73,7 +73,7 @@ class AdminUserSubscriptionView(APIView):
                         'error': 'valid_for_days must be a positive number'
                     }, status=status.HTTP_400_BAD_REQUEST)
             
-            print(f"DEBUG: Creating/updating subscription for {email} with tier={tier}, end_date={end_date}")
+            logger.debug("Creating/updating subscription for %s with tier=%s, end_date=%s", email, tier, end_date)
             
             # Create or update subscription - don't set assigned_by field to avoid FK errors
             subscription, created = UserSubscription.objects.update_or_create(
@@ -84,7 +84,7 @@ class AdminUserSubscriptionView(APIView):
                 }
             )
             
-            print(f"DEBUG: Subscription {'created' if created else 'updated'} successfully: {subscription.id}")
+            logger.debug("Subscription %s successfully: %s", 'created' if created else 'updated', subscription.id)
             
             action = 'created' if created else 'updated'
             
@@ -104,8 +104,7 @@ class AdminUserSubscriptionView(APIView):
                 'error': f'User with email {email} not found'
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
-            print(f"ERROR in AdminUserSubscriptionView.post: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error in AdminUserSubscriptionView.post: {str(e)}")
             return Response({
                 'error': f'Failed to update subscription: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -141,8 +140,7 @@ class AdminUserSubscriptionView(APIView):
                 }, status=status.HTTP_404_NOT_FOUND)
             
         except Exception as e:
-            print(f"Error deleting subscription: {str(e)}")
-            print(traceback.format_exc())
+            logger.exception(f"Error deleting subscription: {str(e)}")
             return Response({
                 'error': f'Failed to delete subscription: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
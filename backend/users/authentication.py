@@ -1,18 +1,76 @@
 from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Seconds a decoded user principal is reused for the same token (jti)
+DEFAULT_PRINCIPAL_CACHE_TIMEOUT = 60
+
+
+def get_request_token(request):
+    """
+    Validate the request's bearer token once and memoize the result.
+
+    Both ``RoleBasedMiddleware`` and ``AdminJWTAuthentication`` call this,
+    so the signature is verified a single time per request. Returns the
+    validated token, ``None`` when there is no bearer token, or raises the
+    original validation error.
+    """
+    # Accept both Django's HttpRequest and DRF's Request wrapper
+    request = getattr(request, '_request', request)
+
+    if not hasattr(request, '_jwt_result'):
+        jwt_auth = JWTAuthentication()
+        header = jwt_auth.get_header(request)
+        raw_token = jwt_auth.get_raw_token(header) if header is not None else None
+
+        if raw_token is None:
+            request._jwt_result = (None, None)
+        else:
+            try:
+                request._jwt_result = (jwt_auth.get_validated_token(raw_token), None)
+            except (InvalidToken, TokenError) as e:
+                request._jwt_result = (None, e)
+
+    token, error = request._jwt_result
+    if error is not None:
+        raise error
+    return token
+
+
+def _principal_key(jti):
+    return f"jwt-principal:{jti}"
+
+
+def _principal_stamp_key(user_id):
+    return f"jwt-principal-stamp:{user_id}"
+
+
+def invalidate_cached_principals(user_id):
+    """Make every cached principal of this user stale (called when the user changes)"""
+    cache.delete(_principal_stamp_key(user_id))
+
+
 class AdminJWTAuthentication(JWTAuthentication):
     """
     Custom JWT authentication class that handles admin tokens specially.
     """
-    
+
+    def authenticate(self, request):
+        """Authenticate with the token already validated for this request"""
+        validated_token = get_request_token(request)
+        if validated_token is None:
+            return None
+        return self.get_user(validated_token), validated_token
+
     def get_user(self, validated_token):
         """
         Attempt to find and return a user using the given validated token.
@@ -22,7 +80,7 @@ class AdminJWTAuthentication(JWTAuthentication):
             # Check if this is an admin token
             if validated_token.get('role') == 'admin' and validated_token.get('email') == getattr(settings, 'ADMIN_EMAIL', None):
                 logger.info(f"Admin token detected for {validated_token.get('email')}")
-                
+
                 # Create a temporary "admin" user object that's not in the database
                 admin_user = User()
                 admin_user.id = 0
@@ -30,11 +88,39 @@ class AdminJWTAuthentication(JWTAuthentication):
                 admin_user.is_staff = True
                 admin_user.is_superuser = True
                 admin_user.role = 'admin'
-                
+
                 return admin_user
-                
+
             # Normal token processing for regular users
-            return super().get_user(validated_token)
+            return self._get_cached_user(validated_token)
         except Exception as e:
             logger.error(f"Error in admin authentication: {str(e)}")
             raise exceptions.AuthenticationFailed('Token is invalid or expired')
+
+    def _get_cached_user(self, validated_token):
+        """
+        Load the token's user, reusing a recently cached principal for the
+        same ``jti`` so hot users cost no database query.
+        """
+        timeout = getattr(settings, 'JWT_PRINCIPAL_CACHE_TIMEOUT', DEFAULT_PRINCIPAL_CACHE_TIMEOUT)
+        jti = validated_token.get(settings.SIMPLE_JWT.get('JTI_CLAIM', 'jti'))
+        user_id = validated_token.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id'))
+        if not timeout or not jti or user_id is None:
+            return super().get_user(validated_token)
+
+        key, stamp_key = _principal_key(jti), _principal_stamp_key(user_id)
+        cached = cache.get_many([key, stamp_key])
+        stamp = cached.get(stamp_key)
+        if stamp is not None and key in cached:
+            cached_stamp, user = cached[key]
+            if cached_stamp == stamp and user.is_active:
+                return user
+
+        user = super().get_user(validated_token)
+        if stamp is None:
+            # First principal since the user last changed; a unique value so
+            # principals cached before an invalidation never match again
+            cache.add(stamp_key, time.time_ns(), None)
+            stamp = cache.get(stamp_key)
+        cache.set(key, (stamp, user), timeout)
+        return user
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from google.auth import crypt, jwt
+from google.auth.transport import requests as google_requests
+from google.oauth2 import id_token
+
+from users.google_auth import CACHE_KEY, GoogleTokenVerifier
+
+KEY_ID = 'stand-in-key'
+AUDIENCE = 'bench-client-id.apps.googleusercontent.com'
+
+
+def generate_key_pair():
+    """An RSA private key (PEM) and a self-signed certificate for it (PEM)"""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'stand-in certs')])
+    now = datetime.now(dt_timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    return private_pem, cert.public_bytes(serialization.Encoding.PEM).decode()
+
+
+class StandInCertsHandler(BaseHTTPRequestHandler):
+    """
+    Serves the certificate set the way Google's endpoint does, with a
+    ``Cache-Control: max-age``. ``server.latency`` is slept per request to
+    stand in for the round trip to googleapis.com.
+    """
+
+    def do_GET(self):
+        time.sleep(self.server.latency)
+        self.server.requests += 1
+        body = json.dumps(self.server.certs).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', f'public, max-age={self.server.max_age}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInCertsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, certs, latency, max_age):
+        super().__init__(('127.0.0.1', 0), StandInCertsHandler)
+        self.certs = certs
+        self.latency = latency
+        self.max_age = max_age
+        self.requests = 0
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}/oauth2/v1/certs'
+
+
+class Command(BaseCommand):
+    help = "Benchmark Google ID token verification with and without the cached certificate verifier, using a local stand-in certificate endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--signins', type=int, default=200,
+                            help='Number of ID tokens to verify in each run')
+        parser.add_argument('--latency', type=float, default=0.05,
+                            help='Seconds slept by the stand-in endpoint per certificate fetch')
+        parser.add_argument('--max-age', type=int, default=3600,
+                            help='Cache-Control max-age sent by the stand-in endpoint')
+
+    def handle(self, *args, **options):
+        count = options['signins']
+        private_pem, cert_pem = generate_key_pair()
+        signer = crypt.RSASigner.from_string(private_pem, key_id=KEY_ID)
+
+        now = int(time.time())
+        tokens = [
+            jwt.encode(signer, {
+                'iss': 'https://accounts.google.com',
+                'aud': AUDIENCE,
+                'sub': str(100000 + i),
+                'email': f'bench{i}@example.com',
+                'email_verified': True,
+                'iat': now,
+                'exp': now + 3600,
+            }).decode()
+            for i in range(count)
+        ]
+
+        server = StandInCertsServer({KEY_ID: cert_pem}, options['latency'], options['max_age'])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        cache.delete(CACHE_KEY)
+
+        try:
+            # Before: a fresh transport and certificate download per sign-in
+            start = time.perf_counter()
+            for token in tokens:
+                id_token.verify_token(token, google_requests.Request(), AUDIENCE, certs_url=server.url)
+            before = time.perf_counter() - start
+            before_fetches = server.requests
+
+            # After: the cached verifier; only the first sign-in fetches
+            verifier = GoogleTokenVerifier(certs_url=server.url)
+            latencies = []
+            for token in tokens:
+                start = time.perf_counter()
+                verifier.verify(token, AUDIENCE)
+                latencies.append(time.perf_counter() - start)
+            after = sum(latencies)
+            after_fetches = server.requests - before_fetches
+        finally:
+            server.shutdown()
+            server.server_close()
+            cache.delete(CACHE_KEY)
+
+        hot = sorted(latencies[1:]) or latencies
+        self.stdout.write(
+            f"Fetch per sign-in: {before / count * 1000:7.2f} ms/sign-in "
+            f"({before:.2f}s, {before_fetches} certificate fetches)"
+        )
+        self.stdout.write(
+            f"Cached verifier:   {after / count * 1000:7.2f} ms/sign-in "
+            f"({after:.2f}s, {after_fetches} certificate fetch(es))"
+        )
+        self.stdout.write(
+            f"Cached verifier after warm-up: p50 {hot[len(hot) // 2] * 1000:.2f} ms, "
+            f"max {hot[-1] * 1000:.2f} ms"
+        )
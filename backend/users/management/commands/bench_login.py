@@ -0,0 +1,161 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+# gunicorn arguments of each deployment
+SERVERS = {
+    'wsgi': ['backend.wsgi:application'],
+    'asgi': ['backend.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+EMAIL = 'bench-login@example.com'
+PASSWORD = 'Bench-login-password-7'
+LOGIN_PATH = '/api/auth/login/'
+PROBE_PATH = '/api/auth/profile/'
+STARTUP_TIMEOUT = 30
+# Every login comes from one address for one account
+LIFTED_RATES = 'login=1000000/m,login.email=1000000/m'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+class Server:
+    """A gunicorn process serving the project on a local port"""
+
+    def __init__(self, kind, workers):
+        self.port = free_port()
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *SERVERS[kind], '--workers', str(workers),
+             '--bind', f'127.0.0.1:{self.port}', '--timeout', '120', '--log-level', 'warning'],
+            cwd=settings.BASE_DIR, env={**os.environ, 'THROTTLE_RATES': LIFTED_RATES},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+
+    def wait_until_ready(self):
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CommandError(f"gunicorn exited with status {self.process.returncode}")
+            try:
+                response = requests.get(self.url + PROBE_PATH, allow_redirects=False, timeout=2)
+            except requests.ConnectionError:
+                time.sleep(0.2)
+                continue
+            if response.status_code in (301, 302, 308):
+                raise CommandError("The server redirects plain HTTP; run with SECURE_SSL_REDIRECT off")
+            return
+        raise CommandError(f"gunicorn did not answer within {STARTUP_TIMEOUT}s")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+class Command(BaseCommand):
+    help = ("Compare concurrent-login throughput of the sync WSGI deployment and the async ASGI one "
+            "(gunicorn sync workers vs uvicorn workers), and the latency of a cheap request served "
+            "meanwhile. Creates a throwaway user in the configured database.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+        parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+        parser.add_argument('--logins', type=int, default=100, help='Logins per run')
+        parser.add_argument('--concurrency', type=int, default=16, help='Logins in flight at once')
+        parser.add_argument('--probe-interval', type=float, default=0.05,
+                            help='Seconds between profile requests sent during the logins')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        User.objects.filter(email=EMAIL).delete()
+        User.objects.create_user(EMAIL, PASSWORD, email_verified=True)
+        try:
+            results = [self.run(kind, options) for kind in options['servers']]
+        finally:
+            User.objects.filter(email=EMAIL).delete()
+
+        self.stdout.write(
+            f"\n{'server':8} {'workers':>7} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'503':>5} "
+            f"{'errors':>6} {'probe p50':>10} {'probe p95':>10}"
+        )
+        for kind, wall, latencies, statuses, probes in results:
+            errors = sum(count for status, count in statuses.items() if status not in (200, 503))
+            self.stdout.write(
+                f"{kind:8} {options['workers']:7} {statuses[200] / wall:9.2f} "
+                f"{percentile(latencies, 0.5) * 1000:8.0f} {percentile(latencies, 0.95) * 1000:8.0f} "
+                f"{statuses[503]:5} {errors:6} {percentile(probes, 0.5) * 1000:10.1f} "
+                f"{percentile(probes, 0.95) * 1000:10.1f}"
+            )
+
+    def run(self, kind, options):
+        self.stdout.write(f"Starting {kind} server...")
+        server = Server(kind, options['workers'])
+        local = threading.local()
+
+        def login(_=None):
+            session = getattr(local, 'session', None)
+            if session is None:
+                session = local.session = requests.Session()
+            start = time.perf_counter()
+            response = session.post(server.url + LOGIN_PATH, json={'email': EMAIL, 'password': PASSWORD},
+                                    timeout=120)
+            return response, time.perf_counter() - start
+
+        try:
+            server.wait_until_ready()
+            # Warm up every worker (imports, first connections)
+            with ThreadPoolExecutor(options['workers']) as pool:
+                warm_up = list(pool.map(login, range(options['workers'] * 2)))
+            token = warm_up[0][0].json()['access']
+
+            stop = threading.Event()
+            probes = []
+
+            def probe():
+                session = requests.Session()
+                headers = {'Authorization': f'Bearer {token}'}
+                while not stop.is_set():
+                    start = time.perf_counter()
+                    session.get(server.url + PROBE_PATH, headers=headers, timeout=120)
+                    probes.append(time.perf_counter() - start)
+                    stop.wait(options['probe_interval'])
+
+            prober = threading.Thread(target=probe, daemon=True)
+            start = time.perf_counter()
+            prober.start()
+            with ThreadPoolExecutor(options['concurrency']) as pool:
+                results = list(pool.map(login, range(options['logins'])))
+            wall = time.perf_counter() - start
+            stop.set()
+            prober.join()
+        finally:
+            server.stop()
+
+        statuses = Counter(response.status_code for response, _ in results)
+        latencies = [duration for response, duration in results if response.status_code == 200]
+        return kind, wall, latencies, statuses, probes
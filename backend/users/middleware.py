@@ -1,32 +1,27 @@
 from django.http import JsonResponse
 from django.contrib.auth.models import Group
 from django.conf import settings
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.utils.deprecation import MiddlewareMixin
+from .authentication import get_request_token
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
-class RoleBasedMiddleware:
+class RoleBasedMiddleware(MiddlewareMixin):
     """
     Middleware to ensure that JWT token-based roles are correctly processed
     """
     
-    def __init__(self, get_response):
-        self.get_response = get_response
-    
-    def __call__(self, request):
+    def process_request(self, request):
         # Process JWT token if present
         if 'HTTP_AUTHORIZATION' in request.META and request.META['HTTP_AUTHORIZATION'].startswith('Bearer '):
             try:
-                # Using JWT auth to get the token and user
-                jwt_auth = JWTAuthentication()
-                validated_token = jwt_auth.get_validated_token(
-                    request.META['HTTP_AUTHORIZATION'].split(' ')[1]
-                )
+                # Validated once per request; DRF authentication reuses it
+                validated_token = get_request_token(request)
                 
                 # Check if this is an admin token
-                if validated_token.get('role') == 'admin':
+                if validated_token is not None and validated_token.get('role') == 'admin':
                     # Debug logging
                     logger.info(f"Admin JWT token detected: {validated_token.get('email')}")
                     
@@ -40,6 +35,3 @@ class RoleBasedMiddleware:
             except Exception as e:
                 logger.error(f"JWT validation error: {str(e)}")
                 # Don't block the request, just log the error
-        
-        response = self.get_response(request)
-        return response
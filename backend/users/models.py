@@ -19,6 +19,23 @@ class CustomUserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        """
+        ``create_user`` for async views, hashing the password in the
+        password pool (users/passwords.py).
+        """
+        from .passwords import make_password
+
+        if not email:
+            raise ValueError('The Email field must be set')
+        user = self.model(email=self.normalize_email(email), **extra_fields)
+        if password is None:
+            user.set_unusable_password()
+        else:
+            user.password = await make_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, password=None, **extra_fields):
         """
         Create and return a superuser with the given email and password.
@@ -0,0 +1,100 @@
+"""
+Password hashing for async views.
+
+PBKDF2 is slow on purpose (about half a second per hash at Django's default
+iterations), and hashlib releases the GIL while it runs. Async views hand
+the hashing to a small dedicated thread pool, so up to
+``PASSWORD_HASH_WORKERS`` hashes run in parallel while the event loop keeps
+serving other requests. At most ``PASSWORD_HASH_QUEUE`` more may wait; past
+that ``HashingBusy`` answers 503 rather than queueing work the client will
+have given up on by the time it runs.
+"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-in requests at the moment, please try again shortly.'
+    default_code = 'hashing_busy'
+
+
+class HashingPool:
+    """A thread pool with a bounded number of pending jobs"""
+
+    def __init__(self, workers, queue):
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='password-hash')
+        self.limit = workers + queue
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def _release(self, future):
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, func, *args, **kwargs):
+        with self._lock:
+            if self.pending >= self.limit:
+                raise HashingBusy()
+            self.pending += 1
+        # Released when the hash finishes, even if the request was cancelled
+        future = self.executor.submit(partial(func, *args, **kwargs))
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    getattr(settings, 'PASSWORD_HASH_WORKERS', 1),
+                    getattr(settings, 'PASSWORD_HASH_QUEUE', 16),
+                )
+    return _pool
+
+
+async def make_password(raw_password):
+    """``django.contrib.auth.hashers.make_password`` in the pool"""
+    return await get_pool().run(hashers.make_password, raw_password)
+
+
+async def check_password(user, raw_password):
+    """``user.check_password`` in the pool, upgrading outdated hashes like Django does"""
+    is_correct, must_update = await get_pool().run(hashers.verify_password, raw_password, user.password)
+    if is_correct and must_update:
+        user.password = await make_password(raw_password)
+        await user.asave(update_fields=['password'])
+    return is_correct
+
+
+async def authenticate(email, password):
+    """
+    The active user with these credentials, or None - ``ModelBackend``
+    semantics with the hashing in the pool. Unknown emails still cost one
+    hash, so response times do not tell which accounts exist.
+    """
+    User = get_user_model()
+    try:
+        user = await User._default_manager.aget_by_natural_key(email)
+    except User.DoesNotExist:
+        await make_password(password)
+        return None
+    if await check_password(user, password) and user.is_active:
+        return user
+    return None
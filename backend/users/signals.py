@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_principals
+
+
+@receiver([post_save, post_delete], sender=get_user_model())
+def invalidate_user_principals(sender, instance, **kwargs):
+    """Cached JWT principals must not outlive a change to the user"""
+    invalidate_cached_principals(instance.pk)
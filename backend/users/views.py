@@ -3,28 +3,35 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.utils.encoding import force_str
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
 from django.shortcuts import get_object_or_404
-from django.core.mail import send_mail
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
 from django.utils import timezone
+from asgiref.sync import sync_to_async
 
 import logging
 from .serializers import UserSerializer, RegisterSerializer, PasswordResetSerializer, PasswordResetConfirmSerializer
 from .models import UserSubscription  # Import the UserSubscription model
+from .google_auth import get_google_verifier
+from .passwords import HashingBusy, authenticate, make_password
+from contact.email_service import send_notification_email
+from backend.async_views import AsyncAPIView
+from backend.throttling import ClientRateThrottle, EmailRateThrottle
+from backend.view_cache import cache_response, SUBSCRIPTION_TAG
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
-class LoginView(APIView):
+class LoginView(AsyncAPIView):
     permission_classes = [AllowAny]
+    # Checked before the password is hashed
+    throttle_classes = [ClientRateThrottle, EmailRateThrottle]
+    throttle_scope = 'login'
     
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get("email")
         password = request.data.get("password")
 
@@ -45,7 +52,8 @@ class LoginView(APIView):
                     "user_id": "admin"
                 })
 
-        user = authenticate(request, email=email, password=password)
+        # The PBKDF2 check runs in the password pool, off the event loop
+        user = await authenticate(email, password)
         if user is not None:
             # Check if email is verified
             if hasattr(user, 'email_verified') and not user.email_verified:
@@ -68,17 +76,19 @@ class LoginView(APIView):
 
         return Response({"detail": "Invalid credentials."}, status=401)
 
-class RegisterView(APIView):
+class RegisterView(AsyncAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [ClientRateThrottle, EmailRateThrottle]
+    throttle_scope = 'register'
     
-    def post(self, request):
+    async def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         
         # Check if email already exists but is unverified
         email = request.data.get('email', '').lower().strip()
         if email:
             try:
-                existing_user = User.objects.get(email=email)
+                existing_user = await User.objects.aget(email=email)
                 # If user exists but is unverified, send new verification email
                 if hasattr(existing_user, 'email_verified') and not existing_user.email_verified:
                     # Generate new verification token
@@ -88,38 +98,29 @@ class RegisterView(APIView):
                     # Build verification URL
                     verification_url = f"{settings.FRONTEND_URL}/verify-email/{uid}-{token}"
                     
-                    # Send verification email
-                    try:
-                        send_mail(
-                            'Verify Your Email',
-                            f'Please click the link to verify your email: {verification_url}',
-                            settings.DEFAULT_FROM_EMAIL,
-                            [existing_user.email],
-                            fail_silently=False,
-                        )
+                    # Queue verification email for the background worker
+                    if await sync_to_async(send_notification_email)(
+                        'Verify Your Email',
+                        f'Please click the link to verify your email: {verification_url}',
+                        [existing_user.email],
+                    ):
                         return Response({
                             "message": "This email is already registered but not verified. A new verification email has been sent."
                         }, status=200)
-                    except Exception as e:
-                        logger.error(f"Failed to send verification email: {str(e)}")
-                        return Response({
-                            "error": "Failed to send verification email. Please try again later."
-                        }, status=500)
+                    return Response({
+                        "error": "Failed to send verification email. Please try again later."
+                    }, status=500)
             except User.DoesNotExist:
                 # User doesn't exist, continue with normal registration
                 pass
         
         # Normal registration flow
-        if serializer.is_valid():
-            user = serializer.save()
-            
-            # Only try to set email_verified if the field exists
-            try:
-                user.email_verified = False
-                user.save()
-            except Exception as e:
-                # Log the error but continue
-                print(f"Warning: Could not set email_verified: {e}")
+        if await sync_to_async(serializer.is_valid)():
+            user = await User.objects.acreate_user(
+                serializer.validated_data['email'],
+                serializer.validated_data['password'],
+                email_verified=False,
+            )
             
             # Generate verification token
             uid = urlsafe_base64_encode(force_str(user.pk).encode())
@@ -128,17 +129,13 @@ class RegisterView(APIView):
             # Build verification URL
             verification_url = f"{settings.FRONTEND_URL}/verify-email/{uid}-{token}"
             
-            # Send verification email
-            try:
-                send_mail(
-                    'Verify Your Email',
-                    f'Please click the link to verify your email: {verification_url}',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [user.email],
-                    fail_silently=False,
-                )
-            except Exception as e:
-                logger.error(f"Failed to send verification email: {str(e)}")
+            # Queue verification email for the background worker
+            if not await sync_to_async(send_notification_email)(
+                'Verify Your Email',
+                f'Please click the link to verify your email: {verification_url}',
+                [user.email],
+            ):
+                logger.error(f"Failed to queue verification email for {user.email}")
             
             return Response({
                 "message": "Registration successful! Please check your email to verify your account."
@@ -171,19 +168,21 @@ class VerifyEmailView(APIView):
             logger.error(f"Email verification error: {str(e)}")
             return Response({"detail": "Invalid verification token format."}, status=400)
 
-class ResendVerificationView(APIView):
+class ResendVerificationView(AsyncAPIView):
     """
     API endpoint for resending the verification email
     """
     permission_classes = [AllowAny]
+    throttle_classes = [ClientRateThrottle, EmailRateThrottle]
+    throttle_scope = 'verification_email'
     
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get('email')
         if not email:
             return Response({"detail": "Email is required."}, status=400)
         
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
             
             # Skip if email is already verified
             if hasattr(user, 'email_verified') and user.email_verified:
@@ -196,14 +195,13 @@ class ResendVerificationView(APIView):
             # Build verification URL - using correct format
             verification_url = f"{settings.FRONTEND_URL}/verify-email/{uid}-{token}"
             
-            # Send verification email
-            send_mail(
+            # Queue verification email for the background worker
+            if not await sync_to_async(send_notification_email)(
                 'Verify Your Email',
                 f'Please click the link to verify your email: {verification_url}',
-                settings.DEFAULT_FROM_EMAIL,
                 [user.email],
-                fail_silently=False,
-            )
+            ):
+                return Response({"detail": "Error sending verification email."}, status=500)
             
             return Response({"detail": "Verification email sent."}, status=200)
             
@@ -233,7 +231,7 @@ class ProfileView(APIView):
         serializer = UserSerializer(request.user)
         return Response(serializer.data)
 
-class GoogleAuthView(APIView):
+class GoogleAuthView(AsyncAPIView):
     permission_classes = [AllowAny]
     
     def options(self, request, *args, **kwargs):
@@ -246,7 +244,7 @@ class GoogleAuthView(APIView):
         response["Access-Control-Allow-Credentials"] = "true"
         return response
     
-    def post(self, request):
+    async def post(self, request):
         response = Response()
         origin = request.META.get('HTTP_ORIGIN', '*')
         response["Access-Control-Allow-Origin"] = origin
@@ -261,10 +259,9 @@ class GoogleAuthView(APIView):
             return response
         
         try:
-            # Verify Google token
+            # Verify Google token against the cached certificate set
             client_id = settings.GOOGLE_OAUTH_CLIENT_ID
-            idinfo = id_token.verify_oauth2_token(
-                credential, google_requests.Request(), client_id)
+            idinfo = await get_google_verifier().averify(credential, client_id)
                 
             # Check issuer
             if idinfo['iss'] not in ['accounts.google.com', 'https://accounts.google.com']:
@@ -279,7 +276,7 @@ class GoogleAuthView(APIView):
             
             # Check if user exists
             try:
-                user = User.objects.get(email=email)
+                user = await User.objects.aget(email=email)
                 
                 # Handle signup attempt for existing user
                 if action == 'signup':
@@ -293,7 +290,7 @@ class GoogleAuthView(APIView):
                 # Update Google ID if not set
                 if not user.google_id:
                     user.google_id = google_id
-                    user.save(update_fields=['google_id'])
+                    await user.asave(update_fields=['google_id'])
                 
                 # Create tokens
                 refresh = RefreshToken.for_user(user)
@@ -323,7 +320,7 @@ class GoogleAuthView(APIView):
                     return response
                 
                 # Create new user for signup
-                user = User.objects.create_user(
+                user = await User.objects.acreate_user(
                     email=email,
                     password=None,
                     google_id=google_id,
@@ -353,19 +350,21 @@ class GoogleAuthView(APIView):
             response.status_code = 500
             return response
 
-class PasswordResetView(APIView):
+class PasswordResetView(AsyncAPIView):
     """
     API endpoint for requesting a password reset email
     """
     permission_classes = [AllowAny]  # Important - this should be open to anonymous users
+    throttle_classes = [ClientRateThrottle, EmailRateThrottle]
+    throttle_scope = 'password_reset'
     
-    def post(self, request):
+    async def post(self, request):
         email = request.data.get('email')
         if not email:
             return Response({"detail": "Email is required."}, status=400)
         
         try:
-            user = User.objects.get(email=email)
+            user = await User.objects.aget(email=email)
             
             # Generate token and uid for password reset
             uid = urlsafe_base64_encode(force_str(user.pk).encode())
@@ -374,7 +373,7 @@ class PasswordResetView(APIView):
             # Build reset URL
             reset_url = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}"
             
-            # Send email
+            # Queue email for the background worker
             subject = "Password Reset Request"
             message = f"""
             You requested a password reset for your account.
@@ -385,13 +384,8 @@ class PasswordResetView(APIView):
             If you didn't request this, you can safely ignore this email.
             """
             
-            send_mail(
-                subject=subject,
-                message=message,
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=False,
-            )
+            if not await sync_to_async(send_notification_email)(subject, message, [user.email]):
+                return Response({"detail": "Error sending password reset email."}, status=500)
             
             return Response({"detail": "Password reset email sent."}, status=200)
             
@@ -402,17 +396,17 @@ class PasswordResetView(APIView):
             logger.error(f"Password reset error: {str(e)}")
             return Response({"detail": "Error sending password reset email."}, status=500)
 
-class PasswordResetConfirmView(APIView):
+class PasswordResetConfirmView(AsyncAPIView):
     """
     API endpoint to confirm password reset and set new password
     """
     permission_classes = [AllowAny]
     
-    def post(self, request, uidb64, token):
+    async def post(self, request, uidb64, token):
         try:
             # Get user from uid
             uid = force_str(urlsafe_base64_decode(uidb64))
-            user = User.objects.get(pk=uid)
+            user = await User.objects.aget(pk=uid)
             
             # Validate token
             if not default_token_generator.check_token(user, token):
@@ -429,14 +423,16 @@ class PasswordResetConfirmView(APIView):
             if password != password2:
                 return Response({"detail": "Passwords don't match."}, status=400)
             
-            # Set new password
-            user.set_password(password)
-            user.save()
+            # Set new password, hashed in the password pool
+            user.password = await make_password(password)
+            await user.asave(update_fields=['password'])
             
             return Response({"detail": "Password has been reset successfully."}, status=200)
             
         except User.DoesNotExist:
             return Response({"detail": "Invalid reset link."}, status=400)
+        except HashingBusy:
+            raise
         except Exception as e:
             logger.error(f"Password reset confirm error: {str(e)}")
             return Response({"detail": "Error resetting password."}, status=500)
@@ -445,48 +441,47 @@ class UserSubscriptionView(APIView):
     """API endpoint for users to check their subscription tier"""
     permission_classes = [IsAuthenticated]
     
+    @cache_response(scope='user', tags=[SUBSCRIPTION_TAG])
     def get(self, request):
         user = request.user
-        import traceback
         
         try:
             # Enhanced debugging for subscription issues
-            print(f"DEBUG: Fetching subscription for user: {user.email} (id: {user.id})")
+            logger.debug("Fetching subscription for user: %s (id: %s)", user.email, user.id)
             
             # Try to get user subscription with a direct query
             subscription = UserSubscription.objects.filter(user=user).first()
             
             if subscription:
-                print(f"DEBUG: Found subscription in DB: tier={subscription.tier}, end_date={subscription.end_date}")
+                logger.debug("Found subscription in DB: tier=%s, end_date=%s", subscription.tier, subscription.end_date)
                 
                 # Always normalize the tier to lowercase for consistency
                 tier = subscription.tier.lower() if subscription.tier else 'free'
                 
                 # Check if subscription has expired
                 if subscription.end_date and subscription.end_date < timezone.now():
-                    print(f"DEBUG: Subscription expired: {subscription.end_date} < {timezone.now()}")
+                    logger.debug("Subscription expired: %s < %s", subscription.end_date, timezone.now())
                     return Response({
                         'tier': 'free',
                         'message': 'Your subscription has expired',
                         'debug_info': 'Subscription exists but has expired'
                     })
                 
-                print(f"DEBUG: Returning active subscription with tier: {tier}")
+                logger.debug("Returning active subscription with tier: %s", tier)
                 return Response({
                     'tier': tier,
                     'end_date': subscription.end_date,
                     'subscription_id': subscription.id
                 })
             else:
-                print(f"DEBUG: No subscription found in DB for user: {user.email}")
+                logger.debug("No subscription found in DB for user: %s", user.email)
                 # Default to free tier if no subscription exists
                 return Response({
                     'tier': 'free',
                     'debug_info': 'No subscription record found'
                 })
         except Exception as e:
-            print(f"ERROR: Exception in UserSubscriptionView: {str(e)}")
-            print(f"ERROR: {traceback.format_exc()}")
+            logger.exception(f"Exception in UserSubscriptionView: {str(e)}")
             return Response({
                 'tier': 'free',
                 'error': str(e),
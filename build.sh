@@ -9,9 +9,14 @@ echo "Collecting static files"
 python manage.py collectstatic --no-input
 
 echo "Creating initial migrations if needed"
-python manage.py makemigrations users
+python manage.py makemigrations users contact admin_panel
 
 echo "Running database migrations"
 python manage.py migrate
 
+# Before the new release serves traffic: the user views match submission
+# emails exactly against the lowercased form
+echo "Normalizing submission emails"
+python manage.py normalize_submission_emails
+
 echo "Build completed successfully"